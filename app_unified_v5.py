@@ -1,6 +1,27 @@
-import json, datetime, io, csv
+import json, datetime, os
 import streamlit as st
-import pandas as pd
+
+from kalkulator import (
+    normalize_cjenik, load_cjenik,
+    short_code_for, auto_kant_counts, compile_catalog,
+    derive_rows, calculate, materials_services_summary, extras_breakdown,
+    labor_total_calc, final_breakdown,
+)
+from kalkulator.cache import LRUCache, stable_hash, pricebook_version
+from kalkulator.exports import build_csv, build_xlsx_kantiranje, build_full_pdf, build_exports, build_zip, EXPORT_KINDS
+from kalkulator.catalog_db import CatalogDB
+from kalkulator.quote_db import QuoteDB
+from kalkulator.fetch import fetch_sources
+from kalkulator.nesting import nest_rows, nesting_waste_eur
+from kalkulator.projekt import Projekt
+from kalkulator.parts import Part
+from kalkulator.ingest import cjenik_from_csv_sources
+from kalkulator.catalog import pick_label
+from kalkulator.extras import DODATCI_COLS, dodatci_template, price_dodatci, price_picklist
+from kalkulator.timing import StageTimer, TimingLog, enabled_from_env
+
+# Mjerenje faza ovog reruna (prikaz: KALKULATOR_TIMING=1 ili prekidač u sidebaru)
+TIMER = StageTimer()
 
 st.set_page_config(page_title="MIA Stil – Kalkulator Korpusa (Unified V5+)", page_icon="🧮", layout="wide", initial_sidebar_state="expanded")
 
@@ -31,148 +52,51 @@ src = st.sidebar.radio(
     index=0
 )
 
-def normalize_cjenik(data: dict):
-    """Uskladi sve ključeve i normaliziraj OKOV/OPREMA liste (razne varijante 'art_nr')."""
-    data = data or {}
-
-    # Osnovne grupe
-    for key, default in [
-        ("materijali", []), ("abs_trake", []),
-        ("materijali_fronta", []), ("abs_trake_fronta", []),
-        ("usluge", []),
-        ("okov", []), ("oprema", []), ("dodatci", []),
-    ]:
-        data.setdefault(key, default)
-
-    # Aliasi (korisnici često napišu množinu ili krivo)
-    if not data.get("okov") and data.get("okovi"):
-        data["okov"] = data.get("okovi") or []
-    if not data.get("oprema") and data.get("opreme"):
-        data["oprema"] = data.get("opreme") or []
-
-    # Helper: normaliziraj ključeve jednog retka u katalogu (OKOV/OPREMA)
-    def norm_item_keys(x: dict):
-        if not isinstance(x, dict):
-            return {}
-        out = {}
-        for k, v in x.items():
-            k_norm = str(k).strip().lower().replace(" ", "_").replace("-", "_").replace(".", "")
-            # mapiranja za art_nr
-            if k_norm in ("art_nr", "artnr", "art__nr", "artnr_", "art_nr_", "artnr__"):
-                k_norm = "art_nr"
-            if k_norm in ("art", "sifra_artikla", "artikl", "sifra"):  # minimalistički aliasi
-                # Samo mapiraj u art_nr ako izgleda kao šifra artikla (string bez razmaka)
-                if isinstance(v, str) and v.strip():
-                    k_norm = "art_nr"
-            out[k_norm] = v
-        # standardiziraj tipove/praznine
-        if "art_nr" in out and isinstance(out["art_nr"], str):
-            out["art_nr"] = out["art_nr"].strip()
-        if "jedinica" in out and isinstance(out["jedinica"], str):
-            out["jedinica"] = out["jedinica"].strip()
-        return out
-
-    # Normaliziraj OKOV/OPREMA zapise (ključeve i whitespace)
-    data["okov"] = [norm_item_keys(x) for x in (data.get("okov") or [])]
-    data["oprema"] = [norm_item_keys(x) for x in (data.get("oprema") or [])]
-
-    # Ako i dalje nema art_nr, pokušaj iz "art" ili "sifra"
-    def ensure_art_nr(lst):
-        fixed = []
-        for x in lst:
-            if not x.get("art_nr"):
-                # fallback iz nekoliko mogućih polja
-                for alt in ("art", "sifra_artikla", "artikl", "sifra"):
-                    val = x.get(alt)
-                    if isinstance(val, str) and val.strip():
-                        x["art_nr"] = val.strip()
-                        break
-            fixed.append(x)
-        return fixed
-
-    data["okov"] = ensure_art_nr(data["okov"])
-    data["oprema"] = ensure_art_nr(data["oprema"])
-
-    # Placeholderi ako je sve prazno
-    if not data["okov"]:
-        data["okov"] = [{
-            "art_nr":"OK-1001", "naziv":"Pant (par) – placeholder",
-            "dobavljac":"Blum", "jedinica":"par", "cijena_eur":6.20
-        }]
-    if not data["oprema"]:
-        data["oprema"] = [{
-            "art_nr":"OP-2001", "naziv":"Ručkica 160mm – placeholder",
-            "dobavljac":"Hettich", "jedinica":"kom", "cijena_eur":3.20
-        }]
-    if not data.get("dodatci"):
-        data["dodatci"] = [{
-            "sifra":"DD-001","naziv":"Dodatni element – placeholder",
-            "jedinica":"po kom","cijena_eur":10.00,"vrsta":"po kom"
-        }]
-
-    return data
-
-@st.cache_data(show_spinner=False)
+# Loaderi vraćaju (cjenik, verzija); verzija = hash sadržaja, računa se jednom po učitavanju.
+# cache_resource: cjenik se dijeli bez kopiranja na svakom rerunu (app ga samo čita).
+@st.cache_resource(show_spinner=False)
 def load_local():
-    with open("cjenik.json","r",encoding="utf-8") as f:
-        return normalize_cjenik(json.load(f))
-
-def from_csv_rows(rows, schema):
-    out = []
-    for r in rows:
-        item = {}
-        for k, conv in schema.items():
-            val = r.get(k, "")
-            if conv:
-                try:
-                    val = conv(val)
-                except Exception:
-                    val = conv("0")
-            item[k] = val
-        out.append(item)
-    return out
-
-@st.cache_data(show_spinner=False)
+    cje = load_cjenik("cjenik.json")
+    return cje, pricebook_version(cje)
+
+@st.cache_resource(show_spinner=False)
 def load_from_uploaded(file_bytes: bytes):
-    return normalize_cjenik(json.loads(file_bytes.decode("utf-8")))
+    cje = normalize_cjenik(json.loads(file_bytes.decode("utf-8")))
+    return cje, pricebook_version(cje)
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
 def load_from_csv_urls(url_mat, url_trak, url_fr, url_ftrak, url_usl,
                        url_okov, url_oprema, url_dodatci):
-    s_m = {"sifra":str, "naziv":str, "cijena_eur_po_m2": lambda x: float(str(x).replace(",","."))}
-    s_t = {"sifra":str, "naziv":str, "cijena_eur_po_m":  lambda x: float(str(x).replace(",","."))}
-    s_u = {"sifra":str, "naziv":str, "cijena_eur_po_m":  lambda x: float(str(x).replace(",","."))}
-    s_x = {"art_nr":str, "naziv":str, "dobavljac":str, "jedinica":str, "cijena_eur": lambda x: float(str(x).replace(",","."))}
-    s_d = {"sifra":str, "naziv":str, "jedinica":str, "cijena_eur": lambda x: float(str(x).replace(",",".")), "vrsta":str}
-
-    mats=trake=fr=ftrake=usl=okov=oprema=dodatci=[]
-    if url_mat:   mats   = from_csv_rows(pd.read_csv(url_mat).fillna("").to_dict(orient="records"), s_m)
-    if url_trak:  trake  = from_csv_rows(pd.read_csv(url_trak).fillna("").to_dict(orient="records"), s_t)
-    if url_fr:    fr     = from_csv_rows(pd.read_csv(url_fr).fillna("").to_dict(orient="records"), s_m)
-    if url_ftrak: ftrake = from_csv_rows(pd.read_csv(url_ftrak).fillna("").to_dict(orient="records"), s_t)
-    if url_usl:   usl    = from_csv_rows(pd.read_csv(url_usl).fillna("").to_dict(orient="records"), s_u)
-    if url_okov:  okov   = from_csv_rows(pd.read_csv(url_okov).fillna("").to_dict(orient="records"), s_x)
-    if url_oprema:oprema = from_csv_rows(pd.read_csv(url_oprema).fillna("").to_dict(orient="records"), s_x)
-    if url_dodatci:dodatci=from_csv_rows(pd.read_csv(url_dodatci).fillna("").to_dict(orient="records"), s_d)
-
-    return normalize_cjenik({
-        "materijali": mats, "abs_trake": trake,
-        "materijali_fronta": fr, "abs_trake_fronta": ftrake,
-        "usluge": usl,
-        "okov": okov, "oprema": oprema, "dodatci": dodatci
+    # Svi izvori paralelno; nepromijenjeni sheetovi se ne skidaju ponovno (disk cache + ETag/Last-Modified)
+    fetched = fetch_sources({
+        "materijali": url_mat, "abs_trake": url_trak,
+        "materijali_fronta": url_fr, "abs_trake_fronta": url_ftrak,
+        "usluge": url_usl, "okov": url_okov, "oprema": url_oprema, "dodatci": url_dodatci,
     })
+    for name, res in fetched.items():
+        if res["data"] is None:
+            raise RuntimeError(f"{name}: {res['error']}")
+    # Stupčani uvoz: cijene se parsiraju po stupcu, loši retci idu u izvještaj umjesto tihih nula
+    data, row_errors = cjenik_from_csv_sources({name: res["data"] for name, res in fetched.items()})
 
-CJE = None
+    cje = normalize_cjenik(data)
+    report = [{k: v for k, v in res.items() if k != "data"} for res in fetched.values()]
+    return cje, pricebook_version(cje), report, row_errors
+
+CJE = CJE_VER = None
 if src == "Lokalni cjenik.json (default)":
     try:
-        CJE = load_local(); st.sidebar.success("Učitano iz cjenik.json")
+        with TIMER.stage("cjenik"):
+            CJE, CJE_VER = load_local()
+        st.sidebar.success("Učitano iz cjenik.json")
     except Exception as e:
         st.sidebar.error(f"Greška pri čitanju cjenik.json: {e}")
 elif src == "Učitaj JSON (drag&drop)":
     up = st.sidebar.file_uploader("JSON s cjenikom", type=["json"])
     if up:
         try:
-            CJE = load_from_uploaded(up.read())
+            with TIMER.stage("cjenik"):
+                CJE, CJE_VER = load_from_uploaded(up.read())
             if st.sidebar.toggle("💾 Spremi kao cjenik.json", value=False):
                 with open("cjenik.json","w",encoding="utf-8") as f:
                     json.dump(CJE, f, ensure_ascii=False, indent=2)
@@ -200,8 +124,22 @@ elif src == "CSV URL-ovi (Google Sheets)":
     url_dodatci = st.sidebar.text_input("URL CSV – DODATCI")
     if st.sidebar.button("🔗 Uvezi CSV", use_container_width=True):
         try:
-            CJE = load_from_csv_urls(url_mat, url_trak, url_fr, url_ftrak, url_usl, url_okov, url_oprema, url_dodatci)
+            with TIMER.stage("cjenik"):
+                CJE, CJE_VER, fetch_report, row_errors = load_from_csv_urls(url_mat, url_trak, url_fr, url_ftrak, url_usl, url_okov, url_oprema, url_dodatci)
             st.sidebar.success("CSV uvezen")
+            st.sidebar.dataframe(
+                [{"Izvor": r["name"], "Status": r["status"], "s": round(r["seconds"], 3),
+                  "KB": round(r["bytes"] / 1024, 1), "Greška": r["error"]} for r in fetch_report],
+                hide_index=True, use_container_width=True)
+            for r in fetch_report:
+                if r["status"] == "stale":
+                    st.sidebar.warning(f"{r['name']}: mreža nedostupna, koristi se zadnja spremljena verzija ({r['error']})")
+            if row_errors:
+                st.sidebar.warning(f"{len(row_errors)} neispravnih vrijednosti u CSV-u (cijena postavljena na 0):")
+                st.sidebar.dataframe(
+                    [{"Izvor": e["izvor"], "Redak": e["redak"], "Stupac": e["stupac"],
+                      "Vrijednost": e["vrijednost"], "Greška": e["greska"]} for e in row_errors],
+                    hide_index=True, use_container_width=True)
         except Exception as e:
             st.sidebar.error(f"Greška pri čitanju CSV URL-ova: {e}")
 
@@ -229,10 +167,10 @@ with st.expander("🧪 Dijagnostika cjenika (OKOV/OPREMA)"):
     st.write(f"OPREMA učitano: {len(raw_oprema)}  |  s valjanim 'art_nr': {len(raw_oprema) - len(miss_opr)}")
     if miss_okov:
         st.warning("OKOV stavke bez 'art_nr' (ignorirane u padajućem izborniku):")
-        st.dataframe(pd.DataFrame(miss_okov), use_container_width=True)
+        st.dataframe(miss_okov, use_container_width=True)
     if miss_opr:
         st.warning("OPREMA stavke bez 'art_nr' (ignorirane u padajućem izborniku):")
-        st.dataframe(pd.DataFrame(miss_opr), use_container_width=True)
+        st.dataframe(miss_opr, use_container_width=True)
 
 # =============== Wizard header ===============
 st.markdown('<div class="sticky">🧮 <strong>Kalkulator Korpusa – Unified V5+</strong> &nbsp; <span class="badge">1) Dimenzije → 2) Materijali → 3) Fronta → 4) Okov/Oprema/Dodatci → 5) Rad & marža → 6) Sažetak</span></div>', unsafe_allow_html=True)
@@ -241,14 +179,6 @@ st.markdown('<div class="sticky">🧮 <strong>Kalkulator Korpusa – Unified V5+
 def fmt_eur(x): return f"{x:,.2f} €".replace(",", " ").replace(".", ",")
 def fmt_m(x): return f"{x:,.2f} m".replace(",", " ").replace(".", ",")
 def fmt_m2(x): return f"{x:,.3f} m²".replace(",", " ").replace(".", ",")
-def mm2_to_m2(mm2: float) -> float: return mm2 / 1_000_000.0
-def mm_to_m(mm: float) -> float: return mm / 1000.0
-
-def kant_length_mm_longshort(w, d, long_cnt:int, short_cnt:int):
-    long_e = max(w, d); short_e = min(w, d)
-    long_cnt = max(0, min(2, int(long_cnt))); short_cnt = max(0, min(2, int(short_cnt)))
-    return long_cnt * long_e + short_cnt * short_e
-
 def kv_table(title, rows):
     st.markdown(f"#### {title}")
     html = ['<div class="section"><table class="kv">']
@@ -258,60 +188,28 @@ def kv_table(title, rows):
     html.append("</table></div>")
     st.markdown("\n".join(html), unsafe_allow_html=True)
 
-# --- kratke oznake elemenata ---
-def short_code_for(naziv: str) -> str:
-    nz = (naziv or "").strip().lower()
-    if nz.startswith("stranica"): return "Str"
-    if nz.startswith("pod"): return "Pd"
-    if nz.startswith("kapa_povez"): return "Pov"
-    if nz.startswith("kapa"): return "Kp"
-    if nz.startswith("polica"): return "Pol"
-    if "leđa" in nz or "ledja" in nz: return "Ld"
-    if nz.startswith("fronta"): return "Fr"
-    if "haupt" in nz and "horizontalni" in nz: return "HptHor"
-    if "haupt" in nz and "vertikalni" in nz: return "HptVer"
-    return ""
-
-# === helper za usklađen prikaz kantiranja (UI) s auto-pravilima ===
-def auto_kant_counts(naziv: str, auto: bool, A: float, B: float, fallback_dugi: int, fallback_kratki: int):
-    nz = (naziv or "").strip().lower()
-    if not auto:
-        return max(0, min(2, int(fallback_dugi or 0))), max(0, min(2, int(fallback_kratki or 0)))
-    if nz.startswith("pod"):
-        return (1, 2) if A >= B else (2, 1)
-    if nz.startswith("kapa") and "povez" not in nz:
-        return (1, 2) if A >= B else (2, 1)
-    if "haupt" in nz and "horizontalni" in nz:
-        return (1, 2) if A >= B else (2, 1)
-    if nz.startswith("stranica") or ("haupt" in nz and "vertikalni" in nz):
-        return 1, 1
-    if nz.startswith("polica") or nz.startswith("fronta"):
-        return 2, 2
-    return max(0, min(2, int(fallback_dugi or 0))), max(0, min(2, int(fallback_kratki or 0)))
-
 # ---- OKOV/OPREMA pick-list editor (select po Art. Nr. + Naziv + Dobavljač) ----
-def picklist_editor(catalog: dict, keys: list, title: str, key: str):
+def picklist_editor(catalog, options, by_label, title: str, key: str, search=None):
     """
     Editor s padajućim izbornikom gdje se prikazuje i šifra (art_nr) i naziv (+ dobavljač).
     Korisnik bira npr. "OK-1001 — Pant 110° (Blum)", a mi to mapiramo natrag na art_nr.
-    Robusno rukuje praznim redovima / NaN vrijednostima.
+    ``options``/``by_label`` su izgrađeni jednom po verziji cjenika (``KAT.OKOV_PICK`` …);
+    tablica se obračunava po stupcu (``price_picklist``), prazni redovi / NaN se preskaču.
+    Ako je zadan ``search(text, limit)`` (SQLite katalog), opcije su samo rezultati
+    pretrage + već odabrane stavke, umjesto cijelog kataloga.
     """
-    import math
+    import pandas as pd   # tek kad se editor crta – ne usporava start skripte
     st.subheader(title)
 
-    # Svježe opcije i mapa display -> art_nr
-    options_disp = []
-    DISP2ART = {}
-    for art in sorted([k for k in catalog.keys() if k]):
-        item = catalog.get(art) or {}
-        naziv = str(item.get("naziv") or "").strip()
-        dob = str(item.get("dobavljac") or "").strip()
-        # Labela: ART — Naziv (Dobavljač)  [Dobavljač je opcionalan]
-        label = f"{art} — {naziv}" + (f" ({dob})" if dob else "")
-        options_disp.append(label)
-        DISP2ART[label] = art
-
-    if not options_disp:
+    if search is not None:
+        picked = st.session_state.setdefault(f"{key}_picked", {})
+        q = st.text_input(f"Traži (šifra / naziv / dobavljač) – {len(catalog)} artikala u katalogu", key=f"{key}_q")
+        by_label = dict(picked)
+        for item in search(q, limit=200):
+            by_label[pick_label(item["art_nr"], item)] = item["art_nr"]
+        options = [""] + sorted(by_label)
+
+    if len(options) <= 1:
         st.warning("Nema stavki u cjeniku za ovaj odjeljak (provjeri polje 'art_nr' u JSON-u).")
 
     # Start s jednim praznim retkom; korisnik može dodavati/brisati retke
@@ -323,113 +221,70 @@ def picklist_editor(catalog: dict, keys: list, title: str, key: str):
         use_container_width=True,
         column_config={
             # U editoru prikazujemo kombinirani 'label' kao opciju
-            "art_pick": st.column_config.SelectboxColumn("Art. Nr. / Naziv", options=[""] + options_disp),
+            "art_pick": st.column_config.SelectboxColumn("Art. Nr. / Naziv", options=options),
             "kolicina": st.column_config.NumberColumn("Količina", min_value=0, step=1),
         },
         key=key,
     )
 
-    def safe_str(x) -> str:
-        if x is None: return ""
-        if isinstance(x, float):
-            try:
-                if math.isnan(x): return ""
-            except Exception:
-                pass
-        s = str(x).strip()
-        return "" if s.lower() == "nan" else s
-
-    def safe_int(x, default=0) -> int:
-        if x is None: return default
-        if isinstance(x, float):
-            try:
-                if math.isnan(x): return default
-            except Exception:
-                pass
-        s = str(x).strip()
-        if s == "" or s.lower() == "nan": return default
-        try:
-            return int(float(s))
-        except Exception:
-            return default
-
-    out_rows = []
-    preview_rows = []
-    for _, r in edited.iterrows():
-        pick = safe_str(r.get("art_pick"))
-        qty = safe_int(r.get("kolicina"), 0)
-
-        # preskoči prazan red ili količinu 0
-        if not pick or qty <= 0:
-            continue
-
-        # mapiraj display natrag u art_nr
-        art = DISP2ART.get(pick)
-        if not art:
-            # fallback: možda je korisnik direktno upisao art broj
-            art = pick.split("—", 1)[0].strip()
-
-        item = catalog.get(art, {})
-        naziv = safe_str(item.get("naziv"))
-        dob = safe_str(item.get("dobavljac"))
-        jed = safe_str(item.get("jedinica")) or "kom"
-        try:
-            cij = float(item.get("cijena_eur") or 0.0)
-        except Exception:
-            cij = 0.0
-        iznos = cij * qty
-
-        out_rows.append({
-            "kategorija": title.split()[0].upper().replace("🔩","").replace("🧰","").strip(),  # OKOV / OPREMA
-            "art_nr": art, "naziv": naziv, "dobavljac": dob,
-            "jedinica": jed, "cijena_eur": cij,
-            "kolicina": qty, "iznos": iznos
-        })
-        preview_rows.append({
-            "Art. Nr.": art, "Naziv": naziv, "Dobavljač": dob, "Jedinica": jed,
-            "Cijena (€)": round(cij, 2), "Količina": qty, "Iznos (€)": round(iznos, 2)
-        })
+    kategorija = title.split()[-1].upper()   # OKOV / OPREMA
+    out_rows, preview_rows, chosen = price_picklist(edited, catalog, by_label, kategorija)
+    if search is not None:
+        picked.update(chosen)
 
     if preview_rows:
-        st.dataframe(pd.DataFrame(preview_rows), use_container_width=True)
+        st.dataframe(preview_rows, use_container_width=True)
 
     return out_rows
 
 
 
 # =============== Dicts (pricebook) ===============
-MATS   = {m["sifra"]: m for m in CJE.get("materijali", [])}
-TRAK   = {t["sifra"]: t for t in CJE.get("abs_trake", [])}
-FRONTS = {m["sifra"]: m for m in CJE.get("materijali_fronta", [])}
-FTRAK  = {t["sifra"]: t for t in CJE.get("abs_trake_fronta", [])}
-USLG   = {u["sifra"]: u for u in CJE.get("usluge", [])}
-
-# OKOV/OPREMA: ključimo po Art. Nr.
-OKOV   = {o["art_nr"]: o for o in CJE.get("okov", []) if o.get("art_nr")}
-OPREMA = {o["art_nr"]: o for o in CJE.get("oprema", []) if o.get("art_nr")}
-DODATCI= {d["sifra"]: d for d in CJE.get("dodatci", [])}
-
-MATS_KEYS  = sorted(MATS.keys(),  key=lambda k: MATS[k].get("naziv",""))
-TRAK_KEYS  = sorted(TRAK.keys(),  key=lambda k: TRAK[k].get("naziv",""))
-FR_KEYS    = sorted(FRONTS.keys(),key=lambda k: FRONTS[k].get("naziv",""))
-FTRAK_KEYS = sorted(FTRAK.keys(), key=lambda k: FTRAK[k].get("naziv",""))
-OKOV_KEYS  = sorted(OKOV.keys())
-OPREMA_KEYS= sorted(OPREMA.keys())
-DOD_KEYS   = sorted(DODATCI.keys(),key=lambda k: DODATCI[k].get("naziv",""))
-
-def extract_short(label: str) -> str:
-    if not label: return ""
-    tokens = [t for t in label.replace(",", " ").split() if any(ch.isalnum() for ch in t)]
-    return " ".join(tokens[:2]) if tokens else label
-
-ALL_MATS = {**MATS, **FRONTS}
-ALL_TRAKS = {**TRAK, **FTRAK}
-
-MAT_LABEL = {k: extract_short(v.get("naziv", k)) for k, v in ALL_MATS.items()}
-MAT_BY_LABEL = {v: k for k, v in MAT_LABEL.items()}
-
-TRAK_LABEL = {k: extract_short(v.get("naziv", k)) for k, v in ALL_TRAKS.items()}
-TRAK_BY_LABEL = {v: k for k, v in TRAK_LABEL.items()}
+# Kompilirani katalog (lookupi, sortirane šifre, labele) gradi se jednom po verziji cjenika
+@st.cache_resource(show_spinner=False, max_entries=4)
+def compiled_catalog(version, _cje):
+    return compile_catalog(_cje, version)
+
+with TIMER.stage("katalog"):
+    KAT = compiled_catalog(CJE_VER, CJE)
+
+# Početna tablica editora dodataka – jednom po verziji cjenika
+@st.cache_data(show_spinner=False, max_entries=4)
+def dodatci_template_frame(version, _dodatci, _keys):
+    import pandas as pd
+    return pd.DataFrame(dodatci_template(_dodatci, _keys), columns=list(DODATCI_COLS))
+MATS, TRAK, FRONTS, FTRAK, USLG = KAT.MATS, KAT.TRAK, KAT.FRONTS, KAT.FTRAK, KAT.USLG
+OKOV, OPREMA, DODATCI = KAT.OKOV, KAT.OPREMA, KAT.DODATCI
+
+# Opcionalno: OKOV/OPREMA iz SQLite kataloga (veliki katalozi dobavljača, upit po potrebi)
+@st.cache_resource(show_spinner=False)
+def catalog_db(path):
+    return CatalogDB(path)
+
+KAT_DB = None
+with st.sidebar.expander("🗄️ SQLite katalog OKOV/OPREMA"):
+    db_path = st.text_input("Datoteka kataloga", value="katalog.sqlite")
+    if st.toggle("Koristi SQLite katalog", value=False):
+        if os.path.exists(db_path):
+            KAT_DB = catalog_db(db_path)
+            OKOV, OPREMA = KAT_DB.group("okov"), KAT_DB.group("oprema")
+            st.caption(f"OKOV: {len(OKOV)}  |  OPREMA: {len(OPREMA)} artikala")
+        else:
+            st.warning("Datoteka ne postoji – napravi je s: python -m kalkulator.catalog_db import cjenik.json")
+    zamijeni = st.checkbox("Obriši postojeće artikle grupe prije uvoza", value=False,
+                           help="Bez ovoga se artikli iz cjenika dodaju/ažuriraju, a ostali u katalogu ostaju.")
+    if st.button("⤵️ Uvezi OKOV/OPREMA iz učitanog cjenika", use_container_width=True):
+        n = catalog_db(db_path).import_cjenik({"okov": CJE.get("okov"), "oprema": CJE.get("oprema")}, replace=zamijeni)
+        if n:
+            st.success(f"Uvezeno: {n}")
+        else:
+            st.info("U učitanom cjeniku nema OKOV/OPREMA artikala – katalog nije mijenjan.")
+
+MATS_KEYS, TRAK_KEYS, FR_KEYS, FTRAK_KEYS = KAT.MATS_KEYS, KAT.TRAK_KEYS, KAT.FR_KEYS, KAT.FTRAK_KEYS
+OKOV_KEYS, OPREMA_KEYS, DOD_KEYS = KAT.OKOV_KEYS, KAT.OPREMA_KEYS, KAT.DOD_KEYS
+
+MAT_LABEL, MAT_BY_LABEL = KAT.MAT_LABEL, KAT.MAT_BY_LABEL
+TRAK_LABEL, TRAK_BY_LABEL = KAT.TRAK_LABEL, KAT.TRAK_BY_LABEL
 
 # =============== Step 1: Dimenzije & sklapanje ===============
 st.markdown("### 1) 📐 Osnovne dimenzije & sklapanje")
@@ -474,12 +329,10 @@ with st.container():
             format_func=lambda k: f'{k} – {FTRAK[k]["naziv"]} ({FTRAK[k]["cijena_eur_po_m"]:.2f} €/m)')
     u1, u2 = st.columns(2)
     with u1:
-        rez_keys = [k for k,v in USLG.items() if "cijena_eur_po_m" in v]
-        rez_usl = st.selectbox("Usluga rezanja (€/m)", sorted(rez_keys),
+        rez_usl = st.selectbox("Usluga rezanja (€/m)", KAT.USL_M_KEYS,
             format_func=lambda k: f'{k} – {USLG[k]["naziv"]} ({USLG[k]["cijena_eur_po_m"]:.2f} €/m)')
     with u2:
-        kant_keys = [k for k,v in USLG.items() if "cijena_eur_po_m" in v]
-        kant_usl = st.selectbox("Usluga kantiranja (€/m)", sorted(kant_keys),
+        kant_usl = st.selectbox("Usluga kantiranja (€/m)", KAT.USL_M_KEYS,
             format_func=lambda k: f'{k} – {USLG[k]["naziv"]} ({USLG[k]["cijena_eur_po_m"]:.2f} €/m)')
 
 # =============== Step 3: Fronta ===============
@@ -501,64 +354,34 @@ with st.container():
 st.markdown("### 4) 🔩 OKOV • 🧰 OPREMA • 🧱 Dodatci (ručni unos dimenzija)")
 
 # --- OKOV s padajućim izbornikom (po Art. Nr.) ---
-okov_rows = picklist_editor(OKOV, OKOV_KEYS, "🔩 OKOV", key="okov_editor")
+with TIMER.stage("editor_okov"):
+    okov_rows = picklist_editor(OKOV, KAT.OKOV_PICK, KAT.OKOV_BY_PICK, "🔩 OKOV", key="okov_editor",
+                                search=OKOV.search if KAT_DB else None)
 
 # --- OPREMA s padajućim izbornikom (po Art. Nr.) ---
-oprema_rows = picklist_editor(OPREMA, OPREMA_KEYS, "🧰 OPREMA", key="oprema_editor")
+with TIMER.stage("editor_oprema"):
+    oprema_rows = picklist_editor(OPREMA, KAT.OPREMA_PICK, KAT.OPREMA_BY_PICK, "🧰 OPREMA", key="oprema_editor",
+                                  search=OPREMA.search if KAT_DB else None)
 
 # --- DODATCI (ručni unos dimenzija) – po kom / po m / po m2 ---
 st.subheader("🧱 Dodatci (ručni unos dimenzija)")
-dodatci_template = []
-for k in DOD_KEYS:
-    row = {**DODATCI[k], "sifra":k}
-    row.setdefault("vrsta","po kom")   # po kom | po m | po m2
-    row["A_mm"] = 0
-    row["B_mm"] = 0
-    row["kom"] = 0
-    dodatci_template.append(row)
-if not dodatci_template:
-    dodatci_template = [{"sifra":"DD-001","naziv":"Dodatni element – placeholder","jedinica":"po kom","cijena_eur":10.0,"vrsta":"po kom","A_mm":0,"B_mm":0,"kom":0}]
-
-edited_dodatci = st.data_editor(
-    pd.DataFrame(dodatci_template)[["sifra","naziv","vrsta","jedinica","cijena_eur","A_mm","B_mm","kom"]],
-    hide_index=True, use_container_width=True,
-    column_config={
-        "sifra": st.column_config.TextColumn("Šifra", disabled=True),
-        "naziv": st.column_config.TextColumn("Naziv", disabled=True),
-        "vrsta": st.column_config.SelectboxColumn("Vrsta obračuna", options=["po kom","po m","po m2"]),
-        "jedinica": st.column_config.TextColumn("Jedinica", disabled=True),
-        "cijena_eur": st.column_config.NumberColumn("Cijena (€)", format="%.2f"),
-        "A_mm": st.column_config.NumberColumn("Dim A (mm)", min_value=0, step=1),
-        "B_mm": st.column_config.NumberColumn("Dim B (mm)", min_value=0, step=1),
-        "kom": st.column_config.NumberColumn("Kom", min_value=0, step=1),
-    }
-)
+with TIMER.stage("editor_dodatci"):
+    edited_dodatci = st.data_editor(
+        dodatci_template_frame(CJE_VER, DODATCI, DOD_KEYS),
+        hide_index=True, use_container_width=True,
+        column_config={
+            "sifra": st.column_config.TextColumn("Šifra", disabled=True),
+            "naziv": st.column_config.TextColumn("Naziv", disabled=True),
+            "vrsta": st.column_config.SelectboxColumn("Vrsta obračuna", options=["po kom","po m","po m2"]),
+            "jedinica": st.column_config.TextColumn("Jedinica", disabled=True),
+            "cijena_eur": st.column_config.NumberColumn("Cijena (€)", format="%.2f"),
+            "A_mm": st.column_config.NumberColumn("Dim A (mm)", min_value=0, step=1),
+            "B_mm": st.column_config.NumberColumn("Dim B (mm)", min_value=0, step=1),
+            "kom": st.column_config.NumberColumn("Kom", min_value=0, step=1),
+        }
+    )
 
-dodatci_rows = []
-for _, r in edited_dodatci.iterrows():
-    kom = int(r["kom"]) if r["kom"] else 0
-    if kom <= 0:
-        continue
-    A = float(r["A_mm"] or 0); B = float(r["B_mm"] or 0)
-    vrsta = str(r["vrsta"] or "po kom").strip().lower()
-    jedinica = r["jedinica"] or ("kom" if vrsta=="po kom" else ("m" if vrsta=="po m" else "m²"))
-    cij = float(r["cijena_eur"] or 0.0)
-
-    if vrsta == "po m2":
-        kolicina_obracun = mm2_to_m2(A*B) * kom
-    elif vrsta == "po m":
-        kolicina_obracun = mm_to_m(max(A,B)+min(A,B)) * kom
-    else:  # po kom
-        kolicina_obracun = kom
-
-    iznos = cij * kolicina_obracun
-    dodatci_rows.append({
-        "kategorija":"DODATAK", "sifra": r["sifra"], "naziv": r["naziv"],
-        "vrsta": vrsta, "jedinica": jedinica,
-        "A_mm": int(A), "B_mm": int(B), "kom": kom,
-        "obračun_količina": round(kolicina_obracun, 3),
-        "cijena_eur": cij, "iznos": iznos
-    })
+    dodatci_rows = price_dodatci(edited_dodatci)
 
 # =============== Step 5: Rad i marža ===============
 st.markdown("### 5) 🛠️ Rad i marža")
@@ -583,802 +406,471 @@ with st.container():
     with o1: use_markup = st.checkbox("Uključi maržu (%)", value=False)
     with o2: markup_pct = st.number_input("Postotak marže (%)", min_value=0.0, value=15.0, step=0.5)
     rok_dani = st.number_input("Planirana isporuka (dana od narudžbe)", min_value=0, value=30, step=1)
+    use_nesting = st.checkbox("📐 Otpad materijala iz krojne liste (nesting) umjesto postotka", value=False,
+                              help="Elementi se slažu na ploče; otpad = neiskorišteni m² ploča × cijena. Postotak ostaje samo za trake.")
+    n1, n2, n3, n4 = st.columns(4)
+    with n1: ploca_A_mm = st.number_input("Ploča – duljina (mm)", min_value=100, value=2800, step=10, disabled=not use_nesting)
+    with n2: ploca_B_mm = st.number_input("Ploča – širina (mm)", min_value=100, value=2070, step=10, disabled=not use_nesting)
+    with n3: kerf_mm = st.number_input("Rez pile (mm)", min_value=0.0, value=4.0, step=0.5, disabled=not use_nesting)
+    with n4: vlakno = st.checkbox("Smjer vlakana (A po duljini ploče)", value=False, disabled=not use_nesting)
 
 # =============== Calculation functions ===============
-def derive_rows(W,H,D,t,n_police, include_back, default_mat, default_traka, pod_vrsta_vanjski, kapa_vrsta_vanjska,
-                include_kapa_povez, kapa_povez_mode, kapa_povez_sirina_mm, kapa_povez_posto,
-                include_fronta, fronta_tip, fronta_montaza, razmak_hor, razmak_ver, razmak_srednji,
-                preklop_hor, preklop_ver, default_mat_fr, default_traka_fr,
-                include_haupt_hor, include_haupt_ver, haupt_sirina_mm):
-    inner_w = max(W - 2*t, 0)
-    side_h = max(H - (t if pod_vrsta_vanjski else 0) - (t if kapa_vrsta_vanjska else 0), 1)
-
-    rows = []
-    rows.append({"naziv":"Stranica", "mat": default_mat, "traka": default_traka,
-                 "A_mm": side_h, "B_mm": D, "kom":2, "kant_dugi":1, "kant_kratki":1, "auto": True})
-
-    # Ako koristimo Kapa_povez, preskačemo klasičnu "Kapu"
-    if not include_kapa_povez:
-        kapa_w = W if kapa_vrsta_vanjska else inner_w
-        rows.append({"naziv":"Kapa", "mat": default_mat, "traka": default_traka,
-                     "A_mm": kapa_w, "B_mm": D, "kom":1, "kant_dugi":1, "kant_kratki":2, "auto": True})  # pravilo kao Pod
-
-    pod_w = W if pod_vrsta_vanjski else inner_w
-    rows.append({"naziv":"Pod", "mat": default_mat, "traka": default_traka,
-                 "A_mm": pod_w, "B_mm": D, "kom":1, "kant_dugi":1, "kant_kratki":2, "auto": True})
-
-    if n_police > 0:
-        pol_w = max(inner_w - 2, 1); pol_d = max(D - 10, 1)
-        rows.append({"naziv":"Polica", "mat": default_mat, "traka": default_traka,
-                     "A_mm": pol_w, "B_mm": pol_d, "kom": int(n_police),
-                     "kant_dugi":2, "kant_kratki":2, "auto": True})
-
-    if include_kapa_povez:
-        width = int(round(D * (kapa_povez_posto / 100.0))) if kapa_povez_mode == "% dubine" else int(kapa_povez_sirina_mm)
-        width = max(1, min(width, int(D)))
-        rows.append({"naziv":"Kapa_povez", "mat": default_mat, "traka": default_traka,
-                     "A_mm": inner_w, "B_mm": width, "kom":2, "kant_dugi":2, "kant_kratki":0, "auto": False})
-
-    if include_back:
-        rows.append({"naziv":"Leđa (HDF)", "mat": "HDF-001", "traka": default_traka,
-                     "A_mm": max(W-2,1), "B_mm": max(H-2,1), "kom":1,
-                     "kant_dugi":0, "kant_kratki":0, "auto": False})
-
-    # FRONT
-    if include_fronta:
-        if fronta_montaza.startswith("Unutarnja"):
-            target_w = max(inner_w - razmak_hor, 1); target_h = max(H - razmak_ver, 1)
-            ukupna_sirina = max(inner_w - razmak_hor, 1)
-        else:
-            target_w = W + preklop_hor; target_h = H + preklop_ver
-            ukupna_sirina = W + preklop_hor
-        if fronta_tip == "Jednokrilna":
-            rows.append({"naziv":"Fronta", "mat": default_mat_fr, "traka": default_traka_fr,
-                         "A_mm": target_h, "B_mm": target_w, "kom":1,
-                         "kant_dugi":2, "kant_kratki":2, "auto": True})
-        else:
-            left_w = max((ukupna_sirina - razmak_srednji)/2.0, 1)
-            for side in ("L","D"):
-                rows.append({"naziv": f"Fronta {side}", "mat": default_mat_fr, "traka": default_traka_fr,
-                             "A_mm": target_h, "B_mm": int(round(left_w)), "kom":1,
-                             "kant_dugi":2, "kant_kratki":2, "auto": True})
-
-    # HAUPT — dimenzije i dodavanje (B = D - 10)
-    haupt_depth = max(D - 10, 1)
-
-    if include_haupt_hor:
-        rows.append({"naziv":"Haupt Horizontalni", "mat": default_mat, "traka": default_traka,
-                     "A_mm": max(inner_w,1), "B_mm": haupt_depth,
-                     "kom":1, "kant_dugi":1, "kant_kratki":2, "auto": True})
-
-    if include_haupt_ver:
-        hpt_ver_len = max(side_h, 1)  # unutarnja visina
-        rows.append({"naziv":"Haupt Vertikalni", "mat": default_mat, "traka": default_traka,
-                     "A_mm": int(hpt_ver_len), "B_mm": haupt_depth,
-                     "kom":1, "kant_dugi":1, "kant_kratki":1, "auto": True})
-
-    return rows
-
-def calculate(report_rows, rez_usl, kant_usl, MATS, TRAK, FRONTS, FTRAK, USLG):
-    rez_cij_m = USLG[rez_usl]["cijena_eur_po_m"]
-    kant_usl_cij_m = USLG[kant_usl]["cijena_eur_po_m"]
-
-    total_area_m2 = total_rezanje_m = total_kant_m = 0.0
-    cijena_mat_eur = cijena_kant_traka_eur = cijena_kant_usl_eur = cijena_rez_eur = 0.0
-    iveral_area_m2 = iveral_eur = 0.0
-    hdf_area_m2 = hdf_eur = 0.0
-
-    def rezanje_rule(A, B):
-        return mm_to_m(max(A, B) + min(A, B))
-
-    report = []
-    for r in report_rows:
-        A = float(r["A_mm"]); B = float(r["B_mm"]); k = int(r["kom"])
-        rez_m_tot = rezanje_rule(A, B) * k
-        naziv = str(r["naziv"]).lower()
-        auto = bool(r.get("auto", False))
-
-        # --- KANTIRANJE (auto pravila) ---
-        if auto and naziv.startswith("pod"):
-            kant_mm_kom = (A * 1 + B * 2) if A >= B else (A * 2 + B * 1)
-        elif auto and naziv.startswith("kapa") and "povez" not in naziv:
-            kant_mm_kom = (A * 1 + B * 2) if A >= B else (A * 2 + B * 1)
-        elif auto and ("haupt" in naziv and "horizontalni" in naziv):
-            kant_mm_kom = (A * 1 + B * 2) if A >= B else (A * 2 + B * 1)
-        elif auto and (naziv.startswith("stranica") or ("haupt" in naziv and "vertikalni" in naziv)):
-            kant_mm_kom = max(A, B) + min(A, B)
-        elif auto and (naziv.startswith("polica") or naziv.startswith("fronta")):
-            kant_mm_kom = 2 * max(A, B) + 2 * min(A, B)
-        else:
-            kant_mm_kom = kant_length_mm_longshort(A, B, int(r.get("kant_dugi", 0)), int(r.get("kant_kratki", 0)))
-
-        kant_m_tot = mm_to_m(kant_mm_kom) * k
-        area_m2_tot = mm2_to_m2(A * B) * k
-
-        # --- LABELI: kratke šifre iz naziva ---
-        mat_obj = MATS.get(r["mat"]) or FRONTS.get(r["mat"]) or {}
-        traka_obj = TRAK.get(r["traka"]) or FTRAK.get(r["traka"]) or {}
-
-        mat_label = extract_short(mat_obj.get("naziv", str(r["mat"])))
-        traka_label = extract_short(traka_obj.get("naziv", str(r["traka"])))
-
-        mat_price = (mat_obj.get("cijena_eur_po_m2") or 0.0)
-        traka_price = (traka_obj.get("cijena_eur_po_m") or 0.0)
-
-        mat_cij = mat_price * area_m2_tot
-        traka_cij = traka_price * kant_m_tot
-        rez_cij = rez_cij_m * rez_m_tot
-        kant_usl_e = kant_usl_cij_m * kant_m_tot
-
-        if r["mat"] == "HDF-001":
-            hdf_area_m2 += area_m2_tot; hdf_eur += mat_cij
-        else:
-            iveral_area_m2 += area_m2_tot; iveral_eur += mat_cij
-
-        total_area_m2 += area_m2_tot
-        total_rezanje_m += rez_m_tot
-        total_kant_m += kant_m_tot
-        cijena_mat_eur += mat_cij
-        cijena_kant_traka_eur += traka_cij
-        cijena_kant_usl_eur += kant_usl_e
-        cijena_rez_eur += rez_cij
-
-        report.append({
-            "Naziv": r["naziv"],
-            "Oznaka": short_code_for(r["naziv"]),
-            "Mat": mat_label,
-            "Traka": traka_label,
-            "A (mm)": int(A),
-            "B (mm)": int(B),
-            "Kom": k,
-            "Kant m": round(kant_m_tot, 3),
-            "Rezanje m": round(rez_m_tot, 3),
-            "Površina m²": round(area_m2_tot, 3),
-            "€ Materijal": round(mat_cij, 2),
-            "€ Traka": round(traka_cij, 2),
-            "€ Usl. kant": round(kant_usl_e, 2),
-            "€ Rezanje": round(rez_cij, 2),
-            "€ Element (ukupno)": round(mat_cij + traka_cij + rez_cij + kant_usl_e, 2),
-        })
-
-    metrics = dict(
-        total_area_m2=total_area_m2,
-        total_rezanje_m=total_rezanje_m,
-        total_kant_m=total_kant_m,
-        cijena_mat_eur=cijena_mat_eur,
-        cijena_kant_traka_eur=cijena_kant_traka_eur,
-        cijena_kant_usl_eur=cijena_kant_usl_eur,
-        cijena_rez_eur=cijena_rez_eur,
-        iveral_area_m2=iveral_area_m2,
-        iveral_eur=iveral_eur,
-        hdf_area_m2=hdf_area_m2,
-        hdf_eur=hdf_eur,
-    )
-    return report, metrics
-
-def materials_services_summary(metrics, use_waste, waste_pct):
-    eur_mats_total = metrics['cijena_mat_eur']; eur_trake = metrics['cijena_kant_traka_eur']
-    eur_rezanje = metrics['cijena_rez_eur']; eur_kant_usl = metrics['cijena_kant_usl_eur']
-    eur_waste = (waste_pct/100.0)*(eur_mats_total + eur_trake) if use_waste else 0.0
-    subtotal = eur_mats_total + eur_trake + eur_rezanje + eur_kant_usl + eur_waste
+def kv_materials_services(metrics, subtotal, eur_waste):
     kv_table("📊 Materijal + usluge (korpus)", [
         ("m² iveral", fmt_m2(metrics['iveral_area_m2'])),
         ("€ iveral", fmt_eur(metrics['iveral_eur'])),
         ("m² HDF", fmt_m2(metrics['hdf_area_m2'])),
         ("€ HDF", fmt_eur(metrics['hdf_eur'])),
         ("m² ukupno", fmt_m2(metrics['total_area_m2'])),
-        ("€ materijal ukupno", fmt_eur(eur_mats_total)),
+        ("€ materijal ukupno", fmt_eur(metrics['cijena_mat_eur'])),
         ("Rezanje (m)", fmt_m(metrics['total_rezanje_m'])),
-        ("€ rezanje", fmt_eur(eur_rezanje)),
+        ("€ rezanje", fmt_eur(metrics['cijena_rez_eur'])),
         ("Kantiranje (m)", fmt_m(metrics['total_kant_m'])),
-        ("€ trake", fmt_eur(eur_trake)),
-        ("€ usluga kantiranja", fmt_eur(eur_kant_usl)),
+        ("€ trake", fmt_eur(metrics['cijena_kant_traka_eur'])),
+        ("€ usluga kantiranja", fmt_eur(metrics['cijena_kant_usl_eur'])),
         ("€ otpad", fmt_eur(eur_waste)),
         ("Materijal + usluge + otpad", fmt_eur(subtotal), "total"),
     ])
-    return subtotal, eur_waste
 
-def extras_totals(okov_rows, oprema_rows, dodatci_rows):
-    sum_okov = sum(r["iznos"] for r in okov_rows)
-    sum_oprema = sum(r["iznos"] for r in oprema_rows)
-    sum_dodatci = sum(r["iznos"] for r in dodatci_rows)
-    total = sum_okov + sum_oprema + sum_dodatci
+def kv_extras(extras):
     kv_table("🔩🧰🧱 Okov + Oprema + Dodatci", [
-        ("OKOV", fmt_eur(sum_okov)),
-        ("OPREMA", fmt_eur(sum_oprema)),
-        ("Dodatci (ručni)", fmt_eur(sum_dodatci)),
-        ("UKUPNO (okov/oprema/dodatci)", fmt_eur(total), "total"),
+        ("OKOV", fmt_eur(extras["okov"])),
+        ("OPREMA", fmt_eur(extras["oprema"])),
+        ("Dodatci (ručni)", fmt_eur(extras["dodatci"])),
+        ("UKUPNO (okov/oprema/dodatci)", fmt_eur(extras["total"]), "total"),
     ])
-    return total
-
-def labor_total_calc(h_tp,r_tp,h_cnc,r_cnc,h_skl,r_skl,h_pak,r_pak):
-    return h_tp*r_tp + h_cnc*r_cnc + h_skl*r_skl + h_pak*r_pak
 
-def final_summary_grand(mats_services_total, extras_total, labor_total, use_markup, markup_pct):
-    pre_markup = mats_services_total + extras_total + labor_total
-    eur_markup = (markup_pct/100.0)*pre_markup if use_markup else 0.0
-    ukupno = pre_markup + eur_markup
+def kv_final(mats_services_total, extras_total, labor_total, final, use_markup, markup_pct):
     kv_table("🧾 Završni zbir", [
         ("Materijal + usluge + otpad (korpus)", fmt_eur(mats_services_total)),
         ("Okov + Oprema + Dodatci", fmt_eur(extras_total)),
         ("Rad (sati × €/h)", fmt_eur(labor_total)),
-        ("Zbroj (prije marže)", fmt_eur(pre_markup)),
-        ("Marža", fmt_eur(eur_markup) + (f"  ({markup_pct:.1f} %)" if use_markup else "  (0 %)")),
-        ("UKUPNO", fmt_eur(ukupno), "total"),
+        ("Zbroj (prije marže)", fmt_eur(final["pre_markup"])),
+        ("Marža", fmt_eur(final["eur_markup"]) + (f"  ({markup_pct:.1f} %)" if use_markup else "  (0 %)")),
+        ("UKUPNO", fmt_eur(final["ukupno"]), "total"),
     ])
-    return ukupno
-
-# -------- PDF Export (s NAZIV naslovom) --------
-def _pdf_title_korpus(W, H, D, include_fronta, fronta_tip, fronta_montaza):
-    dims = f"Korpus H={int(H)}mm × W={int(W)}mm × D={int(D)}mm"
-    if include_fronta:
-        krila = "2F" if str(fronta_tip).lower().startswith("dvokrilna") else "1F"
-        mont = "Unutarnja" if str(fronta_montaza).lower().startswith("unut") else "Vanjska"
-        return f"{dims} — {krila} ({mont})"
-    return f"{dims} — bez fronte"
-
-def build_full_pdf(report, metrics, mats_services_total, extras_total, labor_total, use_markup, markup_pct,
-                   W, H, D, n_police, waste_pct, rok_dani,
-                   include_back, pod_vrsta_vanjski, kapa_vrsta_vanjska, include_kapa_povez,
-                   include_fronta, fronta_tip, fronta_montaza):
-    from reportlab.lib.pagesizes import A4
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib import colors
-    from reportlab.lib.units import mm
-    import io, datetime
-
-    title = _pdf_title_korpus(W, H, D, include_fronta, fronta_tip, fronta_montaza)
-
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf,
-        pagesize=A4,
-        leftMargin=14 * mm, rightMargin=14 * mm,
-        topMargin=18 * mm, bottomMargin=18 * mm
-    )
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name="H1", fontSize=16, leading=20, spaceAfter=6))
-    styles.add(ParagraphStyle(name="H2", fontSize=12, leading=16, spaceBefore=8, spaceAfter=4))
-
-    elems = []
-    elems.append(Paragraph(title, styles["H1"]))
-    elems.append(Paragraph(datetime.datetime.now().strftime("%d.%m.%Y."), styles["Normal"]))
-    elems.append(Spacer(1, 6))
-
-    kv = [
-        ["Stavka", "Vrijednost"],
-        ["Širina (W)", f"{int(W)} mm"],
-        ["Visina (H)", f"{int(H)} mm"],
-        ["Dubina (D)", f"{int(D)} mm"],
-        ["Broj polica", f"{int(n_police)}"],
-        ["Leđa HDF", "DA" if include_back else "NE"],
-        ["Pod VANJSKI", "DA" if pod_vrsta_vanjski else "NE"],
-        ["Kapa VANJSKA", "DA" if kapa_vrsta_vanjska else "NE"],
-        ["Kapa_povez", "DA" if include_kapa_povez else "NE"],
-        ["Planirana isporuka", f"{int(rok_dani)} dana"],
-    ]
-    t_kv = Table(kv, colWidths=[70 * mm, 80 * mm])
-    t_kv.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.HexColor("#e5e7eb")),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f3f4f6")),
-    ]))
-    elems += [Paragraph("📐 Osnovne postavke", styles["H2"]), t_kv, Spacer(1, 6)]
-
-    if report:
-        header = ["Naziv","Oznaka","Mat","Traka","A (mm)","B (mm)","Kom",
-                  "Kant m","Rezanje m","Površina m²","€ Materijal","€ Traka","€ Usl. kant","€ Rezanje","€ Element (ukupno)"]
-        data = [header] + [[str(r.get(k, "")) for k in header] for r in report]
-        cw = [28*mm,12*mm,18*mm,18*mm,14*mm,14*mm,10*mm,16*mm,16*mm,16*mm,18*mm,16*mm,18*mm,16*mm,22*mm]
-        t_rep = Table(data, repeatRows=1, colWidths=cw)
-        t_rep.setStyle(TableStyle([
-            ("GRID", (0,0), (-1,-1), 0.25, colors.HexColor("#e5e7eb")),
-            ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#f3f4f6")),
-            ("ALIGN", (1,1), (-1,-1), "CENTER"),
-            ("ALIGN", (0,1), (0,-1), "LEFT"),
-        ]))
-        elems += [Paragraph("🧾 Elementi i troškovi (korpus)", styles["H2"]), t_rep, Spacer(1, 6)]
-
-    ms = metrics
-    eur_waste = (waste_pct/100.0)*(ms['cijena_mat_eur'] + ms['cijena_kant_traka_eur'])
-    mats_rows = [
-        ["m² iveral", f"{ms['iveral_area_m2']:.3f}", f"{ms['iveral_eur']:.2f}"],
-        ["m² HDF", f"{ms['hdf_area_m2']:.3f}", f"{ms['hdf_eur']:.2f}"],
-        ["m² ukupno", f"{ms['total_area_m2']:.3f}", f"{ms['cijena_mat_eur']:.2f}"],
-        ["Rezanje (m)", f"{ms['total_rezanje_m']:.3f}", f"{ms['cijena_rez_eur']:.2f}"],
-        ["Kantiranje (m)", f"{ms['total_kant_m']:.3f}", f"{ms['cijena_kant_traka_eur']:.2f}"],
-        ["€ usluga kantiranja", "", f"{ms['cijena_kant_usl_eur']:.2f}"],
-        ["€ otpad", "", f"{eur_waste:.2f}"],
-        ["Materijal + usluge + otpad", "", f"{mats_services_total:.2f}"],
-    ]
-    t_ms = Table([["Stavka","Količina","Iznos (€)"]] + mats_rows, colWidths=[80*mm, 35*mm, 45*mm])
-    t_ms.setStyle(TableStyle([
-        ("GRID", (0,0), (-1,-1), 0.5, colors.HexColor("#e5e7eb")),
-        ("BACKGROUND", (0,0), (-1,0), colors.HexColor("#f3f4f6")),
-        ("ALIGN", (1,1), (-1,-1), "CENTER"),
-        ("ALIGN", (0,0), (0,-1), "LEFT"),
-    ]))
-    elems += [Paragraph("📊 Materijal + usluge (korpus)", styles["H2"]), t_ms, Spacer(1, 6)]
-
-    pre_markup = mats_services_total + extras_total + labor_total
-    eur_markup = pre_markup * (markup_pct/100.0) if use_markup else 0.0
-    ukupno_pdf = pre_markup + eur_markup
-    t_fin = Table([
-        ["Okov + Oprema + Dodatci", f"{extras_total:.2f}"],
-        ["Rad (sati × €/h)", f"{labor_total:.2f}"],
-        ["Zbroj prije marže", f"{pre_markup:.2f}"],
-        [f"Marža ({markup_pct:.1f}% )" if use_markup else "Marža (0%)", f"{eur_markup:.2f}"],
-        ["UKUPNO", f"{ukupno_pdf:.2f}"],
-    ], colWidths=[100*mm, 60*mm])
-    t_fin.setStyle(TableStyle([
-        ("GRID", (0,0), (-1,-1), 0.5, colors.HexColor("#e5e7eb")),
-        ("BACKGROUND", (0,4), (-1,4), colors.HexColor("#effbf1")),
-        ("ALIGN", (0,0), (-1,-1), "CENTER"),
-        ("ALIGN", (0,0), (0,-1), "LEFT"),
-    ]))
-    elems += [Paragraph("🧾 Završni zbir", styles["H2"]), t_fin]
-
-    doc.build(elems)
-    return buf.getvalue()
-
-# =============== EXCEL EXPORT (TOP-LEVEL FUNKCIJA) ===============
-def build_xlsx_kantiranje(report_rows, source_rows, okov_rows, oprema_rows, dodatci_rows):
-    import io
-    import pandas as pd
-    import importlib.util
-
-    if not report_rows:
-        return None, "Nema podataka za izvoz (report je prazan)."
-
-    # Helper: (dugi_cnt, kratki_cnt) po retku na temelju auto pravila ili ručnih postavki
-    def kant_counts_for_row(src_row):
-        naziv = str(src_row.get("naziv", "")).lower()
-        auto = bool(src_row.get("auto", False))
-
-        if naziv.startswith("kapa_povez"):
-            return 2, 0
-
-        def ab(row):
-            try:
-                A = float(row.get("A_mm", 0)); B = float(row.get("B_mm", 0))
-            except Exception:
-                A = 0; B = 0
-            return A, B
-
-        if naziv.startswith("pod"):
-            A,B = ab(src_row); return (1, 2) if A >= B else (2, 1)
-        if naziv.startswith("kapa") and "povez" not in naziv:
-            A,B = ab(src_row); return (1, 2) if A >= B else (2, 1)
-        if "haupt" in naziv and "horizontalni" in naziv:
-            A,B = ab(src_row); return (1, 2) if A >= B else (2, 1)
-        if auto and (naziv.startswith("stranica") or ("haupt" in naziv and "vertikalni" in naziv)):
-            return 1, 1
-        if auto and (naziv.startswith("polica") or naziv.startswith("fronta")):
-            return 2, 2
-
-        d = int(src_row.get("kant_dugi", 0) or 0)
-        k = int(src_row.get("kant_kratki", 0) or 0)
-        return max(0, min(2, d)), max(0, min(2, k))
-
-    # Kategorizacija površine
-    def classify_surface(src_row):
-        mat = str(src_row.get("mat", "")).upper()
-        naziv = str(src_row.get("naziv", "")).lower()
-        if mat == "HDF-001":
-            return "Leđa HDF"
-        if naziv.startswith("fronta"):
-            return "Fronte Iveral"
-        return "Korpusi Iveral"
-
-    # Core retci
-    rows_core = []
-    korp_iveral_m2 = fronte_iveral_m2 = hdf_m2 = total_rez_m = 0.0
-
-    for i, rep in enumerate(report_rows):
-        src = source_rows[i] if i < len(source_rows) else {}
-        d_cnt, k_cnt = kant_counts_for_row(src)
-        oznaka_k = f"{k_cnt}K {d_cnt}D"
-        povrsina_m2 = float(rep.get("Površina m²", 0) or 0)
-        rezanje_m = float(rep.get("Rezanje m", 0) or 0)
-
-        cat = classify_surface(src)
-        if cat == "Korpusi Iveral":
-            korp_iveral_m2 += povrsina_m2
-        elif cat == "Fronte Iveral":
-            fronte_iveral_m2 += povrsina_m2
-        else:
-            hdf_m2 += povrsina_m2
-        total_rez_m += rezanje_m
-
-        rows_core.append({
-            "Naziv": rep.get("Naziv", ""),
-            "Oznaka": rep.get("Oznaka", ""),
-            "Mat": rep.get("Mat", ""),
-            "Traka": rep.get("Traka", ""),
-            "A (mm)": rep.get("A (mm)", ""),
-            "B (mm)": rep.get("B (mm)", ""),
-            "Kom": rep.get("Kom", ""),
-            "Kratke strane (K)": k_cnt,
-            "Duge strane (D)": d_cnt,
-            "Oznaka kantiranja": oznaka_k,
-            "Kant m": rep.get("Kant m", 0),
-            "Površina m²": povrsina_m2,
-            "Rezanje m": rezanje_m,
-        })
-
-    order_mats, seen = [], set()
-    for r in rows_core:
-        m = r.get("Mat", "")
-        if m not in seen:
-            seen.add(m)
-            order_mats.append(m)
-
-    df_core = pd.DataFrame(rows_core)
-    gb = df_core.groupby("Mat", dropna=False).agg({
-        "Kant m": "sum",
-        "Površina m²": "sum",
-        "Rezanje m": "sum"
-    }).reset_index()
-    per_mat_totals = {row["Mat"]: {
-        "Kant m": float(row["Kant m"]),
-        "Površina m²": float(row["Površina m²"]),
-        "Rezanje m": float(row["Rezanje m"]),
-    } for _, row in gb.iterrows()}
-
-    cols_order = ["Naziv","Oznaka","Mat","Traka","A (mm)","B (mm)","Kom",
-                  "Kratke strane (K)","Duge strane (D)","Oznaka kantiranja",
-                  "Kant m","Površina m²","Rezanje m"]
-
-    rows_display = []
-    subtotal_row_indices = []
-    for mat in order_mats:
-        for r in rows_core:
-            if r.get("Mat", "") == mat:
-                rows_display.append({c: r.get(c, "") for c in cols_order})
-        subt = per_mat_totals.get(mat, {"Kant m":0, "Površina m²":0, "Rezanje m":0})
-        subtotal_row = {c: "" for c in cols_order}
-        subtotal_row["Naziv"] = f"UKUPNO – {mat}"
-        subtotal_row["Mat"] = mat
-        subtotal_row["Kant m"] = subt["Kant m"]
-        subtotal_row["Površina m²"] = subt["Površina m²"]
-        subtotal_row["Rezanje m"] = subt["Rezanje m"]
-        rows_display.append(subtotal_row)
-        subtotal_row_indices.append(len(rows_display))
-
-    df = pd.DataFrame(rows_display, columns=cols_order)
-
-    sum_by_traka = (
-        df_core[["Traka","Kant m"]]
-        .groupby("Traka", dropna=False)["Kant m"].sum()
-        .reset_index()
-        .rename(columns={"Kant m":"Kant m ukupno"})
-    )
 
-    total_materials_m2 = korp_iveral_m2 + fronte_iveral_m2 + hdf_m2
-
-    # Engine
-    import importlib.util
-    has_openpyxl   = importlib.util.find_spec("openpyxl")  is not None
-    has_xlsxwriter = importlib.util.find_spec("xlsxwriter") is not None
-    engine = "openpyxl" if has_openpyxl else ("xlsxwriter" if has_xlsxwriter else None)
-    if engine is None:
-        return None, "Nedostaje engine za Excel. Instaliraj: pip install openpyxl (ili xlsxwriter)."
-
-    bio = io.BytesIO()
-    with pd.ExcelWriter(bio, engine=engine) as writer:
-        # ========== Sheet 1: Elementi_kantiranje ==========
-        df.to_excel(writer, index=False, sheet_name="Elementi_kantiranje")
-        ws1 = writer.sheets["Elementi_kantiranje"]
-
-        grand_total_kant = float(df_core["Kant m"].sum())
-        grand_total_m2   = float(df_core["Površina m²"].sum())
-        grand_total_rez  = float(df_core["Rezanje m"].sum())
-
-        if engine == "xlsxwriter":
-            bold = writer.book.add_format({"bold": True})
-            grey = writer.book.add_format({"bold": True, "bg_color": "#f3f4f6"})
-            green = writer.book.add_format({"bold": True, "bg_color": "#eef7ee"})
-            left = writer.book.add_format({"align":"left"})
-            center = writer.book.add_format({"align":"center"})
-            num3 = writer.book.add_format({"num_format":"0.000", "align":"center"})
-            widths = {"Naziv": 28, "Oznaka":10, "Mat":18, "Traka":18, "A (mm)":12, "B (mm)":12, "Kom":8,
-                      "Kratke strane (K)":16, "Duge strane (D)":16, "Oznaka kantiranja":16,
-                      "Kant m":14, "Površina m²":14, "Rezanje m":14}
-            for i, name in enumerate(df.columns):
-                ws1.set_column(i, i, widths.get(name, 14))
-            ws1.autofilter(0, 0, len(df), len(df.columns)-1)
-            ws1.freeze_panes(1, 1)
-            ws1.set_column(0, 0, widths["Naziv"], left)
-            ws1.set_column(1, len(df.columns)-1, None, center)
-            col_idx = {n:i for i,n in enumerate(df.columns)}
-            for col in ["Kant m","Rezanje m","Površina m²"]:
-                ws1.set_column(col_idx[col], col_idx[col], widths[col], num3)
-            total_row_excel = len(df) + 1
-            ws1.write(total_row_excel, 0, "UKUPNO – SVI MATERIJALI", bold)
-            ws1.write_number(total_row_excel, col_idx["Kant m"], grand_total_kant, green)
-            ws1.write_number(total_row_excel, col_idx["Površina m²"], grand_total_m2, green)
-            ws1.write_number(total_row_excel, col_idx["Rezanje m"], grand_total_rez, green)
-            for idx in subtotal_row_indices:
-                excel_row = idx
-                ws1.set_row(excel_row, 12, grey)
-        else:
-            from openpyxl.styles import Alignment, Font, PatternFill
-            ws1.freeze_panes = "B2"
-            ws1.auto_filter.ref = ws1.dimensions
-            for cell in ws1[1]:
-                cell.font = Font(bold=True); cell.alignment = Alignment(horizontal="center")
-            for row in ws1.iter_rows(min_row=2, max_row=ws1.max_row):
-                if row and row[0].value is not None:
-                    row[0].alignment = Alignment(horizontal="left")
-                for c in row[1:]:
-                    c.alignment = Alignment(horizontal="center")
-            last = ws1.max_row + 1
-            ws1.cell(row=last, column=1, value="UKUPNO – SVI MATERIJALI").font = Font(bold=True)
-            fill_green = PatternFill(start_color="EEF7EE", end_color="EEF7EE", fill_type="solid")
-            headers = [c.value for c in ws1[1]]
-            def idx(h): return headers.index(h) + 1 if h in headers else None
-            c_kant = idx("Kant m"); c_m2 = idx("Površina m²"); c_rez = idx("Rezanje m")
-            if c_kant: ws1.cell(row=last, column=c_kant, value=grand_total_kant).fill = fill_green
-            if c_m2:   ws1.cell(row=last, column=c_m2,   value=grand_total_m2).fill = fill_green
-            if c_rez:  ws1.cell(row=last, column=c_rez,  value=grand_total_rez).fill = fill_green
-            fill_grey = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
-            for idx in subtotal_row_indices:
-                excel_row = idx + 1
-                for c in range(1, ws1.max_column+1):
-                    cell = ws1.cell(row=excel_row+1, column=c)
-                    cell.fill = fill_grey
-                    if c in (1, c_kant or 0, c_m2 or 0, c_rez or 0):
-                        cell.font = Font(bold=True)
-
-        # ========== Sheet 2: Sažetak ==========
-        ws2_name = "Sažetak"
-        sum_by_traka.to_excel(writer, index=False, sheet_name=ws2_name)
-        ws2 = writer.sheets[ws2_name]
-        startrow = len(sum_by_traka) + 2
-        extra = pd.DataFrame({
-            "Traka": [
-                "— Korpusi Iveral m²",
-                "— Fronte Iveral m²",
-                "— Leđa HDF m²",
-                "— Rezanje m ukupno",
-                "— Zbroj materijala m² ukupno",
-            ],
-            "Kant m ukupno": [
-                korp_iveral_m2, fronte_iveral_m2, hdf_m2, total_rez_m,
-                total_materials_m2,
-            ],
-        })
-        extra.to_excel(writer, index=False, sheet_name=ws2_name, startrow=startrow)
-        if engine == "xlsxwriter":
-            ws2.set_column(0, 0, 30); ws2.set_column(1, 1, 24)
-
-        # ========== Sheet 3: Narudžba ==========
-        narudzba_cols = ["Oznaka","Naziv","Mat","Traka","A (mm)","B (mm)","Kom","Oznaka kantiranja"]
-        df_n = df[narudzba_cols].copy()
-        df_n.to_excel(writer, index=False, sheet_name="Narudžba")
-        ws3 = writer.sheets["Narudžba"]
-        if engine == "xlsxwriter":
-            left = writer.book.add_format({"align":"left"})
-            center = writer.book.add_format({"align":"center"})
-            ws3.set_column(0, 0, 10, center)
-            ws3.set_column(1, 1, 28, left)
-            ws3.set_column(2, 3, 18, center)
-            ws3.set_column(4, 5, 12, center)
-            ws3.set_column(6, 6, 8,  center)
-            ws3.set_column(7, 7, 16, center)
-            ws3.autofilter(0, 0, len(df_n), len(narudzba_cols)-1)
-            ws3.freeze_panes(1, 1)
-        else:
-            from openpyxl.styles import Alignment, Font
-            ws3.freeze_panes = "B2"; ws3.auto_filter.ref = ws3.dimensions
-            for cell in ws3[1]:
-                cell.font = Font(bold=True); cell.alignment = Alignment(horizontal="center")
-            for row in ws3.iter_rows(min_row=2, max_row=ws3.max_row):
-                if row and row[1].value is not None:
-                    row[1].alignment = Alignment(horizontal="left")
-                for c in [0,2,3,4,5,6,7]:
-                    row[c].alignment = Alignment(horizontal="center")
-
-        # ========== Sheet 4: Okov_Oprema_Dodatci ==========
-        rows_e = []
-        for r in okov_rows + oprema_rows:
-            rows_e.append({
-                "Kategorija": r["kategorija"], "Art. Nr.": r["art_nr"], "Naziv": r["naziv"],
-                "Dobavljač": r["dobavljac"], "Jedinica": r["jedinica"],
-                "Cijena (€)": r["cijena_eur"], "Količina": r["kolicina"], "Iznos (€)": r["iznos"]
-            })
-        for r in dodatci_rows:
-            rows_e.append({
-                "Kategorija": "DODATAK", "Šifra/Dod": r.get("sifra",""),
-                "Naziv": r["naziv"], "Jedinica": r["jedinica"], "Vrsta": r["vrsta"],
-                "A (mm)": r["A_mm"], "B (mm)": r["B_mm"], "Kom": r["kom"],
-                "Obračun količina": r["obračun_količina"], "Cijena (€)": r["cijena_eur"],
-                "Iznos (€)": r["iznos"]
-            })
-
-        df_e = pd.DataFrame(rows_e)
-        if df_e.empty:
-            df_e = pd.DataFrame([{"Kategorija":"","Art. Nr.":"","Naziv":"","Dobavljač":"","Jedinica":"","Cijena (€)":"","Količina":"","Iznos (€)":""}])
-        df_e.to_excel(writer, index=False, sheet_name="Okov_Oprema_Dodatci")
-        ws4 = writer.sheets["Okov_Oprema_Dodatci"]
-
-        if engine == "xlsxwriter":
-            center = writer.book.add_format({"align":"center"})
-            left = writer.book.add_format({"align":"left"})
-            ws4.autofilter(0, 0, len(df_e), len(df_e.columns)-1)
-            ws4.freeze_panes(1, 1)
-            ws4.set_column(0, len(df_e.columns)-1, 14, center)
-            # "Naziv" i "Dobavljač" lijevo + šire
-            try:
-                naziv_idx = list(df_e.columns).index("Naziv")
-                ws4.set_column(naziv_idx, naziv_idx, 34, left)
-            except ValueError:
-                pass
-            try:
-                dob_idx = list(df_e.columns).index("Dobavljač")
-                ws4.set_column(dob_idx, dob_idx, 22, left)
-            except ValueError:
-                pass
-        else:
-            from openpyxl.styles import Alignment, Font
-            ws4.freeze_panes = "B2"; ws4.auto_filter.ref = ws4.dimensions
-            for cell in ws4[1]:
-                cell.font = Font(bold=True); cell.alignment = Alignment(horizontal="center")
-            headers = [c.value for c in ws4[1]]
-            for col_name, align in [("Naziv","left"), ("Dobavljač","left")]:
-                if col_name in headers:
-                    col = headers.index(col_name)+1
-                    for row in ws4.iter_rows(min_row=2, max_row=ws4.max_row):
-                        row[col-1].alignment = Alignment(horizontal=align)
-
-    bio.seek(0)
-    return bio.getvalue(), None
+# =============== Povijest ponuda (SQLite) ===============
+@st.cache_resource(show_spinner=False)
+def quote_db(path):
+    return QuoteDB(path)
+
+with st.sidebar.expander("🕘 Povijest ponuda"):
+    POVIJEST_PATH = st.text_input("Datoteka povijesti", value="ponude.sqlite")
+    SPREMAJ_POVIJEST = st.toggle("Spremaj svaki izračun", value=True)
+
+# =============== Cache izračuna (preko rerunova i sesija) ===============
+@st.cache_resource(show_spinner=False)
+def calc_cache():
+    return LRUCache(maxsize=256)
+
+@st.cache_resource(show_spinner=False)
+def export_cache():
+    return LRUCache(maxsize=32)
+
+def derive_rows_cached(*args):
+    key = stable_hash(("derive_rows", args))
+    return calc_cache().get_or_compute(key, lambda: derive_rows(*args))
+
+def nest_cached(rows, ploca, kerf, vlakno):
+    key = stable_hash(("nest", rows, ploca, kerf, vlakno))
+    return calc_cache().get_or_compute(key, lambda: nest_rows(rows, ploca, kerf, vlakno=vlakno))
+
+def calculate_cached(rows, rez_usl, kant_usl):
+    # cjenik ulazi u ključ preko verzije (hash sadržaja), ne preko samih rječnika
+    key = stable_hash(("calculate", rows, rez_usl, kant_usl, CJE_VER))
+    return calc_cache().get_or_compute(
+        key, lambda: calculate(rows, rez_usl, kant_usl, MATS, TRAK, FRONTS, FTRAK, USLG))
 
 # =============== RUN: Izračun + Izvoz ===============
 st.markdown('<div class="sticky"></div>', unsafe_allow_html=True)
+# Nakon klika izračun ostaje aktivan kroz rerunove (uređivanje elemenata, gumbi za izvoz)
 if st.button("🧮 Izračunaj ▶", use_container_width=True):
+    st.session_state["izracun_aktivan"] = True
+if st.session_state.get("izracun_aktivan"):
 
     # 1) Izvedi elemente
-    rows = derive_rows(
-        W,H,D,t,n_police,
-        include_back, default_mat, default_traka,
-        pod_vrsta_vanjski, kapa_vrsta_vanjska,
-        include_kapa_povez, kapa_povez_mode, kapa_povez_sirina_mm, kapa_povez_posto,
-        include_fronta, fronta_tip, fronta_montaza,
-        razmak_hor, razmak_ver, razmak_srednji,
-        preklop_hor, preklop_ver, default_mat_fr, default_traka_fr,
-        include_haupt_hor, include_haupt_ver, haupt_sirina_mm
-    )
+    with TIMER.stage("derive_rows"):
+        rows = derive_rows_cached(
+            W,H,D,t,n_police,
+            include_back, default_mat, default_traka,
+            pod_vrsta_vanjski, kapa_vrsta_vanjska,
+            include_kapa_povez, kapa_povez_mode, kapa_povez_sirina_mm, kapa_povez_posto,
+            include_fronta, fronta_tip, fronta_montaza,
+            razmak_hor, razmak_ver, razmak_srednji,
+            preklop_hor, preklop_ver, default_mat_fr, default_traka_fr,
+            include_haupt_hor, include_haupt_ver, haupt_sirina_mm
+        )
 
     st.markdown("### 6) 📋 Sažetak elemenata i troškovnik")
 
     # 2) PRIKAZ u editoru (centriranje svih osim Naziv)
-    display_rows = []
-    for r in rows:
-        d = dict(r)
-        d["oznaka"] = short_code_for(d.get("naziv",""))
-        d["mat"] = MAT_LABEL.get(d.get("mat", ""), d.get("mat", ""))
-        d["traka"] = TRAK_LABEL.get(d.get("traka", ""), d.get("traka", ""))
-        A = float(d.get("A_mm", 0) or 0); B = float(d.get("B_mm", 0) or 0)
-        dugi, kratki = auto_kant_counts(
-            naziv=str(d.get("naziv","")),
-            auto=bool(d.get("auto", False)),
-            A=A, B=B,
-            fallback_dugi=int(d.get("kant_dugi", 0) or 0),
-            fallback_kratki=int(d.get("kant_kratki", 0) or 0),
+    with TIMER.stage("editor_korpus"):
+        display_rows = []
+        for r in rows:
+            d = dict(r)
+            d["oznaka"] = short_code_for(d.get("naziv",""))
+            d["mat"] = MAT_LABEL.get(d.get("mat", ""), d.get("mat", ""))
+            d["traka"] = TRAK_LABEL.get(d.get("traka", ""), d.get("traka", ""))
+            A = float(d.get("A_mm", 0) or 0); B = float(d.get("B_mm", 0) or 0)
+            dugi, kratki = auto_kant_counts(
+                naziv=str(d.get("naziv","")),
+                auto=bool(d.get("auto", False)),
+                A=A, B=B,
+                fallback_dugi=int(d.get("kant_dugi", 0) or 0),
+                fallback_kratki=int(d.get("kant_kratki", 0) or 0),
+            )
+            d["kant_dugi"] = dugi; d["kant_kratki"] = kratki
+            display_rows.append(d)
+
+        st.markdown("""
+        <style>
+        .center-editor [data-testid="stDataEditor"] thead th,
+        .center-editor [data-testid="stDataEditor"] tbody td { text-align: center !important; }
+        .center-editor [data-testid="stDataEditor"] thead th:nth-child(1),
+        .center-editor [data-testid="stDataEditor"] tbody td:nth-child(1) { text-align: left !important; }
+        </style>
+        """, unsafe_allow_html=True)
+        st.markdown('<div class="center-editor">', unsafe_allow_html=True)
+
+        column_order = ["naziv","oznaka","mat","traka","A_mm","B_mm","kom","kant_dugi","kant_kratki","auto"]
+        edited = st.data_editor(
+            display_rows,
+            num_rows="dynamic",
+            use_container_width=True,
+            column_config={
+                "naziv": st.column_config.TextColumn("Naziv"),
+                "oznaka": st.column_config.TextColumn("Oznaka"),
+                "A_mm": st.column_config.NumberColumn("Dim A (mm)", min_value=1, step=1),
+                "B_mm": st.column_config.NumberColumn("Dim B (mm)", min_value=1, step=1),
+                "kom": st.column_config.NumberColumn("Kom", min_value=1, step=1),
+                "kant_dugi": st.column_config.SelectboxColumn("Kant DUGI", options=[0, 1, 2]),
+                "kant_kratki": st.column_config.SelectboxColumn("Kant KRATKI", options=[0, 1, 2]),
+                "auto": st.column_config.CheckboxColumn("✔️ Auto pravilo"),
+                "mat": st.column_config.SelectboxColumn("Materijal", options=KAT.MAT_LABEL_OPTIONS),
+                "traka": st.column_config.SelectboxColumn("ABS traka", options=KAT.TRAK_LABEL_OPTIONS),
+            },
+            column_order=column_order,
+            key="editor_korpus",  # jedinstveni ključ
         )
-        d["kant_dugi"] = dugi; d["kant_kratki"] = kratki
-        display_rows.append(d)
-
-    st.markdown("""
-    <style>
-    .center-editor [data-testid="stDataEditor"] thead th,
-    .center-editor [data-testid="stDataEditor"] tbody td { text-align: center !important; }
-    .center-editor [data-testid="stDataEditor"] thead th:nth-child(1),
-    .center-editor [data-testid="stDataEditor"] tbody td:nth-child(1) { text-align: left !important; }
-    </style>
-    """, unsafe_allow_html=True)
-    st.markdown('<div class="center-editor">', unsafe_allow_html=True)
-
-    column_order = ["naziv","oznaka","mat","traka","A_mm","B_mm","kom","kant_dugi","kant_kratki","auto"]
-    edited = st.data_editor(
-        display_rows,
-        num_rows="dynamic",
-        use_container_width=True,
-        column_config={
-            "naziv": st.column_config.TextColumn("Naziv"),
-            "oznaka": st.column_config.TextColumn("Oznaka"),
-            "A_mm": st.column_config.NumberColumn("Dim A (mm)", min_value=1, step=1),
-            "B_mm": st.column_config.NumberColumn("Dim B (mm)", min_value=1, step=1),
-            "kom": st.column_config.NumberColumn("Kom", min_value=1, step=1),
-            "kant_dugi": st.column_config.SelectboxColumn("Kant DUGI", options=[0, 1, 2]),
-            "kant_kratki": st.column_config.SelectboxColumn("Kant KRATKI", options=[0, 1, 2]),
-            "auto": st.column_config.CheckboxColumn("✔️ Auto pravilo"),
-            "mat": st.column_config.SelectboxColumn("Materijal", options=sorted(set(MAT_LABEL.values()))),
-            "traka": st.column_config.SelectboxColumn("ABS traka", options=sorted(set(TRAK_LABEL.values()))),
-        },
-        column_order=column_order,
-        key="editor_korpus",  # jedinstveni ključ
-    )
-    st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
 
-    # 3) Normalizacija label -> šifra
-    normalized_rows = []
-    for r in edited:
-        r = dict(r)
-        if r.get("mat") in MAT_BY_LABEL:   r["mat"] = MAT_BY_LABEL[r["mat"]]
-        if r.get("traka") in TRAK_BY_LABEL:r["traka"] = TRAK_BY_LABEL[r["traka"]]
-        normalized_rows.append(r)
+        # 3) Normalizacija label -> šifra (dalje idu kompaktni Part zapisi, dictovi su samo za editor)
+        normalized_rows = []
+        for r in edited:
+            r = dict(r)
+            if r.get("mat") in MAT_BY_LABEL:   r["mat"] = MAT_BY_LABEL[r["mat"]]
+            if r.get("traka") in TRAK_BY_LABEL:r["traka"] = TRAK_BY_LABEL[r["traka"]]
+            normalized_rows.append(Part.from_row(r))
 
     # 4) Izračun – korpus
-    report, metrics = calculate(normalized_rows, rez_usl, kant_usl, MATS, TRAK, FRONTS, FTRAK, USLG)
-    mats_services_total, _ = materials_services_summary(metrics, use_waste, waste_pct)
+    with TIMER.stage("calculate"):
+        report, metrics = calculate_cached(normalized_rows, rez_usl, kant_usl)
+    nest_eur = None
+    if use_nesting:
+        with TIMER.stage("nesting"):
+            nest = nest_cached(normalized_rows, (ploca_A_mm, ploca_B_mm), kerf_mm, vlakno)
+            nest_eur = nesting_waste_eur(nest, MATS, FRONTS)
+    mats_services_total, eur_waste = materials_services_summary(metrics, use_waste, waste_pct, nest_eur)
+    kv_materials_services(metrics, mats_services_total, eur_waste)
+    if use_nesting:
+        with st.expander(f"📐 Krojna lista: {nest['ploce']} ploča, otpad {fmt_m2(nest['otpad_m2'])}", expanded=False):
+            st.dataframe(
+                [{"Materijal": MAT_LABEL.get(mat, mat), "Ploča (mm)": f"{m['ploca_mm'][0]}×{m['ploca_mm'][1]}",
+                  "Ploča": m["ploce"], "m² elemenata": round(m["povrsina_elemenata_m2"], 3),
+                  "m² otpada": round(m["otpad_m2"], 3), "Otpad %": round(m["otpad_pct"], 1)}
+                 for mat, m in nest["materijali"].items()],
+                hide_index=True, use_container_width=True)
+            for p in nest["prevelik"]:
+                st.warning(f"{p['naziv']} ({p['A_mm']:.0f}×{p['B_mm']:.0f} mm) ne stane na ploču – nije u krojnoj listi.")
+            st.dataframe(
+                [{"Materijal": MAT_LABEL.get(mat, mat), **{k: (round(v, 1) if isinstance(v, float) else v)
+                                                           for k, v in p.items()}}
+                 for mat, m in nest["materijali"].items() for p in m["raspored"]],
+                hide_index=True, use_container_width=True)
 
     # 5) Izračun – okov/oprema/dodatci
-    extras_total_val = extras_totals(okov_rows, oprema_rows, dodatci_rows)
+    extras = extras_breakdown(okov_rows, oprema_rows, dodatci_rows)
+    extras_total_val = extras["total"]
+    kv_extras(extras)
 
     # 6) Rad i završni zbir
     labor_total_val = labor_total_calc(h_tp, r_tp, h_cnc, r_cnc, h_skl, r_skl, h_pak, r_pak)
-    ukupno = final_summary_grand(mats_services_total, extras_total_val, labor_total_val, use_markup, markup_pct)
+    final = final_breakdown(mats_services_total, extras_total_val, labor_total_val, use_markup, markup_pct)
+    kv_final(mats_services_total, extras_total_val, labor_total_val, final, use_markup, markup_pct)
+    ukupno = final["ukupno"]
 
     st.success(f"✅ UKUPNO: {fmt_eur(ukupno)}")
 
-    # CSV export (korpus elementi)
+    # --- Povijest: svaka izračunata ponuda (ulazi, verzija cjenika, rezultati); ista se ne duplicira ---
+    spec = dict(
+        W=W, H=H, D=D, t=t, n_police=n_police,
+        include_back=include_back, pod_vrsta_vanjski=pod_vrsta_vanjski, kapa_vrsta_vanjska=kapa_vrsta_vanjska,
+        include_kapa_povez=include_kapa_povez, kapa_povez_mode=kapa_povez_mode,
+        kapa_povez_sirina_mm=kapa_povez_sirina_mm, kapa_povez_posto=kapa_povez_posto,
+        include_haupt_hor=include_haupt_hor, include_haupt_ver=include_haupt_ver, haupt_sirina_mm=haupt_sirina_mm,
+        default_mat=default_mat, default_traka=default_traka, default_mat_fr=default_mat_fr,
+        default_traka_fr=default_traka_fr, rez_usl=rez_usl, kant_usl=kant_usl,
+        include_fronta=include_fronta, fronta_tip=fronta_tip, fronta_montaza=fronta_montaza,
+        razmak_hor=razmak_hor, razmak_ver=razmak_ver, razmak_srednji=razmak_srednji,
+        preklop_hor=preklop_hor, preklop_ver=preklop_ver,
+        h_tp=h_tp, r_tp=r_tp, h_cnc=h_cnc, r_cnc=r_cnc, h_skl=h_skl, r_skl=r_skl, h_pak=h_pak, r_pak=r_pak,
+        use_waste=use_waste, waste_pct=waste_pct, use_markup=use_markup, markup_pct=markup_pct, rok_dani=rok_dani,
+        use_nesting=use_nesting, ploca_A_mm=ploca_A_mm, ploca_B_mm=ploca_B_mm, kerf_mm=kerf_mm, vlakno=vlakno,
+    )
+    if SPREMAJ_POVIJEST:
+        totals = dict(mats_services_total=mats_services_total, eur_waste=eur_waste, extras_total=extras_total_val,
+                      okov=extras["okov"], oprema=extras["oprema"], dodatci=extras["dodatci"],
+                      labor_total=labor_total_val, **final)
+        with TIMER.stage("povijest"):
+            quote_db(POVIJEST_PATH).save(spec, normalized_rows, report, metrics, totals, CJE_VER,
+                                         okov_rows, oprema_rows, dodatci_rows, naziv=f"Korpus {W}×{H}×{D}")
+
+    # --- Izvoz: svaki format se gradi tek na zahtjev i cachira po hashu sadržaja ponude ---
     st.markdown("### 📤 Izvoz")
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    csv_filename = f"izracun_unified_{timestamp}.csv"
-    csv_buffer = io.StringIO()
-    if report:
-        fieldnames = list(report[0].keys())
-        writer = csv.DictWriter(csv_buffer, fieldnames=fieldnames)
-        writer.writeheader()
-        for row in report:
-            writer.writerow(row)
-    st.download_button(
-        "⬇️ CSV – elementi (korpus)",
-        data=csv_buffer.getvalue().encode("utf-8"),
-        file_name=csv_filename,
-        mime="text/csv",
-        use_container_width=True
+    quote_hash = stable_hash((
+        normalized_rows, rez_usl, kant_usl, CJE_VER, okov_rows, oprema_rows, dodatci_rows,
+        use_waste, waste_pct, use_nesting, ploca_A_mm, ploca_B_mm, kerf_mm, vlakno,
+        use_markup, markup_pct, h_tp, r_tp, h_cnc, r_cnc, h_skl, r_skl, h_pak, r_pak,
+        W, H, D, n_police, rok_dani, include_back, pod_vrsta_vanjski, kapa_vrsta_vanjska, include_kapa_povez,
+        include_fronta, fronta_tip, fronta_montaza,
+        datetime.date.today().isoformat(),  # datum je u PDF-u
+    ))
+    requested = st.session_state.setdefault("izvoz_zahtjevi", {})
+
+    def export_slot(kind, prep_label, build):
+        """Gumb 'Pripremi' → izgradi (ili uzmi iz cachea) i vrati bajtove; None dok nije zatraženo."""
+        if requested.get(kind) != quote_hash:
+            slot = st.empty()
+            if not slot.button(prep_label, key=f"prep_{kind}", use_container_width=True):
+                return None
+            slot.empty()
+            requested[kind] = quote_hash
+        with st.spinner(f"Pripremam {kind.upper()}…"), TIMER.stage(f"izvoz_{kind}"):
+            return export_cache().get_or_compute((kind, quote_hash), build)
+
+    pdf_args = dict(
+        metrics=metrics, mats_services_total=mats_services_total, extras_total=extras_total_val,
+        labor_total=labor_total_val, use_markup=use_markup, markup_pct=markup_pct,
+        W=W, H=H, D=D, n_police=n_police, waste_pct=waste_pct, rok_dani=rok_dani,
+        include_back=include_back, pod_vrsta_vanjski=pod_vrsta_vanjski, kapa_vrsta_vanjska=kapa_vrsta_vanjska,
+        include_kapa_povez=include_kapa_povez, include_fronta=include_fronta,
+        fronta_tip=fronta_tip, fronta_montaza=fronta_montaza,
+        eur_waste=eur_waste, ploce=nest["ploce"] if use_nesting else None,
     )
+    export_names = {"csv": f"izracun_unified_{timestamp}.csv", "xlsx": f"kantiranje_{timestamp}.xlsx",
+                    "pdf": f"ponuda_{timestamp}.pdf"}
+
+    # Svi formati odjednom: CSV/XLSX u dretvama, PDF u procesu; već gotovi se uzimaju iz cachea
+    if st.button("⚡ Pripremi sve istodobno (CSV + XLSX + PDF + ZIP)", use_container_width=True):
+        missing = [k for k in EXPORT_KINDS if (k, quote_hash) not in export_cache()]
+        with st.spinner("Pripremam sve izvoze…"), TIMER.stage("izvoz_sve"):
+            arts, errs = build_exports(report, normalized_rows, okov_rows, oprema_rows, dodatci_rows,
+                                       pdf_args=pdf_args, kinds=missing)
+        for kind, data in arts.items():
+            export_cache().put((kind, quote_hash), (data, None) if kind == "xlsx" else data)
+        for kind, err in errs.items():
+            st.warning(f"{kind.upper()} nije generiran: {err}")
+        files = {}
+        for kind in EXPORT_KINDS:
+            data = export_cache().get((kind, quote_hash))
+            if data is not None:
+                requested[kind] = quote_hash
+                files[export_names[kind]] = data[0] if kind == "xlsx" else data
+        if files:
+            export_cache().put(("zip", quote_hash), build_zip(files))
+            requested["zip"] = quote_hash
+    if requested.get("zip") == quote_hash and ("zip", quote_hash) in export_cache():
+        st.download_button("⬇️ ZIP – svi izvozi", data=export_cache().get(("zip", quote_hash)),
+                           file_name=f"izvoz_{timestamp}.zip", mime="application/zip", use_container_width=True)
+
+    c_csv, c_xlsx, c_pdf = st.columns(3)
+    with c_csv:
+        csv_bytes = export_slot("csv", "⚙️ Pripremi CSV", lambda: build_csv(report))
+        if csv_bytes is not None:
+            st.download_button(
+                "⬇️ CSV – elementi (korpus)",
+                data=csv_bytes,
+                file_name=export_names["csv"],
+                mime="text/csv",
+                use_container_width=True
+            )
 
     # --- XLSX export: komplet ---
-    xlsx_bytes, xlsx_err = build_xlsx_kantiranje(report, normalized_rows, okov_rows, oprema_rows, dodatci_rows)
-    if xlsx_err:
-        st.error(f"XLSX izvoz nije uspio: {xlsx_err}")
-    else:
-        st.download_button(
-            "⬇️ XLSX – komplet (korpus + narudžba + okov/oprema/dodatci)",
-            data=xlsx_bytes,
-            file_name=f"kantiranje_{timestamp}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            use_container_width=True
-        )
+    with c_xlsx:
+        xlsx = export_slot("xlsx", "⚙️ Pripremi XLSX",
+                           lambda: build_xlsx_kantiranje(report, normalized_rows, okov_rows, oprema_rows, dodatci_rows))
+        if xlsx is not None:
+            xlsx_bytes, xlsx_err = xlsx
+            if xlsx_err:
+                st.error(f"XLSX izvoz nije uspio: {xlsx_err}")
+            else:
+                st.download_button(
+                    "⬇️ XLSX – komplet (korpus + narudžba + okov/oprema/dodatci)",
+                    data=xlsx_bytes,
+                    file_name=export_names["xlsx"],
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
 
     # --- PDF export s NAZIV naslovom (opcionalno) ---
-    try:
-        pdf_bytes = build_full_pdf(
-            report, metrics, mats_services_total, extras_total_val, labor_total_val, use_markup, markup_pct,
-            W, H, D, n_police, waste_pct, rok_dani,
-            include_back, pod_vrsta_vanjski, kapa_vrsta_vanjska, include_kapa_povez,
-            include_fronta, fronta_montaza=fronta_montaza, fronta_tip=fronta_tip
-        )
-        st.download_button(
-            "⬇️ PDF – ponuda (s NAZIV naslovom)",
-            data=pdf_bytes,
-            file_name=f"ponuda_{timestamp}.pdf",
-            mime="application/pdf",
-            use_container_width=True
-        )
-    except Exception as e:
-        st.warning(f"PDF nije generiran: {e}")
+    with c_pdf:
+        try:
+            pdf_bytes = export_slot("pdf", "⚙️ Pripremi PDF", lambda: build_full_pdf(report, **pdf_args))
+            if pdf_bytes is not None:
+                st.download_button(
+                    "⬇️ PDF – ponuda (s NAZIV naslovom)",
+                    data=pdf_bytes,
+                    file_name=export_names["pdf"],
+                    mime="application/pdf",
+                    use_container_width=True
+                )
+        except Exception as e:
+            requested.pop("pdf", None)
+            st.warning(f"PDF nije generiran: {e}")
+
+    # --- Projekt: više korpusa, zbrojevi se ažuriraju samo za promijenjeni korpus ---
+    st.markdown("### 🗂️ Projekt (više korpusa)")
+    projekt = st.session_state.get("projekt")
+    if projekt is None:
+        projekt = st.session_state["projekt"] = Projekt(KAT)
+    elif projekt.version != KAT.version:
+        projekt.set_cjenik(KAT)
+    pj1, pj2, pj3 = st.columns([3, 1, 2])
+    with pj1: korpus_naziv = st.text_input("Naziv korpusa u projektu", value=f"Korpus {W}×{H}×{D}")
+    with pj2: korpus_kol = st.number_input("Količina", min_value=1, value=1, step=1)
+    with pj3:
+        zamijeni = st.selectbox("Zamijeni korpus", [None, *projekt.korpusi],
+                                format_func=lambda k: "— dodaj novi —" if k is None else f"{k}: {projekt.korpusi[k]['naziv']}")
+    if st.button("➕ Dodaj / zamijeni u projektu", use_container_width=True):
+        args = dict(spec=spec, rows=normalized_rows, okov_rows=okov_rows, oprema_rows=oprema_rows,
+                    dodatci_rows=dodatci_rows, naziv=korpus_naziv, kolicina=korpus_kol)
+        with TIMER.stage("projekt"):
+            if zamijeni is None:
+                projekt.add(**args)
+            else:
+                projekt.update(zamijeni, **args)
+
+    if projekt.korpusi:
+        st.dataframe(
+            [{"ID": r["id"], "Naziv": r["naziv"], "Kol.": r["kolicina"], "W×H×D": f"{r['W']}×{r['H']}×{r['D']}",
+              "€ / kom": fmt_eur(r["ukupno_kom"]), "€ ukupno": fmt_eur(r["ukupno"])} for r in projekt.pregled()],
+            hide_index=True, use_container_width=True)
+        pt = projekt.totals()
+        kv_table("🗂️ Projekt – zbroj", [
+            ("Broj korpusa", str(pt["korpusi"])),
+            ("Materijal + usluge + otpad", fmt_eur(pt["mats_services_total"])),
+            ("Okov + Oprema + Dodatci", fmt_eur(pt["extras_total"])),
+            ("Rad", fmt_eur(pt["labor_total"])),
+            ("Marža", fmt_eur(pt["eur_markup"])),
+            ("UKUPNO PROJEKT", fmt_eur(pt["ukupno"]), "total"),
+        ])
+        pm1, pm2 = st.columns(2)
+        with pm1:
+            st.caption("Materijali")
+            st.dataframe([{"Materijal": MAT_LABEL.get(k, k), "m²": round(v.get("m2", 0.0), 3),
+                           "€": round(v.get("eur", 0.0), 2)} for k, v in projekt.materijali().items()],
+                         hide_index=True, use_container_width=True)
+        with pm2:
+            st.caption("ABS trake")
+            st.dataframe([{"Traka": TRAK_LABEL.get(k, k), "m": round(v.get("m", 0.0), 3),
+                           "€": round(v.get("eur", 0.0), 2)} for k, v in projekt.trake().items()],
+                         hide_index=True, use_container_width=True)
+        rm1, rm2 = st.columns([3, 1])
+        with rm1:
+            ukloni = st.selectbox("Ukloni korpus", list(projekt.korpusi),
+                                  format_func=lambda k: f"{k}: {projekt.korpusi[k]['naziv']}")
+        with rm2:
+            if st.button("🗑️ Ukloni", use_container_width=True):
+                projekt.remove(ukloni)
+                st.rerun()
+        st.download_button("⬇️ Projekt (JSON)", data=json.dumps(projekt.to_dict(), ensure_ascii=False, indent=2),
+                           file_name=f"projekt_{timestamp}.json", mime="application/json")
 
 else:
     st.info("Popunite korake 1–5, pa kliknite **🧮 Izračunaj ▶**.")
 
+# =============== Povijest: pretraga i otvaranje bez ponovnog izračuna ===============
+with st.expander("🕘 Povijest ponuda – pretraga"):
+    hdb = quote_db(POVIJEST_PATH)
+    h1, h2, h3, h4 = st.columns(4)
+    with h1: h_od = st.date_input("Od", value=None, key="h_od")
+    with h2: h_do = st.date_input("Do", value=None, key="h_do")
+    with h3: h_mat = st.selectbox("Materijal / traka", [None, *MATS_KEYS, *FR_KEYS, *TRAK_KEYS, *FTRAK_KEYS],
+                                  format_func=lambda k: "— svi —" if k is None else MAT_LABEL.get(k, TRAK_LABEL.get(k, k)),
+                                  key="h_mat")
+    with h4: h_naziv = st.text_input("Naziv sadrži", key="h_naziv")
+    h5, h6, h7, h8, h9 = st.columns(5)
+    with h5: h_W = st.number_input("W (mm)", min_value=0, value=0, step=10, key="h_W")
+    with h6: h_H = st.number_input("H (mm)", min_value=0, value=0, step=10, key="h_H")
+    with h7: h_D = st.number_input("D (mm)", min_value=0, value=0, step=10, key="h_D")
+    with h8: h_min = st.number_input("Ukupno od (€)", min_value=0.0, value=0.0, step=10.0, key="h_min")
+    with h9: h_max = st.number_input("Ukupno do (€)", min_value=0.0, value=0.0, step=10.0, key="h_max")
+    nadjeno = hdb.search(od=h_od, do=h_do, W=h_W, H=h_H, D=h_D, sifra=h_mat, naziv=h_naziv,
+                         min_ukupno=h_min or None, max_ukupno=h_max or None, limit=200)
+    st.caption(f"{len(nadjeno)} prikazano / {hdb.count()} spremljenih ponuda")
+    if nadjeno:
+        st.dataframe([{"ID": r["id"], "Kreirano": r["kreirano"].replace("T", " "), "Naziv": r["naziv"],
+                       "W×H×D": f"{r['W']:.0f}×{r['H']:.0f}×{r['D']:.0f}", "Ukupno": fmt_eur(r["ukupno"]),
+                       "Cjenik": r["cjenik"][:8] + (" (trenutni)" if r["cjenik"] == CJE_VER else "")}
+                      for r in nadjeno], hide_index=True, use_container_width=True)
+        otvori = st.selectbox("Otvori ponudu", [r["id"] for r in nadjeno],
+                              format_func=lambda i: next(f"{r['id']}: {r['naziv']} – {fmt_eur(r['ukupno'])}"
+                                                         for r in nadjeno if r["id"] == i), key="h_otvori")
+        sp = hdb.get(otvori)
+        st.dataframe(sp["report"], use_container_width=True)
+        kv_table(f"🧾 Ponuda {sp['id']} ({sp['kreirano'].replace('T', ' ')})", [
+            ("Materijal + usluge + otpad", fmt_eur(sp["totals"]["mats_services_total"])),
+            ("Okov + Oprema + Dodatci", fmt_eur(sp["totals"]["extras_total"])),
+            ("Rad", fmt_eur(sp["totals"]["labor_total"])),
+            ("Marža", fmt_eur(sp["totals"]["eur_markup"])),
+            ("UKUPNO", fmt_eur(sp["totals"]["ukupno"]), "total"),
+        ])
+        hc1, hc2 = st.columns(2)
+        with hc1:
+            st.download_button("⬇️ CSV – elementi (spremljeno)", data=build_csv(sp["report"]),
+                               file_name=f"ponuda_{sp['id']}.csv", mime="text/csv", use_container_width=True)
+        with hc2:
+            st.download_button("⬇️ Ponuda (JSON)", data=json.dumps(sp, ensure_ascii=False, indent=2),
+                               file_name=f"ponuda_{sp['id']}.json", mime="application/json", use_container_width=True)
+
+# =============== Cache statistika ===============
+_cs = calc_cache().stats()
+st.sidebar.caption(f"⚡ Cache izračuna: {_cs['hits']} pogodaka / {_cs['misses']} promašaja "
+                   f"({_cs['size']}/{_cs['maxsize']} unosa)")
+_es = export_cache().stats()
+st.sidebar.caption(f"📤 Cache izvoza: {_es['hits']} pogodaka / {_es['misses']} promašaja "
+                   f"({_es['size']}/{_es['maxsize']} unosa)")
+
+# =============== Mjerenje faza ===============
+# Zadnjih N rerunova u sesiji; JSON se prilaže uz prijavu sporog izračuna
+TIMING_LOG = st.session_state.setdefault("timing_log", TimingLog())
+TIMING_LOG.add(TIMER.finish())
+if st.sidebar.toggle("⏱️ Trajanje faza", value=enabled_from_env(), key="timing_panel"):
+    with st.sidebar.expander(f"⏱️ Trajanje faza (zadnjih {len(TIMING_LOG)} rerunova)", expanded=True):
+        run = TIMING_LOG.runs[-1]
+        st.caption(f"Ovaj rerun: {run['ukupno_s'] * 1000:.1f} ms")
+        st.dataframe(
+            [*({"Faza": f["faza"], "ms": round(f["s"] * 1000, 1), "Puta": f["puta"]} for f in run["faze"]),
+             {"Faza": "ostalo (widgeti, prikaz)", "ms": round(run["ostalo_s"] * 1000, 1), "Puta": None}],
+            hide_index=True, use_container_width=True)
+        st.caption("Zadnji rerunovi (ms)")
+        st.dataframe(TIMING_LOG.table(), hide_index=True, use_container_width=True)
+        st.caption("Po fazi (ms)")
+        st.dataframe(TIMING_LOG.summary(), hide_index=True, use_container_width=True)
+        st.download_button("⬇️ Mjerenja (JSON)", data=TIMING_LOG.to_json(cjenik=CJE_VER),
+                           file_name=f"mjerenja_{datetime.datetime.now():%Y%m%d_%H%M%S}.json",
+                           mime="application/json", use_container_width=True)
+        if st.button("🧹 Obriši mjerenja", use_container_width=True):
+            TIMING_LOG.clear()
+
 # =============== Loader cache reset ===============
 if st.sidebar.button("🔄 Učitaj ponovno cjenik"):
     load_local.clear()
     load_from_uploaded.clear()
     load_from_csv_urls.clear()
+    compiled_catalog.clear()
+    calc_cache().clear()
+    export_cache().clear()
     st.experimental_rerun()
@@ -0,0 +1,16 @@
+"""MIA Stil – jezgra kalkulatora korpusa.
+
+Paket nema UI ovisnosti (Streamlit, pandas) pa se može koristiti iz workera,
+testova i batch poslova. Streamlit aplikacija (app_unified_v5.py) ga samo poziva.
+"""
+from .cjenik import normalize_cjenik, load_cjenik, from_csv_rows, to_float
+from .engine import (
+    mm2_to_m2, mm_to_m, extract_short, short_code_for, auto_kant_counts,
+    index_cjenik, derive_rows, calculate,
+    materials_services_summary, extras_breakdown, extras_totals, labor_total_calc,
+    final_breakdown, final_summary_grand,
+    DERIVE_KEYS, DEFAULT_SPEC, SPEC_CODES, resolve_spec, unknown_codes, quote, finish_quote,
+)
+from .kant import kant_length_mm_longshort
+from .parts import Part, PartCost, REPORT_COLS
+from .catalog import Catalog, compile_catalog
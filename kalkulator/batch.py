@@ -0,0 +1,214 @@
+"""Batch ponude iz naredbenog retka: CSV/JSONL specifikacija → zbrojevi po korpusu.
+
+    python -m kalkulator.batch narudzba.csv -o zbrojevi.csv --parts elementi.csv
+    python -m kalkulator.batch narudzba.csv --pdf ponude/      # + PDF ponuda po korpusu
+
+Specifikacije se čitaju redom (streaming), računaju u procesima u komadima
+(``--chunk``) s ograničenim brojem komada u letu, pa memorija ne raste s
+veličinom ulaza. Propusnost (specifikacija/s) ispisuje se na stderr.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .cjenik import load_cjenik
+from .catalog import compile_catalog
+from .engine import DEFAULT_SPEC, quote, resolve_spec, unknown_codes
+from .parts import REPORT_COLS
+
+# Stupci izlaznih datoteka
+ID_KEY = "id"
+TOTALS_SPEC_COLS = ["W", "H", "D", "t", "n_police", "include_back", "include_fronta", "fronta_tip",
+                    "default_mat", "default_mat_fr"]
+TOTALS_METRIC_COLS = ["total_area_m2", "total_rezanje_m", "total_kant_m",
+                      "cijena_mat_eur", "cijena_kant_traka_eur", "cijena_kant_usl_eur", "cijena_rez_eur"]
+TOTALS_COLS = ["mats_services_total", "eur_waste", "extras_total", "labor_total",
+               "pre_markup", "eur_markup", "ukupno"]
+PART_COLS = list(REPORT_COLS)
+
+_TRUE = {"1", "true", "da", "yes", "y", "x", "on"}
+
+
+def coerce_spec(raw: dict) -> dict:
+    """Vrijednosti iz CSV-a (stringovi) → tipovi iz DEFAULT_SPEC; prazno = zadano."""
+    if not isinstance(raw, dict):
+        raise TypeError(f"specifikacija mora biti objekt, a ne {type(raw).__name__}")
+    spec = {}
+    for k, v in raw.items():
+        if k is None or k == ID_KEY:
+            continue
+        k = k.strip()
+        if isinstance(v, str):
+            v = v.strip()
+            if v == "":
+                continue
+        default = DEFAULT_SPEC.get(k)
+        if isinstance(default, bool):
+            v = v if isinstance(v, bool) else str(v).lower() in _TRUE
+        elif isinstance(default, int):
+            v = int(float(str(v).replace(",", ".")))
+        elif isinstance(default, float):
+            v = float(str(v).replace(",", "."))
+        spec[k] = v
+    return spec
+
+
+def read_specs(path):
+    """Generator (id, raw dict) iz .csv ili .jsonl datoteke ('-' = stdin, JSONL).
+
+    Neispravan JSON redak daje (broj retka, iznimka) umjesto dicta – greška
+    se upisuje u stupac ``greska`` tog retka, a ostatak ulaza se i dalje računa.
+    """
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8-sig", newline="")
+    try:
+        if path.lower().endswith(".csv"):
+            sample = f.read(4096); f.seek(0)
+            delim = ";" if sample.count(";") > sample.count(",") else ","
+            for i, raw in enumerate(csv.DictReader(f, delimiter=delim), start=1):
+                yield raw.get(ID_KEY) or str(i), raw
+        else:
+            for i, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    raw = json.loads(line)
+                except ValueError as e:
+                    yield str(i), e
+                    continue
+                yield str((raw.get(ID_KEY) if isinstance(raw, dict) else None) or i), raw
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+# =============== Worker ===============
+_W = {}
+
+def _init_worker(cjenik_path):
+    cje = load_cjenik(cjenik_path)
+    _W["cje"] = cje
+    _W["idx"] = compile_catalog(cje)
+
+def _pdf_name(spec_id):
+    safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in str(spec_id))
+    return f"ponuda_{safe}.pdf"
+
+def _price_chunk(chunk, with_parts, pdf_dir=None):
+    out = []
+    for spec_id, raw in chunk:
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            s = resolve_spec(coerce_spec(raw), _W["idx"])
+            bad = unknown_codes(s, _W["idx"])
+            if bad:
+                raise ValueError("nepoznata šifra: " + ", ".join(f"{k}={v!r}" for k, v in bad))
+            q = quote(s, _W["cje"], idx=_W["idx"])
+            if pdf_dir:
+                # renderer (fontovi, stilovi) je jedan po workeru; PDF ide ravno u datoteku
+                from .pdf import get_renderer
+                get_renderer().ponuda_from_quote(q, output=os.path.join(pdf_dir, _pdf_name(spec_id)))
+        except Exception as e:
+            out.append((spec_id, None, None, f"{type(e).__name__}: {e}"))
+            continue
+        totals_row = {ID_KEY: spec_id}
+        totals_row.update({k: q["spec"].get(k) for k in TOTALS_SPEC_COLS})
+        totals_row.update({k: round(q["metrics"][k], 3) for k in TOTALS_METRIC_COLS})
+        totals_row.update({k: round(q["totals"][k], 2) for k in TOTALS_COLS})
+        out.append((spec_id, totals_row, q["report"] if with_parts else None, ""))
+    return out
+
+
+def _chunks(it, size):
+    chunk = []
+    for x in it:
+        chunk.append(x)
+        if len(chunk) >= size:
+            yield chunk; chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(specs_path, out_path, parts_path=None, cjenik_path="cjenik.json",
+              workers=None, chunk=64, progress=None, pdf_dir=None):
+    """Izračunaj sve specifikacije; vraća (broj_ok, broj_gresaka, sekunde)."""
+    workers = workers or os.cpu_count() or 1
+    max_inflight = workers * 2
+    t0 = time.perf_counter()
+    n_ok = n_err = 0
+    if pdf_dir:
+        os.makedirs(pdf_dir, exist_ok=True)
+
+    out_f = open(out_path, "w", encoding="utf-8", newline="")
+    parts_f = open(parts_path, "w", encoding="utf-8", newline="") if parts_path else None
+    try:
+        w_tot = csv.DictWriter(out_f, fieldnames=[ID_KEY] + TOTALS_SPEC_COLS + TOTALS_METRIC_COLS + TOTALS_COLS + ["greska"])
+        w_tot.writeheader()
+        w_parts = None
+        if parts_f:
+            w_parts = csv.DictWriter(parts_f, fieldnames=[ID_KEY] + PART_COLS)
+            w_parts.writeheader()
+
+        def write(results):
+            nonlocal n_ok, n_err
+            for spec_id, totals_row, report, err in results:
+                if err:
+                    n_err += 1
+                    w_tot.writerow({ID_KEY: spec_id, "greska": err})
+                    continue
+                n_ok += 1
+                w_tot.writerow(totals_row)
+                if w_parts and report:
+                    for r in report:
+                        w_parts.writerow({ID_KEY: spec_id, **r})
+            if progress:
+                progress(n_ok + n_err, time.perf_counter() - t0)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cjenik_path,)) as ex:
+            inflight = deque()
+            for c in _chunks(read_specs(specs_path), chunk):
+                inflight.append(ex.submit(_price_chunk, c, parts_f is not None, pdf_dir))
+                # ograniči broj komada u letu i piši redom kojim su specifikacije došle
+                while len(inflight) >= max_inflight:
+                    write(inflight.popleft().result())
+            while inflight:
+                write(inflight.popleft().result())
+    finally:
+        out_f.close()
+        if parts_f:
+            parts_f.close()
+    return n_ok, n_err, time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.batch", description="Batch izračun ponuda korpusa.")
+    ap.add_argument("specs", help="CSV ili JSONL sa specifikacijama (stupci = ključevi DEFAULT_SPEC, opcionalno 'id')")
+    ap.add_argument("-o", "--out", default="zbrojevi.csv", help="CSV sa zbrojevima po korpusu")
+    ap.add_argument("--parts", default=None, help="opcionalni CSV s elementima po korpusu")
+    ap.add_argument("--cjenik", default="cjenik.json", help="JSON cjenik (default: cjenik.json)")
+    ap.add_argument("--pdf", default=None, metavar="DIR", help="direktorij za PDF ponudu po korpusu (ponuda_<id>.pdf)")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="broj procesa (default: broj jezgri)")
+    ap.add_argument("--chunk", type=int, default=64, help="specifikacija po komadu posla")
+    ap.add_argument("-q", "--quiet", action="store_true")
+    args = ap.parse_args(argv)
+
+    def progress(n, dt):
+        if not args.quiet:
+            print(f"\r{n} specifikacija  {n / dt if dt else 0:.0f} spec/s", end="", file=sys.stderr)
+
+    n_ok, n_err, dt = run_batch(args.specs, args.out, args.parts, args.cjenik,
+                                workers=args.workers, chunk=args.chunk, progress=progress,
+                                pdf_dir=args.pdf)
+    n = n_ok + n_err
+    print(f"\nGotovo: {n_ok} ok, {n_err} grešaka, {dt:.2f} s, {n / dt if dt else 0:.0f} spec/s", file=sys.stderr)
+    return 1 if n_err else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
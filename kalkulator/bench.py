@@ -0,0 +1,279 @@
+"""Benchmarki vrućih putanja: normalize_cjenik, derive_rows, calculate, quote, XLSX i PDF izvoz.
+
+Sintetički cjenici (100 – 100k artikala) i projekti (1 – 10k korpusa) su
+deterministički (fiksni seed), pa su mjerenja usporediva između verzija koda.
+
+    python -m kalkulator.bench                          # quick profil, ispis
+    python -m kalkulator.bench --save-baseline          # spremi bench_baseline.json
+    python -m kalkulator.bench --compare                # usporedi s baselineom, exit 1 na regresiju
+    python -m kalkulator.bench --profile full -k xlsx   # samo slučajevi koji sadrže 'xlsx'
+
+Regresija je najbolje vrijeme (min) sporije od baselinea više od ``--threshold``
+puta (zadano 1.25). Šum mjerenja vrijeme samo produljuje, pa je min stabilniji
+od medijana; slučajevi koji ipak ispadnu sporiji mjere se ponovno (do
+``RECHECK_ROUNDS`` navrata po ``RECHECK_REPEAT`` ponavljanja) prije prijave.
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from .cjenik import normalize_cjenik
+from .engine import DERIVE_KEYS, calculate, derive_rows, index_cjenik, quote, resolve_spec
+
+DEFAULT_BASELINE = "bench_baseline.json"
+DEFAULT_THRESHOLD = 1.25
+NOISE_FLOOR_S = 0.0005   # razlike ispod pola milisekunde nisu regresija (šum mjerenja)
+RECHECK_REPEAT = 20      # ponavljanja pri provjeri slučaja koji je ispao sporiji …
+RECHECK_ROUNDS = 3       # … u najviše toliko navrata
+RECHECK_PAUSE_S = 2.0
+
+# veličine po profilu: korpusi za derive/calculate, artikli za normalize, korpusi za izvoz
+PROFILES = {
+    "quick": {"cabinets": (1, 100, 1000), "articles": (100, 10_000), "export": (1, 100)},
+    "full": {"cabinets": (1, 100, 10_000), "articles": (100, 10_000, 100_000), "export": (1, 100, 1000)},
+}
+
+
+# =============== Sintetički podaci ===============
+def synthetic_cjenik(n_articles, seed=0):
+    """Sirovi cjenik (kao iz JSON-a) s ``n_articles`` OKOV/OPREMA artikala i varijantama ključeva."""
+    rnd = random.Random(seed)
+    mats = [{"sifra": f"M{i:03d}", "naziv": f"M{i:03d} ST{i % 20} Dekor {i}", "cijena_eur_po_m2": round(rnd.uniform(8, 30), 2)}
+            for i in range(20)]
+    traks = [{"sifra": f"T{i:03d}", "naziv": f"ABS 22×1 Dekor {i}", "cijena_eur_po_m": round(rnd.uniform(0.2, 1.2), 2)}
+             for i in range(10)]
+    fronts = [{"sifra": f"FR{i:03d}", "naziv": f"FR{i:03d} ST{i} Fronta {i}", "cijena_eur_po_m2": round(rnd.uniform(15, 60), 2)}
+              for i in range(10)]
+    ftraks = [{"sifra": f"FT{i:03d}", "naziv": f"Fronta ABS 22×1 Dekor {i}", "cijena_eur_po_m": round(rnd.uniform(0.3, 1.5), 2)}
+              for i in range(5)]
+    usluge = [{"sifra": "REZ-001", "naziv": "Rezanje ploča (€/m)", "cijena_eur_po_m": 0.45},
+              {"sifra": "KANT-001", "naziv": "Kantiranje (€/m)", "cijena_eur_po_m": 0.6}]
+    arts = []
+    for i in range(n_articles):
+        key = ("art_nr", "Art. Nr.", "ART-NR", "sifra")[i % 4]   # razne varijante kao u stvarnim katalozima
+        arts.append({key: f" A{i:06d} ", "naziv": f"Artikl {i}", "dobavljac": ("Blum", "Hettich", "Häfele")[i % 3],
+                     "jedinica": " kom ", "cijena_eur": round(rnd.uniform(0.5, 120), 2)})
+    half = n_articles // 2
+    dod = [{"sifra": f"DD-{i:03d}", "naziv": f"Dodatak {i}", "jedinica": "kom", "cijena_eur": 5.0 + i,
+            "vrsta": ("po kom", "po m", "po m2")[i % 3]} for i in range(20)]
+    return {"materijali": mats, "abs_trake": traks, "materijali_fronta": fronts, "abs_trake_fronta": ftraks,
+            "usluge": usluge, "okovi": arts[:half], "oprema": arts[half:], "dodatci": dod}
+
+
+def synthetic_specs(n_cabinets, idx, seed=0):
+    """``n_cabinets`` razriješenih specova (kuhinja/ormar: razne dimenzije, fronte, hauptovi)."""
+    rnd = random.Random(seed)
+    mats, traks = sorted(idx["MATS"]), sorted(idx["TRAK"])
+    fronts, ftraks = sorted(idx["FRONTS"]), sorted(idx["FTRAK"])
+    specs = []
+    for _ in range(n_cabinets):
+        specs.append(resolve_spec({
+            "W": rnd.choice((300, 400, 450, 500, 600, 800, 900, 1000)),
+            "H": rnd.choice((360, 720, 720, 900, 2100, 2400)),
+            "D": rnd.choice((320, 350, 560, 580)),
+            "n_police": rnd.randint(0, 5),
+            "include_fronta": rnd.random() < 0.7,
+            "fronta_tip": rnd.choice(("Jednokrilna", "Dvokrilna")),
+            "include_kapa_povez": rnd.random() < 0.3,
+            "include_haupt_hor": rnd.random() < 0.2,
+            "include_haupt_ver": rnd.random() < 0.2,
+            "default_mat": rnd.choice(mats), "default_traka": rnd.choice(traks),
+            "default_mat_fr": rnd.choice(fronts), "default_traka_fr": rnd.choice(ftraks),
+        }, idx))
+    return specs
+
+
+# =============== Mjerenje ===============
+def measure(fn, setup=None, repeat=5, max_seconds=10.0):
+    """Pokreni ``fn(*setup())`` do ``repeat`` puta (barem 2, stani nakon ``max_seconds``); vrati sekunde."""
+    times = []
+    fn(*(setup() if setup else ()))   # zagrijavanje (importi, cachevi)
+    t_total = 0.0
+    while len(times) < repeat:
+        args = setup() if setup else ()
+        t0 = time.perf_counter()
+        fn(*args)
+        dt = time.perf_counter() - t0
+        times.append(dt); t_total += dt
+        if len(times) >= 2 and t_total > max_seconds:
+            break
+    return {"min": min(times), "median": statistics.median(times), "runs": len(times)}
+
+
+def _project(n, idx):
+    specs = synthetic_specs(n, idx, seed=n)
+    rows_per = [derive_rows(*[s[k] for k in DERIVE_KEYS]) for s in specs]
+    return specs, rows_per
+
+
+def cases(profile):
+    """Generator (ime, fn, setup) za zadani profil; setup se ne mjeri."""
+    p = PROFILES[profile]
+    for n in p["articles"]:
+        raw = synthetic_cjenik(n)
+        yield f"normalize_cjenik/{n}art", normalize_cjenik, (lambda raw=raw: (dict(raw),))
+
+    cje = normalize_cjenik(synthetic_cjenik(100))
+    idx = index_cjenik(cje)
+    args = (idx["MATS"], idx["TRAK"], idx["FRONTS"], idx["FTRAK"], idx["USLG"])
+    from .microbatch import BatchPricer
+    pricer = BatchPricer(cje, idx)
+    for n in p["cabinets"]:
+        specs, rows_per = _project(n, idx)
+
+        def derive_all(specs=specs):
+            for s in specs:
+                derive_rows(*[s[k] for k in DERIVE_KEYS])
+
+        def calculate_all(specs=specs, rows_per=rows_per):
+            for s, rows in zip(specs, rows_per):
+                calculate(rows, s["rez_usl"], s["kant_usl"], *args)
+
+        def quote_all(specs=specs):
+            for s in specs:
+                quote(s, cje, idx=idx)
+
+        yield f"derive_rows/{n}korp", derive_all, None
+        yield f"calculate/{n}korp", calculate_all, None
+        # cijela ponuda jedna po jedna vs. stupčani niz (micro-batching)
+        yield f"quote/{n}korp", quote_all, None
+        yield f"quote_batch/{n}korp", (lambda bodies=[{"spec": s} for s in specs]: pricer(bodies)), None
+
+    from .exports import build_exports, build_full_pdf, build_xlsx_kantiranje
+    for n in p["export"]:
+        specs, rows_per = _project(n, idx)
+        rows = [r for rs in rows_per for r in rs]
+        report, metrics = calculate(rows, specs[0]["rez_usl"], specs[0]["kant_usl"], *args)
+        okov = [{"kategorija": "OKOV", "art_nr": k, "naziv": v["naziv"], "dobavljac": v.get("dobavljac", ""),
+                 "jedinica": v.get("jedinica", ""), "cijena_eur": v["cijena_eur"], "kolicina": 2,
+                 "iznos": 2 * v["cijena_eur"]} for k, v in list(idx["OKOV"].items())[:10]]
+        for engine in ("openpyxl", "xlsxwriter"):
+            if importlib.util.find_spec(engine) is None:
+                continue
+            yield (f"build_xlsx_{engine}/{n}korp",
+                   lambda engine=engine, report=report, rows=rows, okov=okov:
+                       build_xlsx_kantiranje(report, rows, okov, [], [], engine=engine, stream=False), None)
+            yield (f"build_xlsx_stream_{engine}/{n}korp",
+                   lambda engine=engine, report=report, rows=rows, okov=okov:
+                       build_xlsx_kantiranje(report, rows, okov, [], [], engine=engine, stream=True), None)
+        if importlib.util.find_spec("reportlab") is not None:
+            s = specs[0]
+            yield (f"build_full_pdf/{n}korp",
+                   lambda report=report, metrics=metrics, s=s: build_full_pdf(
+                       report, metrics, 1000.0, 100.0, 50.0, False, 15.0,
+                       s["W"], s["H"], s["D"], s["n_police"], 8.0, 30,
+                       True, True, False, False, True, "Jednokrilna", "Unutarnja (u korpusu)"), None)
+            pdf_args = dict(metrics=metrics, mats_services_total=1000.0, extras_total=100.0, labor_total=50.0,
+                            use_markup=False, markup_pct=15.0, W=s["W"], H=s["H"], D=s["D"], n_police=s["n_police"],
+                            waste_pct=8.0, rok_dani=30, include_back=True, pod_vrsta_vanjski=True,
+                            kapa_vrsta_vanjska=False, include_kapa_povez=False, include_fronta=True,
+                            fronta_tip="Jednokrilna", fronta_montaza="Unutarnja (u korpusu)")
+            # CSV + XLSX + PDF istodobno (+ ZIP); usporedi sa zbrojem pojedinačnih slučajeva
+            yield (f"build_exports/{n}korp",
+                   lambda report=report, rows=rows, okov=okov, pdf_args=pdf_args: build_exports(
+                       report, rows, okov, [], [], pdf_args=pdf_args, bundle=True), None)
+
+
+def run(profile="quick", repeat=5, pattern="", max_seconds=10.0, out=sys.stderr, names=None):
+    results = {}
+    for name, fn, setup in cases(profile):
+        if (pattern and pattern not in name) or (names is not None and name not in names):
+            continue
+        r = measure(fn, setup, repeat=repeat, max_seconds=max_seconds)
+        results[name] = r
+        print(f"{name:<36} med {r['median'] * 1000:10.2f} ms   min {r['min'] * 1000:10.2f} ms   ({r['runs']}×)",
+              file=out, flush=True)
+    return results
+
+
+def machine_info():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Usporedba najboljih vremena (min) s baselineom: lista (ime, baseline_s, sada_s, omjer, status)."""
+    rows = []
+    for name, r in results.items():
+        b = baseline.get("results", {}).get(name)
+        if not b:
+            rows.append((name, None, r["min"], None, "novo"))
+            continue
+        ratio = r["min"] / b["min"] if b["min"] else float("inf")
+        if abs(r["min"] - b["min"]) < NOISE_FLOOR_S:
+            status = "ok"
+        else:
+            status = "REGRESIJA" if ratio > threshold else ("brže" if ratio < 1 / threshold else "ok")
+        rows.append((name, b["min"], r["min"], ratio, status))
+    return rows
+
+
+def recheck(results, baseline, profile, threshold=DEFAULT_THRESHOLD, max_seconds=10.0):
+    """Slučajeve sa statusom REGRESIJA mjeri ponovno u ``RECHECK_ROUNDS`` navrata (s pauzom) i spaja min.
+
+    Sporija razdoblja stroja traju i po nekoliko sekundi pa jedno ponovno
+    mjerenje odmah nakon prvog može upasti u isto; stvarna regresija ostaje
+    sporija u svim navratima.
+    """
+    results = dict(results)
+    for _ in range(RECHECK_ROUNDS):
+        suspect = {name for name, *_, status in compare(results, baseline, threshold) if status == "REGRESIJA"}
+        if not suspect:
+            break
+        time.sleep(RECHECK_PAUSE_S)
+        print(f"\nPonovno mjerenje sporijih slučajeva ({len(suspect)}):", file=sys.stderr)
+        for name, r in run(profile, RECHECK_REPEAT, max_seconds=max_seconds, names=suspect).items():
+            prev = results[name]
+            results[name] = {"min": min(r["min"], prev["min"]), "median": r["median"], "runs": r["runs"] + prev["runs"]}
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.bench", description="Benchmarki izračuna i izvoza.")
+    ap.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-seconds", type=float, default=10.0, help="gornja granica vremena po slučaju")
+    ap.add_argument("-k", dest="pattern", default="", help="samo slučajevi čije ime sadrži ovaj tekst")
+    ap.add_argument("--json", help="spremi rezultate u JSON")
+    ap.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, help="spremi kao baseline")
+    ap.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, help="usporedi s baselineom")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = ap.parse_args(argv)
+
+    results = run(args.profile, args.repeat, args.pattern, args.max_seconds)
+    doc = {"created": datetime.datetime.now().isoformat(timespec="seconds"), "profile": args.profile,
+           "machine": machine_info(), "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"Baseline spremljen: {args.save_baseline}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != doc["machine"]:
+            print("Upozorenje: baseline je s drugog računala/Pythona – usporedba je okvirna.", file=sys.stderr)
+        results = recheck(results, baseline, args.profile, args.threshold, args.max_seconds)
+        rows = compare(results, baseline, args.threshold)
+        print(f"\n{'slučaj':<36} {'baseline':>12} {'sada':>12} {'omjer':>7}  status")
+        for name, b, now, ratio, status in rows:
+            b_s = f"{b * 1000:.2f} ms" if b is not None else "-"
+            r_s = f"{ratio:.2f}" if ratio is not None else "-"
+            print(f"{name:<36} {b_s:>12} {now * 1000:9.2f} ms {r_s:>7}  {status}")
+        if any(r[4] == "REGRESIJA" for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
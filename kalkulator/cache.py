@@ -0,0 +1,90 @@
+"""Ograničeni LRU cache rezultata izračuna i stabilni hash ulaza."""
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+def _norm(x):
+    """Normaliziraj vrijednost za hash: 800.0 == 800, NaN → None, numpy skalari → Python."""
+    if hasattr(x, "item") and not isinstance(x, (list, tuple, dict, str, bytes)):
+        try:
+            x = x.item()
+        except Exception:
+            pass
+    if isinstance(x, bool) or x is None or isinstance(x, str):
+        return x
+    if isinstance(x, float):
+        if math.isnan(x):
+            return None
+        return int(x) if x.is_integer() else x
+    if isinstance(x, Mapping):
+        return {str(k): _norm(v) for k, v in x.items()}
+    if isinstance(x, (list, tuple)):
+        return [_norm(v) for v in x]
+    return x
+
+
+def stable_hash(obj) -> str:
+    """Hash neovisan o redoslijedu ključeva i procesu (za razliku od ``hash()``)."""
+    payload = json.dumps(_norm(obj), sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def pricebook_version(cje: dict) -> str:
+    """Verzija cjenika = hash njegovog normaliziranog sadržaja."""
+    return stable_hash(cje)
+
+
+class LRUCache:
+    """Ograničeni cache s brojačima pogodaka/promašaja.
+
+    Vrijednosti se vraćaju bez kopiranja – pozivatelj ih ne smije mijenjati.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, fn):
+        _missing = object()
+        value = self.get(key, _missing)
+        if value is _missing:
+            value = fn()
+            self.put(key, value)
+        return value
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
@@ -0,0 +1,111 @@
+"""Kompilirani cjenik: svi lookup rječnici, sortirane liste šifri i labele, izgrađeni jednom.
+
+``Catalog`` je nepromjenjiv (MappingProxyType / tuple) pa se može dijeliti
+između sesija i threadova. ``compile_catalog`` ga cachira po verziji cjenika
+(hash sadržaja), tako da se ponovno učitavanje istog cjenika ne gradi ispočetka.
+"""
+from types import MappingProxyType
+
+from .cache import LRUCache, pricebook_version
+from .engine import extract_short
+
+
+def _frozen(d):
+    return MappingProxyType(d)
+
+def _sorted_by_naziv(d):
+    return tuple(sorted(d.keys(), key=lambda k: d[k].get("naziv", "")))
+
+def pick_label(art: str, item: dict) -> str:
+    """Labela u padajućem izborniku OKOV/OPREMA: ART — Naziv (Dobavljač); dobavljač je opcionalan."""
+    naziv = str(item.get("naziv") or "").strip()
+    dob = str(item.get("dobavljac") or "").strip()
+    return f"{art} — {naziv}" + (f" ({dob})" if dob else "")
+
+def _picklist(keys, d):
+    """(opcije s praznom na početku, labela → art_nr) – redoslijed po art_nr."""
+    by_label = {pick_label(k, d[k]): k for k in keys if k}
+    return ("",) + tuple(by_label), _frozen(by_label)
+
+
+class Catalog:
+    """Nepromjenjiv indeks cjenika; ``cat["MATS"]`` radi kao rezultat ``index_cjenik``."""
+
+    __slots__ = (
+        "version",
+        "MATS", "TRAK", "FRONTS", "FTRAK", "USLG", "OKOV", "OPREMA", "DODATCI",
+        "MATS_KEYS", "TRAK_KEYS", "FR_KEYS", "FTRAK_KEYS", "OKOV_KEYS", "OPREMA_KEYS", "DOD_KEYS",
+        "USL_M_KEYS",
+        "ALL_MATS", "ALL_TRAKS", "MAT_LABEL", "MAT_BY_LABEL", "TRAK_LABEL", "TRAK_BY_LABEL",
+        "MAT_LABEL_OPTIONS", "TRAK_LABEL_OPTIONS",
+        "OKOV_PICK", "OKOV_BY_PICK", "OPREMA_PICK", "OPREMA_BY_PICK",
+    )
+
+    def __init__(self, cje: dict, version: str = None):
+        s = lambda name, value: object.__setattr__(self, name, value)
+        s("version", version or pricebook_version(cje))
+
+        mats   = {m["sifra"]: m for m in cje.get("materijali", [])}
+        trak   = {t["sifra"]: t for t in cje.get("abs_trake", [])}
+        fronts = {m["sifra"]: m for m in cje.get("materijali_fronta", [])}
+        ftrak  = {t["sifra"]: t for t in cje.get("abs_trake_fronta", [])}
+        uslg   = {u["sifra"]: u for u in cje.get("usluge", [])}
+        # OKOV/OPREMA: ključimo po Art. Nr.
+        okov   = {o["art_nr"]: o for o in cje.get("okov", []) if o.get("art_nr")}
+        oprema = {o["art_nr"]: o for o in cje.get("oprema", []) if o.get("art_nr")}
+        dod    = {d["sifra"]: d for d in cje.get("dodatci", [])}
+
+        for name, d in [("MATS", mats), ("TRAK", trak), ("FRONTS", fronts), ("FTRAK", ftrak),
+                        ("USLG", uslg), ("OKOV", okov), ("OPREMA", oprema), ("DODATCI", dod)]:
+            s(name, _frozen(d))
+
+        s("MATS_KEYS", _sorted_by_naziv(mats))
+        s("TRAK_KEYS", _sorted_by_naziv(trak))
+        s("FR_KEYS", _sorted_by_naziv(fronts))
+        s("FTRAK_KEYS", _sorted_by_naziv(ftrak))
+        s("OKOV_KEYS", tuple(sorted(okov.keys())))
+        s("OPREMA_KEYS", tuple(sorted(oprema.keys())))
+        s("DOD_KEYS", _sorted_by_naziv(dod))
+        s("USL_M_KEYS", tuple(sorted(k for k, v in uslg.items() if "cijena_eur_po_m" in v)))
+
+        all_mats = {**mats, **fronts}
+        all_traks = {**trak, **ftrak}
+        mat_label = {k: extract_short(v.get("naziv", k)) for k, v in all_mats.items()}
+        trak_label = {k: extract_short(v.get("naziv", k)) for k, v in all_traks.items()}
+        s("ALL_MATS", _frozen(all_mats))
+        s("ALL_TRAKS", _frozen(all_traks))
+        s("MAT_LABEL", _frozen(mat_label))
+        s("MAT_BY_LABEL", _frozen({v: k for k, v in mat_label.items()}))
+        s("TRAK_LABEL", _frozen(trak_label))
+        s("TRAK_BY_LABEL", _frozen({v: k for k, v in trak_label.items()}))
+        s("MAT_LABEL_OPTIONS", tuple(sorted(set(mat_label.values()))))
+        s("TRAK_LABEL_OPTIONS", tuple(sorted(set(trak_label.values()))))
+        # padajući izbornici OKOV/OPREMA (labela ↔ art_nr) – jednom po verziji, ne na svakom rerunu
+        for name, keys, d in (("OKOV", self.OKOV_KEYS, okov), ("OPREMA", self.OPREMA_KEYS, oprema)):
+            options, by_label = _picklist(keys, d)
+            s(f"{name}_PICK", options)
+            s(f"{name}_BY_PICK", by_label)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Catalog je nepromjenjiv")
+
+    def __getitem__(self, name):
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __contains__(self, name):
+        return name in self.__slots__
+
+    def __repr__(self):
+        return (f"Catalog(version={self.version[:12]}, mats={len(self.MATS)}, "
+                f"okov={len(self.OKOV)}, oprema={len(self.OPREMA)})")
+
+
+_COMPILED = LRUCache(maxsize=4)
+
+def compile_catalog(cje: dict, version: str = None) -> Catalog:
+    """Kompilirani katalog za cjenik; isti sadržaj (verzija) → isti objekt."""
+    version = version or pricebook_version(cje)
+    return _COMPILED.get_or_compute(version, lambda: Catalog(cje, version))
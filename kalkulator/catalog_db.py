@@ -0,0 +1,217 @@
+"""Opcionalni SQLite katalog za velike OKOV/OPREMA/DODATCI kataloge (Blum, Hettich, Häfele…).
+
+Artikli su na disku s indeksom po šifri, a aplikacija dohvaća samo ono što
+joj treba (pretraga s limitom, lookup po šifri). Memorija sesije tako ne raste
+s veličinom kataloga.
+
+    python -m kalkulator.catalog_db import cjenik.json --db katalog.sqlite
+    python -m kalkulator.catalog_db import-csv okov blum.csv --db katalog.sqlite
+"""
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+import threading
+from collections.abc import Mapping
+
+from .cjenik import CSV_SCHEMA_ART, CSV_SCHEMA_DOD, from_csv_rows, is_placeholder, normalize_cjenik
+
+# grupa -> ključ šifre u zapisima cjenika
+GROUPS = {"okov": "art_nr", "oprema": "art_nr", "dodatci": "sifra"}
+_COLS = ("naziv", "dobavljac", "jedinica", "cijena_eur", "vrsta")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS artikli (
+    grupa      TEXT NOT NULL,
+    sifra      TEXT NOT NULL,
+    naziv      TEXT NOT NULL DEFAULT '',
+    dobavljac  TEXT NOT NULL DEFAULT '',
+    jedinica   TEXT NOT NULL DEFAULT '',
+    cijena_eur REAL NOT NULL DEFAULT 0,
+    vrsta      TEXT NOT NULL DEFAULT '',
+    extra      TEXT,
+    PRIMARY KEY (grupa, sifra)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_artikli_naziv ON artikli (grupa, naziv);
+"""
+
+
+def _to_price(x):
+    try:
+        return float(str(x).replace(",", ".")) if x not in (None, "") else 0.0
+    except ValueError:
+        return 0.0
+
+
+class CatalogDB:
+    """SQLite katalog artikala; jedna konekcija po threadu (Streamlit sesije su threadovi)."""
+
+    def __init__(self, path="katalog.sqlite"):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as con:
+            con.executescript(_SCHEMA)
+
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    def close(self):
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+    # --- uvoz ---
+    def import_items(self, grupa, items, replace=False):
+        """Bulk uvoz zapisa (dictova iz cjenika); ``replace`` briše postojeću grupu. Vraća broj redaka."""
+        key = GROUPS[grupa]
+        def gen():
+            for x in items:
+                sifra = str(x.get(key) or "").strip()
+                if not sifra:
+                    continue
+                extra = {k: v for k, v in x.items() if k not in _COLS and k != key}
+                yield (grupa, sifra, str(x.get("naziv") or "").strip(), str(x.get("dobavljac") or "").strip(),
+                       str(x.get("jedinica") or "").strip(), _to_price(x.get("cijena_eur")),
+                       str(x.get("vrsta") or "").strip(), json.dumps(extra, ensure_ascii=False) if extra else None)
+        con = self._conn()
+        with con:
+            if replace:
+                con.execute("DELETE FROM artikli WHERE grupa = ?", (grupa,))
+            cur = con.executemany("INSERT OR REPLACE INTO artikli VALUES (?,?,?,?,?,?,?,?)", gen())
+        return cur.rowcount
+
+    def import_cjenik(self, cje, replace=True):
+        """Uvezi OKOV/OPREMA/DODATCI iz sirovog JSON cjenika; vraća {grupa: broj}.
+
+        Placeholderi iz ``normalize_cjenik`` se ne uvoze, a grupe bez stvarnih
+        artikala se preskaču – i kad je ``cje`` već normaliziran, prazna grupa
+        ne briše postojeći katalog.
+        """
+        cje = normalize_cjenik(dict(cje))
+        items = {g: [x for x in cje.get(g) or [] if not is_placeholder(g, x)] for g in GROUPS}
+        return {g: self.import_items(g, items[g], replace=replace) for g in GROUPS if items[g]}
+
+    # --- upiti ---
+    def _item(self, grupa, row):
+        if row is None:
+            return None
+        item = {GROUPS[grupa]: row["sifra"], "naziv": row["naziv"], "dobavljac": row["dobavljac"],
+                "jedinica": row["jedinica"], "cijena_eur": row["cijena_eur"]}
+        if row["vrsta"]:
+            item["vrsta"] = row["vrsta"]
+        if row["extra"]:
+            item.update(json.loads(row["extra"]))
+        return item
+
+    def get(self, grupa, sifra):
+        row = self._conn().execute(
+            "SELECT * FROM artikli WHERE grupa = ? AND sifra = ?", (grupa, sifra)).fetchone()
+        return self._item(grupa, row)
+
+    def get_many(self, grupa, sifre):
+        sifre = list(dict.fromkeys(s for s in sifre if s))
+        out = {}
+        for i in range(0, len(sifre), 500):
+            part = sifre[i:i + 500]
+            q = f"SELECT * FROM artikli WHERE grupa = ? AND sifra IN ({','.join('?' * len(part))})"
+            for row in self._conn().execute(q, (grupa, *part)):
+                out[row["sifra"]] = self._item(grupa, row)
+        return out
+
+    def search(self, grupa, text="", limit=50):
+        """Artikli čija šifra, naziv ili dobavljač sadrži ``text`` (bez obzira na velika slova)."""
+        text = (text or "").strip()
+        if not text:
+            rows = self._conn().execute(
+                "SELECT * FROM artikli WHERE grupa = ? ORDER BY sifra LIMIT ?", (grupa, limit))
+        else:
+            like = f"%{text}%"
+            rows = self._conn().execute(
+                "SELECT * FROM artikli WHERE grupa = ? AND (sifra LIKE ? OR naziv LIKE ? OR dobavljac LIKE ?) "
+                "ORDER BY sifra LIMIT ?", (grupa, like, like, like, limit))
+        return [self._item(grupa, r) for r in rows]
+
+    def count(self, grupa):
+        return self._conn().execute("SELECT COUNT(*) FROM artikli WHERE grupa = ?", (grupa,)).fetchone()[0]
+
+    def group(self, grupa):
+        return DBGroup(self, grupa)
+
+
+class DBGroup(Mapping):
+    """Lijeni pogled na jednu grupu kao ``{sifra: zapis}`` – upit po pristupu, bez učitavanja svega."""
+
+    def __init__(self, db, grupa):
+        self.db = db
+        self.grupa = grupa
+
+    def __getitem__(self, sifra):
+        item = self.db.get(self.grupa, sifra)
+        if item is None:
+            raise KeyError(sifra)
+        return item
+
+    def get(self, sifra, default=None):
+        item = self.db.get(self.grupa, sifra)
+        return default if item is None else item
+
+    def __iter__(self):
+        for (sifra,) in self.db._conn().execute(
+                "SELECT sifra FROM artikli WHERE grupa = ? ORDER BY sifra", (self.grupa,)):
+            yield sifra
+
+    def __len__(self):
+        return self.db.count(self.grupa)
+
+    def search(self, text="", limit=50):
+        return self.db.search(self.grupa, text, limit)
+
+
+def read_csv_items(path, grupa):
+    """CSV (isti stupci kao za CSV URL-ove) → zapisi cjenika, bez pandasa."""
+    schema = CSV_SCHEMA_DOD if grupa == "dodatci" else CSV_SCHEMA_ART
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        sample = f.read(4096); f.seek(0)
+        delim = ";" if sample.count(";") > sample.count(",") else ","
+        return from_csv_rows(csv.DictReader(f, delimiter=delim), schema)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.catalog_db", description="SQLite katalog OKOV/OPREMA/DODATCI.")
+    ap.add_argument("--db", default="katalog.sqlite")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_json = sub.add_parser("import", help="uvoz iz JSON cjenika")
+    p_json.add_argument("path")
+    p_csv = sub.add_parser("import-csv", help="uvoz jedne grupe iz CSV-a")
+    p_csv.add_argument("grupa", choices=sorted(GROUPS))
+    p_csv.add_argument("path")
+    p_csv.add_argument("--append", action="store_true", help="ne briši postojeće artikle grupe")
+    p_find = sub.add_parser("search", help="pretraga")
+    p_find.add_argument("grupa", choices=sorted(GROUPS))
+    p_find.add_argument("text", nargs="?", default="")
+    args = ap.parse_args(argv)
+
+    db = CatalogDB(args.db)
+    if args.cmd == "import":
+        with open(args.path, "r", encoding="utf-8") as f:
+            counts = db.import_cjenik(json.load(f))
+        print(", ".join(f"{g}: {n}" for g, n in counts.items()))
+    elif args.cmd == "import-csv":
+        n = db.import_items(args.grupa, read_csv_items(args.path, args.grupa), replace=not args.append)
+        print(f"{args.grupa}: {n}")
+    else:
+        for item in db.search(args.grupa, args.text):
+            print(json.dumps(item, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""Učitavanje i normalizacija cjenika (bez UI ovisnosti)."""
+import json
+
+
+# Zapisi koje normalize_cjenik upiše u praznu grupu (da izbornici nisu prazni)
+PLACEHOLDERS = {
+    "okov": {"art_nr": "OK-1001", "naziv": "Pant (par) – placeholder",
+             "dobavljac": "Blum", "jedinica": "par", "cijena_eur": 6.20},
+    "oprema": {"art_nr": "OP-2001", "naziv": "Ručkica 160mm – placeholder",
+               "dobavljac": "Hettich", "jedinica": "kom", "cijena_eur": 3.20},
+    "dodatci": {"sifra": "DD-001", "naziv": "Dodatni element – placeholder",
+                "jedinica": "po kom", "cijena_eur": 10.00, "vrsta": "po kom"},
+}
+
+
+def is_placeholder(grupa, item) -> bool:
+    """True za placeholder zapis grupe (ista šifra i naziv kao u ``PLACEHOLDERS``)."""
+    ph = PLACEHOLDERS.get(grupa)
+    key = "sifra" if grupa == "dodatci" else "art_nr"
+    return bool(ph) and isinstance(item, dict) and item.get(key) == ph[key] and item.get("naziv") == ph["naziv"]
+
+
+def normalize_cjenik(data: dict):
+    """Uskladi sve ključeve i normaliziraj OKOV/OPREMA liste (razne varijante 'art_nr')."""
+    data = data or {}
+
+    # Osnovne grupe
+    for key, default in [
+        ("materijali", []), ("abs_trake", []),
+        ("materijali_fronta", []), ("abs_trake_fronta", []),
+        ("usluge", []),
+        ("okov", []), ("oprema", []), ("dodatci", []),
+    ]:
+        data.setdefault(key, default)
+
+    # Aliasi (korisnici često napišu množinu ili krivo)
+    if not data.get("okov") and data.get("okovi"):
+        data["okov"] = data.get("okovi") or []
+    if not data.get("oprema") and data.get("opreme"):
+        data["oprema"] = data.get("opreme") or []
+
+    # Helper: normaliziraj ključeve jednog retka u katalogu (OKOV/OPREMA)
+    def norm_item_keys(x: dict):
+        if not isinstance(x, dict):
+            return {}
+        out = {}
+        for k, v in x.items():
+            k_norm = str(k).strip().lower().replace(" ", "_").replace("-", "_").replace(".", "")
+            # mapiranja za art_nr
+            if k_norm in ("art_nr", "artnr", "art__nr", "artnr_", "art_nr_", "artnr__"):
+                k_norm = "art_nr"
+            if k_norm in ("art", "sifra_artikla", "artikl", "sifra"):  # minimalistički aliasi
+                # Samo mapiraj u art_nr ako izgleda kao šifra artikla (string bez razmaka)
+                if isinstance(v, str) and v.strip():
+                    k_norm = "art_nr"
+            out[k_norm] = v
+        # standardiziraj tipove/praznine
+        if "art_nr" in out and isinstance(out["art_nr"], str):
+            out["art_nr"] = out["art_nr"].strip()
+        if "jedinica" in out and isinstance(out["jedinica"], str):
+            out["jedinica"] = out["jedinica"].strip()
+        return out
+
+    # Normaliziraj OKOV/OPREMA zapise (ključeve i whitespace)
+    data["okov"] = [norm_item_keys(x) for x in (data.get("okov") or [])]
+    data["oprema"] = [norm_item_keys(x) for x in (data.get("oprema") or [])]
+
+    # Ako i dalje nema art_nr, pokušaj iz "art" ili "sifra"
+    def ensure_art_nr(lst):
+        fixed = []
+        for x in lst:
+            if not x.get("art_nr"):
+                # fallback iz nekoliko mogućih polja
+                for alt in ("art", "sifra_artikla", "artikl", "sifra"):
+                    val = x.get(alt)
+                    if isinstance(val, str) and val.strip():
+                        x["art_nr"] = val.strip()
+                        break
+            fixed.append(x)
+        return fixed
+
+    data["okov"] = ensure_art_nr(data["okov"])
+    data["oprema"] = ensure_art_nr(data["oprema"])
+
+    # Placeholderi ako je sve prazno
+    if not data["okov"]:
+        data["okov"] = [dict(PLACEHOLDERS["okov"])]
+    if not data["oprema"]:
+        data["oprema"] = [dict(PLACEHOLDERS["oprema"])]
+    if not data.get("dodatci"):
+        data["dodatci"] = [dict(PLACEHOLDERS["dodatci"])]
+
+    return data
+
+
+def load_cjenik(path="cjenik.json"):
+    """Pročitaj i normaliziraj cjenik iz JSON datoteke."""
+    with open(path, "r", encoding="utf-8") as f:
+        return normalize_cjenik(json.load(f))
+
+
+def from_csv_rows(rows, schema):
+    out = []
+    for r in rows:
+        item = {}
+        for k, conv in schema.items():
+            val = r.get(k, "")
+            if conv:
+                try:
+                    val = conv(val)
+                except Exception:
+                    val = conv("0")
+            item[k] = val
+        out.append(item)
+    return out
+
+
+def to_float(x):
+    """Decimalni zarez ili točka → float (za CSV cjenike)."""
+    return float(str(x).replace(",", "."))
+
+
+# Sheme stupaca za CSV cjenike (ključ -> konverter)
+CSV_SCHEMA_MAT   = {"sifra":str, "naziv":str, "cijena_eur_po_m2": to_float}
+CSV_SCHEMA_TRAKA = {"sifra":str, "naziv":str, "cijena_eur_po_m":  to_float}
+CSV_SCHEMA_USL   = {"sifra":str, "naziv":str, "cijena_eur_po_m":  to_float}
+CSV_SCHEMA_ART   = {"art_nr":str, "naziv":str, "dobavljac":str, "jedinica":str, "cijena_eur": to_float}
+CSV_SCHEMA_DOD   = {"sifra":str, "naziv":str, "jedinica":str, "cijena_eur": to_float, "vrsta":str}
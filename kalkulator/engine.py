@@ -0,0 +1,350 @@
+"""Izračun korpusa: elementi, troškovi i zbrojevi – čiste funkcije bez Streamlita.
+
+Ulaz je specifikacija korpusa (dict) i normalizirani cjenik (vidi ``normalize_cjenik``),
+izlaz su retci elemenata, metrike i zbrojevi. Streamlit aplikacija samo prikazuje rezultate.
+"""
+from functools import lru_cache
+
+from .kant import edge_rule_code, kant_mm, rule_counts
+from .parts import Part, PartCost
+
+
+# =============== Helpers ===============
+def mm2_to_m2(mm2: float) -> float: return mm2 / 1_000_000.0
+def mm_to_m(mm: float) -> float: return mm / 1000.0
+
+def extract_short(label: str) -> str:
+    if not label: return ""
+    tokens = [t for t in label.replace(",", " ").split() if any(ch.isalnum() for ch in t)]
+    return " ".join(tokens[:2]) if tokens else label
+
+# --- kratke oznake elemenata ---
+@lru_cache(maxsize=4096)
+def short_code_for(naziv: str) -> str:
+    nz = (naziv or "").strip().lower()
+    if nz.startswith("stranica"): return "Str"
+    if nz.startswith("pod"): return "Pd"
+    if nz.startswith("kapa_povez"): return "Pov"
+    if nz.startswith("kapa"): return "Kp"
+    if nz.startswith("polica"): return "Pol"
+    if "leđa" in nz or "ledja" in nz: return "Ld"
+    if nz.startswith("fronta"): return "Fr"
+    if "haupt" in nz and "horizontalni" in nz: return "HptHor"
+    if "haupt" in nz and "vertikalni" in nz: return "HptVer"
+    return ""
+
+# === helper za usklađen prikaz kantiranja (UI) s auto-pravilima ===
+def auto_kant_counts(naziv: str, auto: bool, A: float, B: float, fallback_dugi: int, fallback_kratki: int):
+    return rule_counts(edge_rule_code(naziv, auto), A, B, fallback_dugi, fallback_kratki)
+
+
+# =============== Dicts (pricebook) ===============
+def index_cjenik(cje: dict) -> dict:
+    """Lookup rječnici cjenika (MATS, TRAK, FRONTS, FTRAK, USLG, OKOV, OPREMA, DODATCI)."""
+    return {
+        "MATS":    {m["sifra"]: m for m in cje.get("materijali", [])},
+        "TRAK":    {t["sifra"]: t for t in cje.get("abs_trake", [])},
+        "FRONTS":  {m["sifra"]: m for m in cje.get("materijali_fronta", [])},
+        "FTRAK":   {t["sifra"]: t for t in cje.get("abs_trake_fronta", [])},
+        "USLG":    {u["sifra"]: u for u in cje.get("usluge", [])},
+        # OKOV/OPREMA: ključimo po Art. Nr.
+        "OKOV":    {o["art_nr"]: o for o in cje.get("okov", []) if o.get("art_nr")},
+        "OPREMA":  {o["art_nr"]: o for o in cje.get("oprema", []) if o.get("art_nr")},
+        "DODATCI": {d["sifra"]: d for d in cje.get("dodatci", [])},
+    }
+
+
+# =============== Calculation functions ===============
+def derive_rows(W,H,D,t,n_police, include_back, default_mat, default_traka, pod_vrsta_vanjski, kapa_vrsta_vanjska,
+                include_kapa_povez, kapa_povez_mode, kapa_povez_sirina_mm, kapa_povez_posto,
+                include_fronta, fronta_tip, fronta_montaza, razmak_hor, razmak_ver, razmak_srednji,
+                preklop_hor, preklop_ver, default_mat_fr, default_traka_fr,
+                include_haupt_hor, include_haupt_ver, haupt_sirina_mm):
+    inner_w = max(W - 2*t, 0)
+    side_h = max(H - (t if pod_vrsta_vanjski else 0) - (t if kapa_vrsta_vanjska else 0), 1)
+
+    rows = []
+    rows.append(Part(naziv="Stranica", mat=default_mat, traka=default_traka,
+                     A_mm=side_h, B_mm=D, kom=2, kant_dugi=1, kant_kratki=1, auto=True))
+
+    # Ako koristimo Kapa_povez, preskačemo klasičnu "Kapu"
+    if not include_kapa_povez:
+        kapa_w = W if kapa_vrsta_vanjska else inner_w
+        rows.append(Part(naziv="Kapa", mat=default_mat, traka=default_traka,
+                         A_mm=kapa_w, B_mm=D, kom=1, kant_dugi=1, kant_kratki=2, auto=True))  # pravilo kao Pod
+
+    pod_w = W if pod_vrsta_vanjski else inner_w
+    rows.append(Part(naziv="Pod", mat=default_mat, traka=default_traka,
+                     A_mm=pod_w, B_mm=D, kom=1, kant_dugi=1, kant_kratki=2, auto=True))
+
+    if n_police > 0:
+        pol_w = max(inner_w - 2, 1); pol_d = max(D - 10, 1)
+        rows.append(Part(naziv="Polica", mat=default_mat, traka=default_traka,
+                         A_mm=pol_w, B_mm=pol_d, kom=int(n_police),
+                         kant_dugi=2, kant_kratki=2, auto=True))
+
+    if include_kapa_povez:
+        width = int(round(D * (kapa_povez_posto / 100.0))) if kapa_povez_mode == "% dubine" else int(kapa_povez_sirina_mm)
+        width = max(1, min(width, int(D)))
+        rows.append(Part(naziv="Kapa_povez", mat=default_mat, traka=default_traka,
+                         A_mm=inner_w, B_mm=width, kom=2, kant_dugi=2, kant_kratki=0, auto=False))
+
+    if include_back:
+        rows.append(Part(naziv="Leđa (HDF)", mat="HDF-001", traka=default_traka,
+                         A_mm=max(W-2,1), B_mm=max(H-2,1), kom=1,
+                         kant_dugi=0, kant_kratki=0, auto=False))
+
+    # FRONT
+    if include_fronta:
+        if fronta_montaza.startswith("Unutarnja"):
+            target_w = max(inner_w - razmak_hor, 1); target_h = max(H - razmak_ver, 1)
+            ukupna_sirina = max(inner_w - razmak_hor, 1)
+        else:
+            target_w = W + preklop_hor; target_h = H + preklop_ver
+            ukupna_sirina = W + preklop_hor
+        if fronta_tip == "Jednokrilna":
+            rows.append(Part(naziv="Fronta", mat=default_mat_fr, traka=default_traka_fr,
+                             A_mm=target_h, B_mm=target_w, kom=1,
+                             kant_dugi=2, kant_kratki=2, auto=True))
+        else:
+            left_w = max((ukupna_sirina - razmak_srednji)/2.0, 1)
+            for side in ("L","D"):
+                rows.append(Part(naziv=f"Fronta {side}", mat=default_mat_fr, traka=default_traka_fr,
+                                 A_mm=target_h, B_mm=int(round(left_w)), kom=1,
+                             kant_dugi=2, kant_kratki=2, auto=True))
+
+    # HAUPT — dimenzije i dodavanje (B = D - 10)
+    haupt_depth = max(D - 10, 1)
+
+    if include_haupt_hor:
+        rows.append(Part(naziv="Haupt Horizontalni", mat=default_mat, traka=default_traka,
+                         A_mm=max(inner_w,1), B_mm=haupt_depth,
+                         kom=1, kant_dugi=1, kant_kratki=2, auto=True))
+
+    if include_haupt_ver:
+        hpt_ver_len = max(side_h, 1)  # unutarnja visina
+        rows.append(Part(naziv="Haupt Vertikalni", mat=default_mat, traka=default_traka,
+                         A_mm=int(hpt_ver_len), B_mm=haupt_depth,
+                         kom=1, kant_dugi=1, kant_kratki=1, auto=True))
+
+    return rows
+
+def calculate(report_rows, rez_usl, kant_usl, MATS, TRAK, FRONTS, FTRAK, USLG):
+    rez_cij_m = USLG[rez_usl]["cijena_eur_po_m"]
+    kant_usl_cij_m = USLG[kant_usl]["cijena_eur_po_m"]
+
+    total_area_m2 = total_rezanje_m = total_kant_m = 0.0
+    cijena_mat_eur = cijena_kant_traka_eur = cijena_kant_usl_eur = cijena_rez_eur = 0.0
+    iveral_area_m2 = iveral_eur = 0.0
+    hdf_area_m2 = hdf_eur = 0.0
+
+    def rezanje_rule(A, B):
+        return mm_to_m(max(A, B) + min(A, B))
+
+    report = []
+    for r in report_rows:
+        A = float(r["A_mm"]); B = float(r["B_mm"]); k = int(r["kom"])
+        rez_m_tot = rezanje_rule(A, B) * k
+        auto = bool(r.get("auto", False))
+
+        # --- KANTIRANJE (auto pravila iz tablice u kant.py, kod po nazivu je cachiran) ---
+        code = edge_rule_code(r["naziv"], auto)
+        kant_mm_kom = kant_mm(code, A, B, r.get("kant_dugi", 0), r.get("kant_kratki", 0))
+
+        kant_m_tot = mm_to_m(kant_mm_kom) * k
+        area_m2_tot = mm2_to_m2(A * B) * k
+
+        # --- LABELI: kratke šifre iz naziva ---
+        mat_obj = MATS.get(r["mat"]) or FRONTS.get(r["mat"]) or {}
+        traka_obj = TRAK.get(r["traka"]) or FTRAK.get(r["traka"]) or {}
+
+        mat_label = extract_short(mat_obj.get("naziv", str(r["mat"])))
+        traka_label = extract_short(traka_obj.get("naziv", str(r["traka"])))
+
+        mat_price = (mat_obj.get("cijena_eur_po_m2") or 0.0)
+        traka_price = (traka_obj.get("cijena_eur_po_m") or 0.0)
+
+        mat_cij = mat_price * area_m2_tot
+        traka_cij = traka_price * kant_m_tot
+        rez_cij = rez_cij_m * rez_m_tot
+        kant_usl_e = kant_usl_cij_m * kant_m_tot
+
+        if r["mat"] == "HDF-001":
+            hdf_area_m2 += area_m2_tot; hdf_eur += mat_cij
+        else:
+            iveral_area_m2 += area_m2_tot; iveral_eur += mat_cij
+
+        total_area_m2 += area_m2_tot
+        total_rezanje_m += rez_m_tot
+        total_kant_m += kant_m_tot
+        cijena_mat_eur += mat_cij
+        cijena_kant_traka_eur += traka_cij
+        cijena_kant_usl_eur += kant_usl_e
+        cijena_rez_eur += rez_cij
+
+        report.append(PartCost(
+            r["naziv"], short_code_for(r["naziv"]), mat_label, traka_label, int(A), int(B), k,
+            round(kant_m_tot, 3), round(rez_m_tot, 3), round(area_m2_tot, 3),
+            round(mat_cij, 2), round(traka_cij, 2), round(kant_usl_e, 2), round(rez_cij, 2),
+            round(mat_cij + traka_cij + rez_cij + kant_usl_e, 2),
+        ))
+
+    metrics = dict(
+        total_area_m2=total_area_m2,
+        total_rezanje_m=total_rezanje_m,
+        total_kant_m=total_kant_m,
+        cijena_mat_eur=cijena_mat_eur,
+        cijena_kant_traka_eur=cijena_kant_traka_eur,
+        cijena_kant_usl_eur=cijena_kant_usl_eur,
+        cijena_rez_eur=cijena_rez_eur,
+        iveral_area_m2=iveral_area_m2,
+        iveral_eur=iveral_eur,
+        hdf_area_m2=hdf_area_m2,
+        hdf_eur=hdf_eur,
+    )
+    return report, metrics
+
+def materials_services_summary(metrics, use_waste, waste_pct, nest_waste_eur=None):
+    # nest_waste_eur: stvarni otpad ploča iz krojne liste (nesting); postotak tada ide samo na trake
+    eur_mats_total = metrics['cijena_mat_eur']; eur_trake = metrics['cijena_kant_traka_eur']
+    eur_rezanje = metrics['cijena_rez_eur']; eur_kant_usl = metrics['cijena_kant_usl_eur']
+    if not use_waste:
+        eur_waste = 0.0
+    elif nest_waste_eur is None:
+        eur_waste = (waste_pct/100.0)*(eur_mats_total + eur_trake)
+    else:
+        eur_waste = nest_waste_eur + (waste_pct/100.0)*eur_trake
+    subtotal = eur_mats_total + eur_trake + eur_rezanje + eur_kant_usl + eur_waste
+    return subtotal, eur_waste
+
+def extras_breakdown(okov_rows, oprema_rows, dodatci_rows):
+    sum_okov = sum(r["iznos"] for r in okov_rows)
+    sum_oprema = sum(r["iznos"] for r in oprema_rows)
+    sum_dodatci = sum(r["iznos"] for r in dodatci_rows)
+    return dict(okov=sum_okov, oprema=sum_oprema, dodatci=sum_dodatci,
+                total=sum_okov + sum_oprema + sum_dodatci)
+
+def extras_totals(okov_rows, oprema_rows, dodatci_rows):
+    return extras_breakdown(okov_rows, oprema_rows, dodatci_rows)["total"]
+
+def labor_total_calc(h_tp,r_tp,h_cnc,r_cnc,h_skl,r_skl,h_pak,r_pak):
+    return h_tp*r_tp + h_cnc*r_cnc + h_skl*r_skl + h_pak*r_pak
+
+def final_breakdown(mats_services_total, extras_total, labor_total, use_markup, markup_pct):
+    pre_markup = mats_services_total + extras_total + labor_total
+    eur_markup = (markup_pct/100.0)*pre_markup if use_markup else 0.0
+    return dict(pre_markup=pre_markup, eur_markup=eur_markup, ukupno=pre_markup + eur_markup)
+
+def final_summary_grand(mats_services_total, extras_total, labor_total, use_markup, markup_pct):
+    return final_breakdown(mats_services_total, extras_total, labor_total, use_markup, markup_pct)["ukupno"]
+
+
+# =============== Spec → ponuda ===============
+# Parametri derive_rows redom (isti redoslijed kao potpis funkcije)
+DERIVE_KEYS = [
+    "W", "H", "D", "t", "n_police", "include_back", "default_mat", "default_traka",
+    "pod_vrsta_vanjski", "kapa_vrsta_vanjska",
+    "include_kapa_povez", "kapa_povez_mode", "kapa_povez_sirina_mm", "kapa_povez_posto",
+    "include_fronta", "fronta_tip", "fronta_montaza", "razmak_hor", "razmak_ver", "razmak_srednji",
+    "preklop_hor", "preklop_ver", "default_mat_fr", "default_traka_fr",
+    "include_haupt_hor", "include_haupt_ver", "haupt_sirina_mm",
+]
+
+# Zadane vrijednosti = zadane vrijednosti u wizardu (materijali/usluge: prvi u cjeniku)
+DEFAULT_SPEC = {
+    "W": 800, "H": 720, "D": 320, "t": 18, "n_police": 2,
+    "include_back": True, "pod_vrsta_vanjski": True, "kapa_vrsta_vanjska": False,
+    "include_kapa_povez": False, "kapa_povez_mode": "Fiksno (mm)",
+    "kapa_povez_sirina_mm": 150, "kapa_povez_posto": 50,
+    "include_haupt_hor": False, "include_haupt_ver": False, "haupt_sirina_mm": 80,
+    "default_mat": None, "default_traka": None, "default_mat_fr": None, "default_traka_fr": None,
+    "rez_usl": None, "kant_usl": None,
+    "include_fronta": False, "fronta_tip": "Jednokrilna", "fronta_montaza": "Unutarnja (u korpusu)",
+    "razmak_hor": 2.0, "razmak_ver": 2.0, "razmak_srednji": 2.0, "preklop_hor": 0.0, "preklop_ver": 0.0,
+    "h_tp": 0.5, "r_tp": 28.0, "h_cnc": 0.8, "r_cnc": 35.0,
+    "h_skl": 0.7, "r_skl": 30.0, "h_pak": 0.3, "r_pak": 22.0,
+    "use_waste": True, "waste_pct": 8.0, "use_markup": False, "markup_pct": 15.0,
+    "rok_dani": 30,
+    # krojna lista (nesting) umjesto postotka otpada na materijal
+    "use_nesting": False, "ploca_A_mm": 2800, "ploca_B_mm": 2070, "kerf_mm": 4.0, "vlakno": False,
+}
+
+def _first_key(idx, lookup, keys_name):
+    # kompilirani Catalog već ima sortirane liste; obični index_cjenik dict nema
+    if keys_name in idx:
+        keys = idx[keys_name]
+    else:
+        d = idx[lookup]
+        keys = sorted(d.keys(), key=lambda k: d[k].get("naziv", ""))
+    return keys[0] if keys else None
+
+def resolve_spec(spec: dict, idx) -> dict:
+    """Spoji spec sa zadanim vrijednostima i popuni prazne šifre materijala/usluga iz cjenika.
+
+    ``idx`` je ``index_cjenik(cje)`` ili kompilirani ``Catalog``.
+    """
+    s = {**DEFAULT_SPEC, **{k: v for k, v in (spec or {}).items() if v is not None}}
+    if not s["default_mat"]:      s["default_mat"] = _first_key(idx, "MATS", "MATS_KEYS")
+    if not s["default_traka"]:    s["default_traka"] = _first_key(idx, "TRAK", "TRAK_KEYS")
+    if not s["default_mat_fr"]:   s["default_mat_fr"] = _first_key(idx, "FRONTS", "FR_KEYS")
+    if not s["default_traka_fr"]: s["default_traka_fr"] = _first_key(idx, "FTRAK", "FTRAK_KEYS")
+    if "USL_M_KEYS" in idx:
+        usl_keys = idx["USL_M_KEYS"]
+    else:
+        usl_keys = sorted(k for k, v in idx["USLG"].items() if "cijena_eur_po_m" in v)
+    if not s["rez_usl"]:  s["rez_usl"] = usl_keys[0] if usl_keys else None
+    if not s["kant_usl"]: s["kant_usl"] = usl_keys[0] if usl_keys else None
+    return s
+
+# šifre u specu → skupina cjenika u kojoj moraju postojati
+SPEC_CODES = {"default_mat": "MATS", "default_traka": "TRAK", "default_mat_fr": "FRONTS",
+              "default_traka_fr": "FTRAK", "rez_usl": "USLG", "kant_usl": "USLG"}
+
+def unknown_codes(s: dict, idx) -> list:
+    """Šifre razriješenog speca kojih nema u cjeniku → [(ključ, šifra)].
+
+    ``calculate`` nepoznatu šifru tiho računa kao 0 €, pa skupni poslovi
+    (batch, sweep) ovime odbijaju pogrešno upisane šifre.
+    """
+    return [(k, s[k]) for k, group in SPEC_CODES.items() if s.get(k) is not None and s[k] not in idx[group]]
+
+def quote(spec: dict, cje: dict, rows=None, okov_rows=(), oprema_rows=(), dodatci_rows=(), idx=None):
+    """Cijela ponuda za jedan korpus: derive_rows → calculate → zbrojevi.
+
+    ``cje`` je normalizirani cjenik; ``rows`` (opcionalno) zamjenjuje izvedene
+    elemente, npr. retke koje je korisnik ručno uredio. ``idx`` je gotov
+    ``index_cjenik(cje)`` ili kompilirani ``Catalog`` kad se isti cjenik koristi za mnogo ponuda.
+    """
+    if idx is None:
+        idx = index_cjenik(cje)
+    s = resolve_spec(spec, idx)
+    if rows is None:
+        rows = derive_rows(*[s[k] for k in DERIVE_KEYS])
+    report, metrics = calculate(rows, s["rez_usl"], s["kant_usl"],
+                                idx["MATS"], idx["TRAK"], idx["FRONTS"], idx["FTRAK"], idx["USLG"])
+    return finish_quote(s, rows, report, metrics, okov_rows, oprema_rows, dodatci_rows, idx)
+
+def finish_quote(s, rows, report, metrics, okov_rows=(), oprema_rows=(), dodatci_rows=(), idx=None):
+    """Zbrojevi ponude iz rezultata ``calculate`` (otpad/krojna lista, dodatci, rad, marža).
+
+    ``s`` je razriješeni spec (``resolve_spec``); odvojeno od ``quote`` da bi
+    skupni izračun (``vektor.calculate_many``) dijelio isti završni korak.
+    """
+    nest = nest_eur = None
+    if s["use_nesting"]:
+        from .nesting import nest_rows, nesting_waste_eur
+        nest = nest_rows(rows, (s["ploca_A_mm"], s["ploca_B_mm"]), s["kerf_mm"], vlakno=s["vlakno"])
+        nest_eur = nesting_waste_eur(nest, idx["MATS"], idx["FRONTS"])
+    mats_services_total, eur_waste = materials_services_summary(metrics, s["use_waste"], s["waste_pct"], nest_eur)
+    extras = extras_breakdown(list(okov_rows), list(oprema_rows), list(dodatci_rows))
+    labor_total = labor_total_calc(s["h_tp"], s["r_tp"], s["h_cnc"], s["r_cnc"],
+                                   s["h_skl"], s["r_skl"], s["h_pak"], s["r_pak"])
+    final = final_breakdown(mats_services_total, extras["total"], labor_total, s["use_markup"], s["markup_pct"])
+    totals = dict(
+        mats_services_total=mats_services_total, eur_waste=eur_waste,
+        extras_total=extras["total"], okov=extras["okov"], oprema=extras["oprema"], dodatci=extras["dodatci"],
+        labor_total=labor_total, **final,
+    )
+    if nest is not None:
+        totals.update(ploce=nest["ploce"], otpad_m2=nest["otpad_m2"])
+    return {"spec": s, "rows": rows, "report": report, "metrics": metrics, "totals": totals, "nesting": nest}
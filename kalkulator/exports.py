@@ -0,0 +1,647 @@
+"""Izvoz ponude: CSV (elementi), XLSX (kantiranje + narudžba + okov) i PDF (ponuda).
+
+Teški paketi (pandas, reportlab, openpyxl/xlsxwriter) uvoze se tek unutar funkcija.
+``build_exports`` gradi više formata istodobno (+ ZIP paket).
+"""
+import csv
+import io
+from functools import lru_cache
+
+from .engine import auto_kant_counts
+
+
+def build_csv(report):
+    """CSV s elementima korpusa (stupci = ključevi reporta)."""
+    buf = io.StringIO()
+    if report:
+        writer = csv.DictWriter(buf, fieldnames=list(report[0].keys()))
+        writer.writeheader()
+        for row in report:
+            writer.writerow(row)
+    return buf.getvalue().encode("utf-8")
+
+
+# -------- PDF Export (s NAZIV naslovom) --------
+def build_full_pdf(report, metrics, mats_services_total, extras_total, labor_total, use_markup, markup_pct,
+                   W, H, D, n_police, waste_pct, rok_dani,
+                   include_back, pod_vrsta_vanjski, kapa_vrsta_vanjska, include_kapa_povez,
+                   include_fronta, fronta_tip, fronta_montaza, output=None, eur_waste=None, ploce=None):
+    """PDF ponude preko renderera procesa (``kalkulator.pdf``); s ``output`` piše u datoteku."""
+    from .pdf import get_renderer
+    return get_renderer().ponuda(
+        report, metrics, mats_services_total, extras_total, labor_total, use_markup, markup_pct,
+        W, H, D, n_police, waste_pct, rok_dani,
+        include_back, pod_vrsta_vanjski, kapa_vrsta_vanjska, include_kapa_povez,
+        include_fronta, fronta_tip, fronta_montaza, output=output, eur_waste=eur_waste, ploce=ploce)
+
+# =============== EXCEL EXPORT (TOP-LEVEL FUNKCIJA) ===============
+XLSX_COLS = ["Naziv","Oznaka","Mat","Traka","A (mm)","B (mm)","Kom",
+             "Kratke strane (K)","Duge strane (D)","Oznaka kantiranja",
+             "Kant m","Površina m²","Rezanje m"]
+NARUDZBA_COLS = ["Oznaka","Naziv","Mat","Traka","A (mm)","B (mm)","Kom","Oznaka kantiranja"]
+_I_MAT, _I_KANT, _I_M2, _I_REZ = 2, 10, 11, 12
+_XLSX_WIDTHS = {"Naziv": 28, "Oznaka":10, "Mat":18, "Traka":18, "A (mm)":12, "B (mm)":12, "Kom":8,
+                "Kratke strane (K)":16, "Duge strane (D)":16, "Oznaka kantiranja":16,
+                "Kant m":14, "Površina m²":14, "Rezanje m":14}
+# od ovoliko elemenata XLSX se piše streamano (redak po redak, konstantna memorija)
+XLSX_STREAM_MIN_ROWS = 5000
+
+
+def _kant_counts_for_row(src_row):
+    """(dugi_cnt, kratki_cnt) po retku – ista pravila kao calculate() i editor (kalkulator.kant)."""
+    try:
+        A = float(src_row.get("A_mm", 0)); B = float(src_row.get("B_mm", 0))
+    except Exception:
+        A = 0; B = 0
+    return auto_kant_counts(src_row.get("naziv", ""), bool(src_row.get("auto", False)), A, B,
+                            src_row.get("kant_dugi", 0), src_row.get("kant_kratki", 0))
+
+
+def _classify_surface(src_row):
+    """Kategorizacija površine za sažetak."""
+    mat = str(src_row.get("mat", "")).upper()
+    naziv = str(src_row.get("naziv", "")).lower()
+    if mat == "HDF-001":
+        return "Leđa HDF"
+    if naziv.startswith("fronta"):
+        return "Fronte Iveral"
+    return "Korpusi Iveral"
+
+
+def _xlsx_core_row(rep, src):
+    """Redak lista Elementi_kantiranje (tuple, redoslijed = ``XLSX_COLS``) i kategorija površine."""
+    d_cnt, k_cnt = _kant_counts_for_row(src)
+    return (
+        rep.get("Naziv", ""), rep.get("Oznaka", ""), rep.get("Mat", ""), rep.get("Traka", ""),
+        rep.get("A (mm)", ""), rep.get("B (mm)", ""), rep.get("Kom", ""),
+        k_cnt, d_cnt, f"{k_cnt}K {d_cnt}D",
+        rep.get("Kant m", 0), float(rep.get("Površina m²", 0) or 0), float(rep.get("Rezanje m", 0) or 0),
+    ), _classify_surface(src)
+
+
+_EXTRAS_EMPTY_COLS = ["Kategorija","Art. Nr.","Naziv","Dobavljač","Jedinica","Cijena (€)","Količina","Iznos (€)"]
+
+
+def _extras_records(okov_rows, oprema_rows, dodatci_rows):
+    """Retci lista Okov_Oprema_Dodatci (dict po stavci; stupci = unija ključeva)."""
+    rows_e = []
+    for r in list(okov_rows) + list(oprema_rows):
+        rows_e.append({
+            "Kategorija": r["kategorija"], "Art. Nr.": r["art_nr"], "Naziv": r["naziv"],
+            "Dobavljač": r["dobavljac"], "Jedinica": r["jedinica"],
+            "Cijena (€)": r["cijena_eur"], "Količina": r["kolicina"], "Iznos (€)": r["iznos"]
+        })
+    for r in dodatci_rows:
+        rows_e.append({
+            "Kategorija": "DODATAK", "Šifra/Dod": r.get("sifra",""),
+            "Naziv": r["naziv"], "Jedinica": r["jedinica"], "Vrsta": r["vrsta"],
+            "A (mm)": r["A_mm"], "B (mm)": r["B_mm"], "Kom": r["kom"],
+            "Obračun količina": r["obračun_količina"], "Cijena (€)": r["cijena_eur"],
+            "Iznos (€)": r["iznos"]
+        })
+    return rows_e
+
+
+def build_xlsx_kantiranje(report_rows, source_rows, okov_rows, oprema_rows, dodatci_rows, engine=None, stream=None):
+    """XLSX (kantiranje + narudžba + okov/oprema/dodatci) → (bajtovi, greška).
+
+    ``engine`` ('openpyxl' | 'xlsxwriter') forsira engine; zadano je prvi instalirani.
+    ``stream`` (zadano: od ``XLSX_STREAM_MIN_ROWS`` elemenata) piše preko
+    ``write_xlsx_kantiranje_stream`` – isti listovi, bez DataFrameova i stiliziranja po ćeliji.
+    """
+    if stream is None:
+        stream = len(report_rows or ()) >= XLSX_STREAM_MIN_ROWS
+    if stream:
+        bio = io.BytesIO()
+        err = write_xlsx_kantiranje_stream(bio, report_rows, source_rows, okov_rows, oprema_rows, dodatci_rows,
+                                           engine=engine)
+        return (None, err) if err else (bio.getvalue(), None)
+    import pandas as pd
+    import importlib.util
+
+    if not report_rows:
+        return None, "Nema podataka za izvoz (report je prazan)."
+
+    cols_order = XLSX_COLS
+    i_mat, i_kant, i_m2, i_rez = _I_MAT, _I_KANT, _I_M2, _I_REZ
+
+    # Core retci (tuple po elementu, redoslijed = cols_order)
+    rows_core = []
+    korp_iveral_m2 = fronte_iveral_m2 = hdf_m2 = total_rez_m = 0.0
+
+    for i, rep in enumerate(report_rows):
+        src = source_rows[i] if i < len(source_rows) else {}
+        row, cat = _xlsx_core_row(rep, src)
+        if cat == "Korpusi Iveral":
+            korp_iveral_m2 += row[i_m2]
+        elif cat == "Fronte Iveral":
+            fronte_iveral_m2 += row[i_m2]
+        else:
+            hdf_m2 += row[i_m2]
+        total_rez_m += row[i_rez]
+        rows_core.append(row)
+
+    # grupiranje po materijalu (redoslijed prvog pojavljivanja) + međuzbrojevi
+    by_mat = {}
+    for r in rows_core:
+        by_mat.setdefault(r[i_mat], []).append(r)
+    df_core = pd.DataFrame.from_records(rows_core, columns=cols_order)
+
+    rows_display = []
+    subtotal_row_indices = []
+    blank = ("",) * len(cols_order)
+    for mat, mrows in by_mat.items():
+        rows_display.extend(mrows)
+        subtotal_row = list(blank)
+        subtotal_row[0] = f"UKUPNO – {mat}"
+        subtotal_row[i_mat] = mat
+        subtotal_row[i_kant] = float(sum(r[i_kant] for r in mrows))
+        subtotal_row[i_m2] = float(sum(r[i_m2] for r in mrows))
+        subtotal_row[i_rez] = float(sum(r[i_rez] for r in mrows))
+        rows_display.append(tuple(subtotal_row))
+        subtotal_row_indices.append(len(rows_display))
+
+    df = pd.DataFrame.from_records(rows_display, columns=cols_order)
+
+    sum_by_traka = (
+        df_core[["Traka","Kant m"]]
+        .groupby("Traka", dropna=False)["Kant m"].sum()
+        .reset_index()
+        .rename(columns={"Kant m":"Kant m ukupno"})
+    )
+
+    total_materials_m2 = korp_iveral_m2 + fronte_iveral_m2 + hdf_m2
+
+    # Engine
+    import importlib.util
+    has_openpyxl   = importlib.util.find_spec("openpyxl")  is not None
+    has_xlsxwriter = importlib.util.find_spec("xlsxwriter") is not None
+    if engine is not None:
+        if not {"openpyxl": has_openpyxl, "xlsxwriter": has_xlsxwriter}.get(engine):
+            return None, f"Engine '{engine}' nije instaliran."
+    else:
+        engine = "openpyxl" if has_openpyxl else ("xlsxwriter" if has_xlsxwriter else None)
+    if engine is None:
+        return None, "Nedostaje engine za Excel. Instaliraj: pip install openpyxl (ili xlsxwriter)."
+
+    bio = io.BytesIO()
+    with pd.ExcelWriter(bio, engine=engine) as writer:
+        # ========== Sheet 1: Elementi_kantiranje ==========
+        df.to_excel(writer, index=False, sheet_name="Elementi_kantiranje")
+        ws1 = writer.sheets["Elementi_kantiranje"]
+
+        grand_total_kant = float(df_core["Kant m"].sum())
+        grand_total_m2   = float(df_core["Površina m²"].sum())
+        grand_total_rez  = float(df_core["Rezanje m"].sum())
+
+        if engine == "xlsxwriter":
+            bold = writer.book.add_format({"bold": True})
+            grey = writer.book.add_format({"bold": True, "bg_color": "#f3f4f6"})
+            green = writer.book.add_format({"bold": True, "bg_color": "#eef7ee"})
+            left = writer.book.add_format({"align":"left"})
+            center = writer.book.add_format({"align":"center"})
+            num3 = writer.book.add_format({"num_format":"0.000", "align":"center"})
+            widths = _XLSX_WIDTHS
+            for i, name in enumerate(df.columns):
+                ws1.set_column(i, i, widths.get(name, 14))
+            ws1.autofilter(0, 0, len(df), len(df.columns)-1)
+            ws1.freeze_panes(1, 1)
+            ws1.set_column(0, 0, widths["Naziv"], left)
+            ws1.set_column(1, len(df.columns)-1, None, center)
+            col_idx = {n:i for i,n in enumerate(df.columns)}
+            for col in ["Kant m","Rezanje m","Površina m²"]:
+                ws1.set_column(col_idx[col], col_idx[col], widths[col], num3)
+            total_row_excel = len(df) + 1
+            ws1.write(total_row_excel, 0, "UKUPNO – SVI MATERIJALI", bold)
+            ws1.write_number(total_row_excel, col_idx["Kant m"], grand_total_kant, green)
+            ws1.write_number(total_row_excel, col_idx["Površina m²"], grand_total_m2, green)
+            ws1.write_number(total_row_excel, col_idx["Rezanje m"], grand_total_rez, green)
+            for idx in subtotal_row_indices:
+                excel_row = idx
+                ws1.set_row(excel_row, 12, grey)
+        else:
+            from openpyxl.styles import Alignment, Font, PatternFill
+            ws1.freeze_panes = "B2"
+            ws1.auto_filter.ref = ws1.dimensions
+            for cell in ws1[1]:
+                cell.font = Font(bold=True); cell.alignment = Alignment(horizontal="center")
+            for row in ws1.iter_rows(min_row=2, max_row=ws1.max_row):
+                if row and row[0].value is not None:
+                    row[0].alignment = Alignment(horizontal="left")
+                for c in row[1:]:
+                    c.alignment = Alignment(horizontal="center")
+            last = ws1.max_row + 1
+            ws1.cell(row=last, column=1, value="UKUPNO – SVI MATERIJALI").font = Font(bold=True)
+            fill_green = PatternFill(start_color="EEF7EE", end_color="EEF7EE", fill_type="solid")
+            headers = [c.value for c in ws1[1]]
+            def idx(h): return headers.index(h) + 1 if h in headers else None
+            c_kant = idx("Kant m"); c_m2 = idx("Površina m²"); c_rez = idx("Rezanje m")
+            if c_kant: ws1.cell(row=last, column=c_kant, value=grand_total_kant).fill = fill_green
+            if c_m2:   ws1.cell(row=last, column=c_m2,   value=grand_total_m2).fill = fill_green
+            if c_rez:  ws1.cell(row=last, column=c_rez,  value=grand_total_rez).fill = fill_green
+            fill_grey = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
+            for idx in subtotal_row_indices:
+                excel_row = idx + 1
+                for c in range(1, ws1.max_column+1):
+                    cell = ws1.cell(row=excel_row+1, column=c)
+                    cell.fill = fill_grey
+                    if c in (1, c_kant or 0, c_m2 or 0, c_rez or 0):
+                        cell.font = Font(bold=True)
+
+        # ========== Sheet 2: Sažetak ==========
+        ws2_name = "Sažetak"
+        sum_by_traka.to_excel(writer, index=False, sheet_name=ws2_name)
+        ws2 = writer.sheets[ws2_name]
+        startrow = len(sum_by_traka) + 2
+        extra = pd.DataFrame({
+            "Traka": [
+                "— Korpusi Iveral m²",
+                "— Fronte Iveral m²",
+                "— Leđa HDF m²",
+                "— Rezanje m ukupno",
+                "— Zbroj materijala m² ukupno",
+            ],
+            "Kant m ukupno": [
+                korp_iveral_m2, fronte_iveral_m2, hdf_m2, total_rez_m,
+                total_materials_m2,
+            ],
+        })
+        extra.to_excel(writer, index=False, sheet_name=ws2_name, startrow=startrow)
+        if engine == "xlsxwriter":
+            ws2.set_column(0, 0, 30); ws2.set_column(1, 1, 24)
+
+        # ========== Sheet 3: Narudžba ==========
+        narudzba_cols = NARUDZBA_COLS
+        df_n = df[narudzba_cols].copy()
+        df_n.to_excel(writer, index=False, sheet_name="Narudžba")
+        ws3 = writer.sheets["Narudžba"]
+        if engine == "xlsxwriter":
+            left = writer.book.add_format({"align":"left"})
+            center = writer.book.add_format({"align":"center"})
+            ws3.set_column(0, 0, 10, center)
+            ws3.set_column(1, 1, 28, left)
+            ws3.set_column(2, 3, 18, center)
+            ws3.set_column(4, 5, 12, center)
+            ws3.set_column(6, 6, 8,  center)
+            ws3.set_column(7, 7, 16, center)
+            ws3.autofilter(0, 0, len(df_n), len(narudzba_cols)-1)
+            ws3.freeze_panes(1, 1)
+        else:
+            from openpyxl.styles import Alignment, Font
+            ws3.freeze_panes = "B2"; ws3.auto_filter.ref = ws3.dimensions
+            for cell in ws3[1]:
+                cell.font = Font(bold=True); cell.alignment = Alignment(horizontal="center")
+            for row in ws3.iter_rows(min_row=2, max_row=ws3.max_row):
+                if row and row[1].value is not None:
+                    row[1].alignment = Alignment(horizontal="left")
+                for c in [0,2,3,4,5,6,7]:
+                    row[c].alignment = Alignment(horizontal="center")
+
+        # ========== Sheet 4: Okov_Oprema_Dodatci ==========
+        df_e = pd.DataFrame(_extras_records(okov_rows, oprema_rows, dodatci_rows))
+        if df_e.empty:
+            df_e = pd.DataFrame([dict.fromkeys(_EXTRAS_EMPTY_COLS, "")])
+        df_e.to_excel(writer, index=False, sheet_name="Okov_Oprema_Dodatci")
+        ws4 = writer.sheets["Okov_Oprema_Dodatci"]
+
+        if engine == "xlsxwriter":
+            center = writer.book.add_format({"align":"center"})
+            left = writer.book.add_format({"align":"left"})
+            ws4.autofilter(0, 0, len(df_e), len(df_e.columns)-1)
+            ws4.freeze_panes(1, 1)
+            ws4.set_column(0, len(df_e.columns)-1, 14, center)
+            # "Naziv" i "Dobavljač" lijevo + šire
+            try:
+                naziv_idx = list(df_e.columns).index("Naziv")
+                ws4.set_column(naziv_idx, naziv_idx, 34, left)
+            except ValueError:
+                pass
+            try:
+                dob_idx = list(df_e.columns).index("Dobavljač")
+                ws4.set_column(dob_idx, dob_idx, 22, left)
+            except ValueError:
+                pass
+        else:
+            from openpyxl.styles import Alignment, Font
+            ws4.freeze_panes = "B2"; ws4.auto_filter.ref = ws4.dimensions
+            for cell in ws4[1]:
+                cell.font = Font(bold=True); cell.alignment = Alignment(horizontal="center")
+            headers = [c.value for c in ws4[1]]
+            for col_name, align in [("Naziv","left"), ("Dobavljač","left")]:
+                if col_name in headers:
+                    col = headers.index(col_name)+1
+                    for row in ws4.iter_rows(min_row=2, max_row=ws4.max_row):
+                        row[col-1].alignment = Alignment(horizontal=align)
+
+    bio.seek(0)
+    return bio.getvalue(), None
+
+
+# -------- Streaming XLSX (veliki projekti) --------
+class _XlsxwriterStream:
+    """Listovi se pišu redak po redak (``constant_memory``); stil po stupcu preko ``set_column``."""
+
+    def __init__(self, output):
+        import xlsxwriter
+        self.book = xlsxwriter.Workbook(output, {"constant_memory": True})
+        f = self.book.add_format
+        self.fmt = {
+            "header": f({"bold": True, "border": 1, "align": "center"}),
+            "left": f({"align": "left"}), "center": f({"align": "center"}),
+            "num3": f({"num_format": "0.000", "align": "center"}),
+            "num2": f({"num_format": "0.00", "align": "center"}),
+            "bold": f({"bold": True}),
+            "grey": f({"bold": True, "bg_color": "#f3f4f6"}),
+            "green": f({"bold": True, "bg_color": "#eef7ee"}),
+        }
+        self._row = {}
+
+    def sheet(self, name, columns, styles, widths, n_rows):
+        ws = self.book.add_worksheet(name)
+        for i, (style, width) in enumerate(zip(styles, widths)):
+            ws.set_column(i, i, width, self.fmt.get(style))
+        ws.freeze_panes(1, 1)
+        ws.autofilter(0, 0, n_rows, len(columns) - 1)
+        ws.write_row(0, 0, columns, self.fmt["header"])
+        self._row[name] = 1
+        return ws
+
+    def append(self, ws, values, row_style=None, cell_styles=None):
+        r = self._row[ws.name]
+        self._row[ws.name] = r + 1
+        if row_style:
+            ws.set_row(r, 12, self.fmt[row_style])
+        for c, v in enumerate(values):
+            if v is None or v == "":
+                continue
+            # izravno write_string/write_number: bez provjera formula/URL-ova iz ws.write
+            write = ws.write_string if isinstance(v, str) else ws.write_number
+            style = cell_styles.get(c) if cell_styles else None
+            if style:
+                write(r, c, v, self.fmt[style])
+            else:
+                write(r, c, v)
+
+    def skip(self, ws, n=1):
+        self._row[ws.name] += n
+
+    def close(self):
+        self.book.close()
+
+
+class _OpenpyxlStream:
+    """openpyxl write-only; stil se gradi jednom po (stupac, vrsta retka), ne po ćeliji."""
+
+    def __init__(self, output):
+        from openpyxl import Workbook
+        from openpyxl.styles import Alignment, Font, PatternFill
+        self.output = output
+        self.book = Workbook(write_only=True)
+        grey = PatternFill(start_color="F3F4F6", end_color="F3F4F6", fill_type="solid")
+        green = PatternFill(start_color="EEF7EE", end_color="EEF7EE", fill_type="solid")
+        self.fmt = {
+            "header": {"font": Font(bold=True), "alignment": Alignment(horizontal="center")},
+            "left": {"alignment": Alignment(horizontal="left")},
+            "center": {"alignment": Alignment(horizontal="center")},
+            "num3": {"alignment": Alignment(horizontal="center"), "number_format": "0.000"},
+            "num2": {"alignment": Alignment(horizontal="center"), "number_format": "0.00"},
+            "bold": {"font": Font(bold=True)},
+            "grey": {"font": Font(bold=True), "fill": grey},
+            "green": {"font": Font(bold=True), "fill": green},
+        }
+        self._styles = {}
+
+    def sheet(self, name, columns, styles, widths, n_rows):
+        from openpyxl.utils import get_column_letter
+        ws = self.book.create_sheet(name)
+        for i, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = width
+        ws.freeze_panes = "B2"
+        ws.auto_filter.ref = f"A1:{get_column_letter(len(columns))}{n_rows + 1}"
+        self._styles[name] = list(styles)
+        ws.append([self._cell(ws, v, "header") for v in columns])
+        return ws
+
+    def _cell(self, ws, value, style):
+        from openpyxl.cell import WriteOnlyCell
+        cell = WriteOnlyCell(ws, value=value)
+        for attr, v in self.fmt[style].items():
+            setattr(cell, attr, v)
+        return cell
+
+    def append(self, ws, values, row_style=None, cell_styles=None):
+        styles = self._styles[ws.title]
+        out = []
+        for c, v in enumerate(values):
+            if v == "":
+                v = None
+            style = (cell_styles or {}).get(c) or row_style or (styles[c] if c < len(styles) else None)
+            out.append(self._cell(ws, v, style) if style and (v is not None or row_style) else v)
+        ws.append(out)
+
+    def skip(self, ws, n=1):
+        for _ in range(n):
+            ws.append([])
+
+    def close(self):
+        self.book.save(self.output)
+
+
+def xlsx_stream_engine(engine=None):
+    """(engine, greška): zadani je xlsxwriter, inače openpyxl; greška ako traženi nije instaliran."""
+    import importlib.util
+
+    has = {e: importlib.util.find_spec(e) is not None for e in ("xlsxwriter", "openpyxl")}
+    if engine is not None:
+        return (engine, None) if has.get(engine) else (None, f"Engine '{engine}' nije instaliran.")
+    engine = "xlsxwriter" if has["xlsxwriter"] else ("openpyxl" if has["openpyxl"] else None)
+    if engine is None:
+        return None, "Nedostaje engine za Excel. Instaliraj: pip install xlsxwriter (ili openpyxl)."
+    return engine, None
+
+
+def open_xlsx_stream(output, engine):
+    """Pisač listova redak po redak (``sheet``/``append``/``skip``/``close``) za ``engine``."""
+    return _XlsxwriterStream(output) if engine == "xlsxwriter" else _OpenpyxlStream(output)
+
+
+def write_xlsx_kantiranje_stream(output, report_rows, source_rows, okov_rows, oprema_rows, dodatci_rows, engine=None):
+    """Isti listovi kao ``build_xlsx_kantiranje``, pisani redak po redak u ``output`` (putanja ili binarni file).
+
+    Jedan prolaz kroz elemente skuplja sve zbrojeve (po materijalu, traci i vrsti
+    površine); elementi se čuvaju samo kao tupleovi grupirani po materijalu. Zadani
+    engine je xlsxwriter (``constant_memory``), inače openpyxl write-only.
+    Vraća poruku greške ili None.
+    """
+    if not report_rows:
+        return "Nema podataka za izvoz (report je prazan)."
+    engine, err = xlsx_stream_engine(engine)
+    if err:
+        return err
+
+    # ---- jedan prolaz: grupiranje po materijalu + svi zbrojevi ----
+    by_mat, sub, po_traci = {}, {}, {}
+    povrsine = {"Korpusi Iveral": 0.0, "Fronte Iveral": 0.0, "Leđa HDF": 0.0}
+    tot_kant = tot_m2 = tot_rez = 0.0
+    n_src = len(source_rows)
+    for i, rep in enumerate(report_rows):
+        row, cat = _xlsx_core_row(rep, source_rows[i] if i < n_src else {})
+        mat, kant, m2, rez = row[_I_MAT], row[_I_KANT], row[_I_M2], row[_I_REZ]
+        by_mat.setdefault(mat, []).append(row)
+        acc = sub.get(mat)
+        if acc is None:
+            acc = sub[mat] = [0.0, 0.0, 0.0]
+        acc[0] += kant; acc[1] += m2; acc[2] += rez
+        po_traci[row[3]] = po_traci.get(row[3], 0.0) + kant
+        povrsine[cat] += m2
+        tot_kant += kant; tot_m2 += m2; tot_rez += rez
+    n_display = len(report_rows) + len(by_mat)
+
+    out = open_xlsx_stream(output, engine)
+
+    # Listovi se otvaraju redom kao u DataFrame izvozu; 1 i 3 se pune u istoj petlji
+    col_styles = ["left"] + ["center"] * (len(XLSX_COLS) - 1)
+    for i in (_I_KANT, _I_M2, _I_REZ):
+        col_styles[i] = "num3"
+    ws1 = out.sheet("Elementi_kantiranje", XLSX_COLS, col_styles,
+                    [_XLSX_WIDTHS[c] for c in XLSX_COLS], n_display)
+    ws2 = out.sheet("Sažetak", ["Traka", "Kant m ukupno"], [None, None], [30, 24], len(po_traci))
+    n_idx = [XLSX_COLS.index(c) for c in NARUDZBA_COLS]
+    ws3 = out.sheet("Narudžba", NARUDZBA_COLS, ["center", "left"] + ["center"] * 6,
+                    [10, 28, 18, 18, 12, 12, 8, 16], n_display)
+    extras = _extras_records(okov_rows, oprema_rows, dodatci_rows)
+    e_cols = list(dict.fromkeys(k for r in extras for k in r)) or _EXTRAS_EMPTY_COLS
+    ws4 = out.sheet("Okov_Oprema_Dodatci", e_cols,
+                    ["left" if c in ("Naziv", "Dobavljač") else "center" for c in e_cols],
+                    [34 if c == "Naziv" else 22 if c == "Dobavljač" else 14 for c in e_cols],
+                    max(1, len(extras)))
+
+    # ---- Elementi_kantiranje + Narudžba ----
+    sub_styles = {0: "grey", _I_KANT: "grey", _I_M2: "grey", _I_REZ: "grey"}
+    for mat, mrows in by_mat.items():
+        for row in mrows:
+            out.append(ws1, row)
+            out.append(ws3, [row[j] for j in n_idx])
+        subtotal = [""] * len(XLSX_COLS)
+        subtotal[0] = f"UKUPNO – {mat}"
+        subtotal[_I_MAT] = mat
+        subtotal[_I_KANT], subtotal[_I_M2], subtotal[_I_REZ] = sub[mat]
+        out.append(ws1, subtotal, row_style="grey", cell_styles=sub_styles)
+        out.append(ws3, [subtotal[j] for j in n_idx])
+    total = [""] * len(XLSX_COLS)
+    total[0] = "UKUPNO – SVI MATERIJALI"
+    total[_I_KANT], total[_I_M2], total[_I_REZ] = tot_kant, tot_m2, tot_rez
+    out.append(ws1, total, cell_styles={0: "bold", _I_KANT: "green", _I_M2: "green", _I_REZ: "green"})
+
+    # ---- Sažetak ----
+    for traka in sorted(po_traci, key=str):
+        out.append(ws2, (traka, po_traci[traka]))
+    out.skip(ws2)
+    out.append(ws2, ("Traka", "Kant m ukupno"), cell_styles={0: "header", 1: "header"})
+    korp, fr, hdf = povrsine["Korpusi Iveral"], povrsine["Fronte Iveral"], povrsine["Leđa HDF"]
+    for label, v in (("— Korpusi Iveral m²", korp), ("— Fronte Iveral m²", fr), ("— Leđa HDF m²", hdf),
+                     ("— Rezanje m ukupno", tot_rez), ("— Zbroj materijala m² ukupno", korp + fr + hdf)):
+        out.append(ws2, (label, v))
+
+    # ---- Okov_Oprema_Dodatci ----
+    for r in extras:
+        out.append(ws4, [r.get(c) for c in e_cols])
+
+    out.close()
+    return None
+
+
+# -------- Svi izvozi istodobno (+ ZIP) --------
+EXPORT_KINDS = ("csv", "xlsx", "pdf")
+EXPORT_NAMES = {"csv": "elementi.csv", "xlsx": "kantiranje.xlsx", "pdf": "ponuda.pdf"}
+PDF_PROCESSES = 2   # gornja granica; nikad više od broja jezgri
+
+
+def _pdf_worker_init():
+    from .pdf import get_renderer
+    get_renderer()
+
+
+@lru_cache(maxsize=None)
+def _pdf_pool():
+    """Procesi za PDF (reportlab layout je čisti Python i drži GIL); renderer se zagrije pri startu."""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    import os
+    return ProcessPoolExecutor(max_workers=max(1, min(PDF_PROCESSES, os.cpu_count() or 1)), mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_pdf_worker_init)
+
+
+def build_zip(files):
+    """{ime datoteke: bajtovi} → ZIP (XLSX/PDF su već komprimirani pa se samo spremaju)."""
+    import zipfile
+    bio = io.BytesIO()
+    with zipfile.ZipFile(bio, "w") as zf:
+        for name, data in files.items():
+            packed = name.lower().endswith((".xlsx", ".pdf", ".zip"))
+            zf.writestr(name, data, compress_type=zipfile.ZIP_STORED if packed else zipfile.ZIP_DEFLATED)
+    return bio.getvalue()
+
+
+def pdf_args_from_quote(q):
+    """``pdf_args`` za ``build_exports`` iz rezultata ``engine.quote`` (batch, API)."""
+    s, t = q["spec"], q["totals"]
+    return dict(metrics=q["metrics"], mats_services_total=t["mats_services_total"], extras_total=t["extras_total"],
+                labor_total=t["labor_total"], eur_waste=t["eur_waste"], ploce=t.get("ploce"),
+                **{k: s[k] for k in ("use_markup", "markup_pct", "W", "H", "D", "n_police", "waste_pct", "rok_dani",
+                                     "include_back", "pod_vrsta_vanjski", "kapa_vrsta_vanjska", "include_kapa_povez",
+                                     "include_fronta", "fronta_tip", "fronta_montaza")})
+
+
+def build_exports(report, source_rows=(), okov_rows=(), oprema_rows=(), dodatci_rows=(), pdf_args=None,
+                  kinds=EXPORT_KINDS, bundle=False, names=None, processes=None):
+    """Traženi formati istodobno → (artefakti {vrsta: bajtovi}, greške {vrsta: poruka}).
+
+    CSV i XLSX grade se u dretvama, PDF u procesu; ``processes`` (zadano: samo ako
+    ima više jezgri) ``False`` drži i PDF u dretvi.
+    ``pdf_args`` su argumenti ``build_full_pdf`` osim ``report``. ``bundle=True``
+    dodaje "zip" sa svim uspješnim artefaktima (imena iz ``names`` / ``EXPORT_NAMES``).
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+    import os
+
+    if processes is None:
+        processes = (os.cpu_count() or 1) > 1
+    jobs = {}
+    if "csv" in kinds:
+        jobs["csv"] = (build_csv, (report,), {})
+    if "xlsx" in kinds:
+        jobs["xlsx"] = (build_xlsx_kantiranje,
+                        (report, list(source_rows), list(okov_rows), list(oprema_rows), list(dodatci_rows)), {})
+    if "pdf" in kinds:
+        jobs["pdf"] = (build_full_pdf, (list(report),), dict(pdf_args or {}))
+
+    out, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as tp:
+        futures = {}
+        for kind, (fn, args, kw) in jobs.items():
+            pool = _pdf_pool() if kind == "pdf" and processes else tp
+            futures[kind] = pool.submit(fn, *args, **kw)
+        for kind, fut in futures.items():
+            fn, args, kw = jobs[kind]
+            try:
+                try:
+                    res = fut.result()
+                except BrokenProcessPool:
+                    _pdf_pool.cache_clear()
+                    res = fn(*args, **kw)
+            except Exception as e:
+                errors[kind] = f"{type(e).__name__}: {e}"
+                continue
+            if kind == "xlsx":
+                res, err = res
+                if err:
+                    errors[kind] = err
+                    continue
+            out[kind] = res
+
+    if bundle and out:
+        names = {**EXPORT_NAMES, **(names or {})}
+        out["zip"] = build_zip({names[k]: v for k, v in out.items()})
+    return out, errors
@@ -0,0 +1,154 @@
+"""Stavke izvan korpusa (OKOV, OPREMA, DODATCI): obračunska količina i iznos.
+
+Tablice iz ``st.data_editor`` obrađuju se po stupcu (pandas za parsiranje
+stupaca, NumPy za izračun) umjesto ``iterrows`` s pretvorbom po ćeliji, pa i
+linije sa stotinama artikala ostaju brze na svakom rerunu. Pravila su ista kao ``dodatak_kolicina``: prazne ćelije
+i NaN su 0 / "", količina se reže na cijeli broj, redak s količinom 0 se preskače.
+Pandas se uvozi tek kad se tablica obrađuje (ne pri importu paketa).
+"""
+from .engine import mm2_to_m2, mm_to_m
+
+JEDINICA_PO_VRSTI = {"po kom": "kom", "po m": "m", "po m2": "m²"}
+PICK_COLS = ("art_pick", "kolicina")
+DODATCI_COLS = ("sifra", "naziv", "vrsta", "jedinica", "cijena_eur", "A_mm", "B_mm", "kom")
+
+
+def dodatak_kolicina(vrsta, A, B, kom):
+    """Obračunska količina dodatka: kom, m (A + B) ili m² (A × B) po komadu."""
+    if vrsta == "po m2":
+        return mm2_to_m2(A * B) * kom
+    if vrsta == "po m":
+        return mm_to_m(max(A, B) + min(A, B)) * kom
+    return kom
+
+
+# =============== Pretvorbe stupaca ===============
+def _text(col):
+    """Stupac → NumPy polje očišćenih stringova; None/NaN/"nan" → ""."""
+    import numpy as np
+    x = np.char.strip(col.to_numpy(dtype=object, na_value="").astype(str))
+    return np.where(np.char.lower(x) == "nan", "", x)
+
+
+def _number(col):
+    """Stupac → float64; prazno i neispravno → 0."""
+    import numpy as np
+    import pandas as pd
+    if not pd.api.types.is_numeric_dtype(col):
+        col = pd.Series(_text(col), index=col.index)
+    x = pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return np.where(np.isfinite(x), x, 0.0)
+
+
+def _count(col):
+    """Stupac → int64 (kao ``int(float(x))``); prazno i neispravno → 0."""
+    import numpy as np
+    return np.trunc(_number(col)).astype(np.int64)
+
+
+def _item_price(item):
+    try:
+        return float(item.get("cijena_eur") or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _s(x):
+    return "" if x is None else str(x).strip()
+
+
+def _records(cols):
+    """{stupac: polje} → lista dictova s Python vrijednostima (bez DataFrame/``to_dict``)."""
+    names = list(cols)
+    values = [c.tolist() if hasattr(c, "tolist") else c for c in cols.values()]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+# =============== OKOV / OPREMA ===============
+def price_picklist(df, lookup, by_label, kategorija):
+    """Tablica ``art_pick``/``kolicina`` → (stavke ponude, retci pregleda, {labela: art_nr} odabranih).
+
+    ``by_label`` mapira labelu iz izbornika na art_nr (``Catalog.OKOV_BY_PICK``);
+    nepoznata labela se tumači kao ručno upisan art_nr (dio prije "—").
+    ``lookup`` je rječnik artikala ili ``DBGroup`` – čita se jednom po različitoj
+    stavci, a vrijednosti se na retke raspoređuju indeksiranjem polja.
+    """
+    import numpy as np
+    from .vektor import round_half_even
+    if df is None or len(df) == 0 or not set(PICK_COLS) <= set(df.columns):
+        return [], [], {}
+    pick, qty = _text(df["art_pick"]), _count(df["kolicina"])
+    keep = (pick != "") & (qty > 0)
+    if not keep.any():
+        return [], [], {}
+    labels, inv = np.unique(pick[keep], return_inverse=True)
+    qty = qty[keep]
+
+    labels = labels.tolist()
+    arts = [by_label.get(p) or p.split("—", 1)[0].strip() for p in labels]
+    items = [lookup.get(a) or {} for a in arts]
+    art = np.array(arts, dtype=object)[inv]
+    naziv = np.array([_s(it.get("naziv")) for it in items], dtype=object)[inv]
+    dob = np.array([_s(it.get("dobavljac")) for it in items], dtype=object)[inv]
+    jed = np.array([_s(it.get("jedinica")) or "kom" for it in items], dtype=object)[inv]
+    cij = np.array([_item_price(it) for it in items], dtype=np.float64)[inv]
+    iznos = cij * qty
+
+    out = _records({"kategorija": [kategorija] * len(qty), "art_nr": art, "naziv": naziv, "dobavljac": dob,
+                    "jedinica": jed, "cijena_eur": cij, "kolicina": qty, "iznos": iznos})
+    preview = _records({"Art. Nr.": art, "Naziv": naziv, "Dobavljač": dob, "Jedinica": jed,
+                        "Cijena (€)": round_half_even(cij, 2), "Količina": qty,
+                        "Iznos (€)": round_half_even(iznos, 2)})
+    return out, preview, dict(zip(labels, arts))
+
+
+# =============== DODATCI ===============
+def dodatci_template(dodatci, keys):
+    """Početna tablica editora dodataka (sve šifre iz cjenika, dimenzije i kom 0)."""
+    rows = []
+    for k in keys:
+        row = {**dodatci[k], "sifra": k}
+        row.setdefault("vrsta", "po kom")
+        row.update(A_mm=0, B_mm=0, kom=0)
+        rows.append({c: row.get(c) for c in DODATCI_COLS})
+    if not rows:
+        rows = [{"sifra": "DD-001", "naziv": "Dodatni element – placeholder", "vrsta": "po kom",
+                 "jedinica": "po kom", "cijena_eur": 10.0, "A_mm": 0, "B_mm": 0, "kom": 0}]
+    return rows
+
+
+def price_dodatci(df):
+    """Uređena tablica dodataka → stavke ponude (samo retci s kom > 0).
+
+    Količina po vrsti obračuna (``np.select``, isti redoslijed operacija kao
+    ``dodatak_kolicina``); ``obračun_količina`` je zaokružen kao Pythonov ``round``.
+    """
+    import numpy as np
+    from .vektor import round_half_even
+    if df is None or len(df) == 0:
+        return []
+    kom = _count(df["kom"])
+    keep = kom > 0
+    if not keep.any():
+        return []
+    kom = kom[keep]
+    A, B = _number(df["A_mm"])[keep], _number(df["B_mm"])[keep]
+    cij = _number(df["cijena_eur"])[keep]
+    vrsta = np.char.lower(_text(df["vrsta"])[keep])
+    vrsta = np.where(vrsta == "", "po kom", vrsta)
+    jedinica = _text(df["jedinica"])[keep]
+    m2, m = vrsta == "po m2", vrsta == "po m"
+    jedinica = np.where(jedinica != "", jedinica, np.select([vrsta == "po kom", m], ["kom", "m"], "m²"))
+
+    kol = np.select([m2, m], [A * B / 1_000_000.0 * kom, (np.maximum(A, B) + np.minimum(A, B)) / 1000.0 * kom],
+                    kom.astype(np.float64))
+    # "po kom": količina ostaje cijeli broj kao u skalarnoj verziji
+    obracun = np.where(m2 | m, round_half_even(kol, 3).astype(object), kom.astype(object))
+
+    return _records({
+        "kategorija": ["DODATAK"] * len(kom),
+        "sifra": df["sifra"].to_numpy(dtype=object)[keep], "naziv": df["naziv"].to_numpy(dtype=object)[keep],
+        "vrsta": vrsta, "jedinica": jedinica,
+        "A_mm": np.trunc(A).astype(np.int64), "B_mm": np.trunc(B).astype(np.int64), "kom": kom,
+        "obračun_količina": obracun, "cijena_eur": cij, "iznos": cij * kol,
+    })
@@ -0,0 +1,92 @@
+"""Paralelno, uvjetno dohvaćanje CSV cjenika (Google Sheets i sl.) s disk cacheom.
+
+Svaki izvor se sprema na disk zajedno s validatorima (ETag / Last-Modified).
+Unutar TTL-a se ne ide na mrežu; nakon toga ide se uvjetni GET pa nepromijenjen
+sheet košta samo jedan 304 odgovor. Ako mreža ne radi, koristi se zadnja
+spremljena verzija (status ``stale``) uz prijavu greške.
+"""
+import hashlib
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CACHE_DIR = ".cjenik_cache"
+
+
+def _paths(cache_dir, url):
+    h = hashlib.sha1(url.encode("utf-8")).hexdigest()[:20]
+    return os.path.join(cache_dir, h + ".body"), os.path.join(cache_dir, h + ".json")
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_atomic(path, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _write_meta(meta_path, meta):
+    _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+
+def fetch_one(name, url, cache_dir=DEFAULT_CACHE_DIR, ttl=300, timeout=20):
+    """Dohvati jedan izvor; vraća dict s ``status`` (cache|304|200|stale|error), ``seconds``, ``data``."""
+    t0 = time.perf_counter()
+    res = {"name": name, "url": url, "status": "error", "seconds": 0.0, "bytes": 0, "error": "", "data": None}
+    os.makedirs(cache_dir, exist_ok=True)
+    body_path, meta_path = _paths(cache_dir, url)
+    meta = _read_meta(meta_path) if os.path.exists(body_path) else None
+
+    def cached_body():
+        with open(body_path, "rb") as f:
+            return f.read()
+
+    try:
+        if meta and time.time() - meta.get("fetched_at", 0) < ttl:
+            res["status"], res["data"] = "cache", cached_body()
+        else:
+            req = urllib.request.Request(url, headers={"User-Agent": "mia-kalkulator"})
+            if meta and meta.get("etag"):
+                req.add_header("If-None-Match", meta["etag"])
+            if meta and meta.get("last_modified"):
+                req.add_header("If-Modified-Since", meta["last_modified"])
+            try:
+                with urllib.request.urlopen(req, timeout=timeout) as resp:
+                    data = resp.read()
+                    _write_atomic(body_path, data)
+                    _write_meta(meta_path, {
+                        "url": url, "fetched_at": time.time(),
+                        "etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified"),
+                    })
+                    res["status"], res["data"] = "200", data
+            except urllib.error.HTTPError as e:
+                if e.code != 304 or not meta:
+                    raise
+                meta["fetched_at"] = time.time()
+                _write_meta(meta_path, meta)
+                res["status"], res["data"] = "304", cached_body()
+    except Exception as e:
+        res["error"] = f"{type(e).__name__}: {e}"
+        if meta:
+            res["status"], res["data"] = "stale", cached_body()
+    res["seconds"] = time.perf_counter() - t0
+    res["bytes"] = len(res["data"] or b"")
+    return res
+
+
+def fetch_sources(urls: dict, cache_dir=DEFAULT_CACHE_DIR, ttl=300, timeout=20, max_workers=8):
+    """Dohvati sve zadane izvore ({ime: url}, prazni se preskaču) paralelno; vraća {ime: rezultat}."""
+    jobs = {name: url for name, url in urls.items() if url}
+    if not jobs:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs))) as ex:
+        futs = {name: ex.submit(fetch_one, name, url, cache_dir, ttl, timeout) for name, url in jobs.items()}
+        return {name: f.result() for name, f in futs.items()}
@@ -0,0 +1,70 @@
+"""Stupčani uvoz CSV cjenika (pandas): tipovi po stupcu + izvještaj o lošim retcima.
+
+Zamjena za ``from_csv_rows`` nad ``to_dict(orient="records")``: decimalni zarez
+se zamjenjuje jednom operacijom po stupcu, a neispravne cijene se ne pretvaraju
+tiho u 0 nego se prijavljuju po retku (vrijednost ostaje 0.0 da struktura
+cjenika bude ista kao prije).
+"""
+import io
+
+from .cjenik import CSV_SCHEMA_ART, CSV_SCHEMA_DOD, CSV_SCHEMA_MAT, CSV_SCHEMA_TRAKA, CSV_SCHEMA_USL, to_float
+
+# grupa cjenika -> shema (stupac -> konverter)
+SCHEMAS = {
+    "materijali": CSV_SCHEMA_MAT, "abs_trake": CSV_SCHEMA_TRAKA,
+    "materijali_fronta": CSV_SCHEMA_MAT, "abs_trake_fronta": CSV_SCHEMA_TRAKA,
+    "usluge": CSV_SCHEMA_USL, "okov": CSV_SCHEMA_ART, "oprema": CSV_SCHEMA_ART, "dodatci": CSV_SCHEMA_DOD,
+}
+
+
+def read_csv_frame(source, sep=","):
+    """CSV (bajtovi, putanja ili file) → DataFrame samo sa stringovima (šifre poput '001' ostaju netaknute)."""
+    import pandas as pd
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    df = pd.read_csv(source, dtype=str, keep_default_na=False, sep=sep)
+    df.columns = [str(c).strip() for c in df.columns]
+    return df
+
+
+def frame_to_items(df, schema, name=""):
+    """DataFrame → (zapisi, greške) prema shemi ``{stupac: str | to_float}``.
+
+    Greške su dictovi {izvor, redak, stupac, vrijednost, greska}; ``redak`` je
+    broj retka u CSV-u (zaglavlje je redak 1).
+    """
+    import pandas as pd
+    n = len(df)
+    cols, errors = {}, []
+    for col, conv in schema.items():
+        raw = df[col].astype(str).str.strip() if col in df.columns else pd.Series([""] * n, index=df.index, dtype=str)
+        if conv is to_float:
+            num = pd.to_numeric(raw.str.replace(",", ".", regex=False), errors="coerce")
+            bad = num.isna().to_numpy()
+            if bad.any():
+                for pos in bad.nonzero()[0]:
+                    val = raw.iat[pos]
+                    errors.append({"izvor": name, "redak": int(pos) + 2, "stupac": col, "vrijednost": val,
+                                   "greska": "nedostaje stupac" if col not in df.columns else
+                                             ("prazna vrijednost" if val == "" else "nije broj")})
+            cols[col] = num.fillna(0.0).astype(float).tolist()
+        else:
+            cols[col] = raw.tolist()
+    keys = tuple(cols)
+    items = [dict(zip(keys, vals)) for vals in zip(*cols.values())]
+    return items, errors
+
+
+def csv_to_items(source, name):
+    """CSV izvor za grupu cjenika ``name`` (npr. 'materijali') → (zapisi, greške)."""
+    return frame_to_items(read_csv_frame(source), SCHEMAS[name], name)
+
+
+def cjenik_from_csv_sources(sources: dict):
+    """{grupa: CSV bajtovi/putanja} → (podaci za ``normalize_cjenik``, sve greške)."""
+    data, errors = {}, []
+    for name, source in sources.items():
+        items, errs = csv_to_items(source, name)
+        data[name] = items
+        errors.extend(errs)
+    return data, errors
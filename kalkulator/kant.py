@@ -0,0 +1,67 @@
+"""Pravila kantiranja: tablica pravila → cjelobrojni kod po nazivu elementa.
+
+Jedno mjesto za ``calculate``, prikaz u editoru (``auto_kant_counts``), XLSX
+izvoz i stupčani izračun. Naziv se klasificira jednom (cache po nazivu), a u
+petlji se koristi samo kod.
+"""
+from functools import lru_cache
+
+RULE_MANUAL = 0   # ručno: kant_dugi / kant_kratki iz retka
+RULE_1D2K = 1     # Pod, Kapa (bez povez), Haupt horizontalni
+RULE_1D1K = 2     # Stranica, Haupt vertikalni
+RULE_2D2K = 3     # Polica, Fronta
+
+# kod -> (dugi, kratki); RULE_MANUAL uzima brojeve iz retka
+RULE_COUNTS = {
+    RULE_MANUAL: (0, 0),
+    RULE_1D2K: (1, 2),
+    RULE_1D1K: (1, 1),
+    RULE_2D2K: (2, 2),
+}
+
+# (počinje s, mora sadržavati, ne smije sadržavati, kod) – prvo pravilo koje odgovara pobjeđuje
+RULES = (
+    ("pod",      (),                         (),         RULE_1D2K),
+    ("kapa",     (),                         ("povez",), RULE_1D2K),
+    ("",         ("haupt", "horizontalni"),  (),         RULE_1D2K),
+    ("stranica", (),                         (),         RULE_1D1K),
+    ("",         ("haupt", "vertikalni"),    (),         RULE_1D1K),
+    ("polica",   (),                         (),         RULE_2D2K),
+    ("fronta",   (),                         (),         RULE_2D2K),
+)
+
+
+def kant_length_mm_longshort(w, d, long_cnt:int, short_cnt:int):
+    long_e = max(w, d); short_e = min(w, d)
+    long_cnt = max(0, min(2, int(long_cnt))); short_cnt = max(0, min(2, int(short_cnt)))
+    return long_cnt * long_e + short_cnt * short_e
+
+
+@lru_cache(maxsize=4096)
+def classify(naziv: str) -> int:
+    """Auto pravilo za naziv elementa (``RULE_MANUAL`` ako nijedno ne odgovara)."""
+    nz = str(naziv or "").strip().lower()
+    for prefix, need, forbid, code in RULES:
+        if nz.startswith(prefix) and all(s in nz for s in need) and not any(s in nz for s in forbid):
+            return code
+    return RULE_MANUAL
+
+
+def edge_rule_code(naziv: str, auto: bool) -> int:
+    return classify(naziv) if auto else RULE_MANUAL
+
+
+def rule_counts(code: int, A: float, B: float, dugi=0, kratki=0):
+    """(dugi, kratki) za prikaz: ručno = brojevi iz retka (0–2); 1D2K se okreće kad je A < B."""
+    if code == RULE_MANUAL:
+        return max(0, min(2, int(dugi or 0))), max(0, min(2, int(kratki or 0)))
+    d, k = RULE_COUNTS[code]
+    return (d, k) if code != RULE_1D2K or A >= B else (k, d)
+
+
+def kant_mm(code: int, A: float, B: float, dugi=0, kratki=0):
+    """Duljina kantiranja jednog komada u mm (duge stranice × dugi + kratke × kratki)."""
+    if code == RULE_MANUAL:
+        return kant_length_mm_longshort(A, B, dugi, kratki)
+    d, k = RULE_COUNTS[code]
+    return kant_length_mm_longshort(A, B, d, k)
@@ -0,0 +1,278 @@
+"""Asyncio micro-batching ispred izračuna: istodobni mali zahtjevi → jedan stupčani prolaz.
+
+``MicroBatcher`` skuplja zahtjeve dok ne prođe ``max_wait_ms`` od prvog u nizu
+ili dok ih ne bude ``max_batch``, preda cijeli niz funkciji ``handler(items)`` i
+vrati svakom pozivatelju njegov rezultat. Dok se jedan niz računa, sljedeći se
+već skuplja, pa pod opterećenjem nizovi rastu sami od sebe, a bez opterećenja
+zahtjev čeka najviše ``max_wait_ms``:
+
+* ``max_wait_ms`` ↑ → veći nizovi, veća propusnost, veća latencija pojedinog zahtjeva
+* ``max_batch`` ograničava najgoru latenciju jednog niza (i memoriju)
+
+``BatchPricer`` je handler za ponude: specovi se grupiraju po uslugama
+(rezanje, kantiranje) i računaju ``vektor.calculate_many``, a zbrojevi istim
+``finish_quote`` kao ``engine.quote`` – rezultat je isti kao pojedinačni ``quote``.
+
+    python -m kalkulator.microbatch -n 5000 -c 200 --batch 1,16,64,256 --wait 0,1,2,5
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import threading
+import time
+
+from .cache import LRUCache
+from .catalog import compile_catalog
+from .engine import DERIVE_KEYS, derive_rows, finish_quote, quote, resolve_spec
+from .parts import as_parts
+from .timing import percentiles
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+
+
+class MicroBatcher:
+    """Skuplja istodobne ``submit`` pozive u nizove za ``handler(items) -> [rezultat | Exception]``.
+
+    ``executor`` (npr. ``ThreadPoolExecutor(1)``) računa niz izvan event loopa;
+    bez njega se niz računa u loopu (dovoljno kad je niz ispod milisekunde).
+    """
+
+    def __init__(self, handler, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS, executor=None):
+        self.handler = handler
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+        self._pending = []
+        self._wake = None
+        self._full = None
+        self._task = None
+        self._loop = None
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+
+    # --- život ---
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wake, self._full = asyncio.Event(), asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for _, fut in self._pending:
+            if not fut.done():
+                fut.cancel()
+        self._pending = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def start_in_thread(self):
+        """Pokreni vlastiti event loop u pozadinskoj dretvi (za sinkroni kod, npr. HTTP server)."""
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="microbatch", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def submit_sync(self, item, timeout=None):
+        """``submit`` iz druge dretve (nakon ``start_in_thread``); blokira do rezultata."""
+        return asyncio.run_coroutine_threadsafe(self.submit(item), self._loop).result(timeout)
+
+    # --- zahtjevi ---
+    async def submit(self, item):
+        fut = self._loop.create_future()
+        self._pending.append((item, fut))
+        self._wake.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await fut
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            if self.max_wait and len(self._pending) < self.max_batch:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            if len(self._pending) < self.max_batch:
+                self._full.clear()
+            if not self._pending:
+                self._wake.clear()
+            batch = [(item, fut) for item, fut in batch if not fut.cancelled()]
+            if batch:
+                await self._dispatch(batch)
+
+    async def _dispatch(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            if self.executor is not None:
+                results = await self._loop.run_in_executor(self.executor, self.handler, items)
+            else:
+                results = self.handler(items)
+        except Exception as e:
+            results = [e] * len(items)
+        self.batches += 1
+        self.items += len(items)
+        self.max_seen = max(self.max_seen, len(items))
+        for (_, fut), res in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(res, Exception):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+    def stats(self):
+        return {"nizova": self.batches, "zahtjeva": self.items,
+                "prosjek_niza": round(self.items / self.batches, 2) if self.batches else None,
+                "najveci_niz": self.max_seen, "max_batch": self.max_batch, "max_wait_ms": self.max_wait * 1000.0}
+
+
+class BatchPricer:
+    """Handler za ``MicroBatcher``: zahtjevi ``{"spec", "rows"?, "okov_rows"?, ...}`` → rezultati ``quote``."""
+
+    def __init__(self, cje, idx=None):
+        self.cje = cje
+        self.idx = idx or compile_catalog(cje)
+        self._pb = LRUCache(maxsize=32)       # pricebook_arrays po (rezanje, kantiranje)
+
+    def _arrays(self, rez_usl, kant_usl):
+        from .vektor import pricebook_arrays
+        idx = self.idx
+        return self._pb.get_or_compute((rez_usl, kant_usl), lambda: pricebook_arrays(
+            idx["MATS"], idx["TRAK"], idx["FRONTS"], idx["FTRAK"], idx["USLG"], rez_usl, kant_usl))
+
+    def __call__(self, items):
+        from .vektor import calculate_many
+        out = [None] * len(items)
+        groups = {}
+        prepared = []
+        for i, body in enumerate(items):
+            try:
+                s = resolve_spec(body.get("spec"), self.idx)
+                rows = body.get("rows")
+                rows = as_parts(rows) if rows else derive_rows(*[s[k] for k in DERIVE_KEYS])
+                if s["rez_usl"] not in self.idx["USLG"] or s["kant_usl"] not in self.idx["USLG"]:
+                    raise KeyError(f"nepoznata usluga {s['rez_usl']!r} / {s['kant_usl']!r}")
+            except Exception as e:
+                out[i] = e
+                continue
+            prepared.append((i, body, s, rows))
+            groups.setdefault((s["rez_usl"], s["kant_usl"]), []).append(len(prepared) - 1)
+        for (rez_usl, kant_usl), members in groups.items():
+            try:
+                priced = calculate_many([prepared[j][3] for j in members], self._arrays(rez_usl, kant_usl))
+            except Exception as e:
+                for j in members:
+                    out[prepared[j][0]] = e
+                continue
+            for j, (report, metrics) in zip(members, priced):
+                i, body, s, rows = prepared[j]
+                try:
+                    out[i] = finish_quote(s, rows, report, metrics, body.get("okov_rows") or (),
+                                          body.get("oprema_rows") or (), body.get("dodatci_rows") or (), self.idx)
+                except Exception as e:
+                    out[i] = e
+        return out
+
+
+# =============== Benchmark ===============
+async def _closed_loop(submit, bodies, concurrency):
+    """``concurrency`` klijenata šalje zahtjeve jedan za drugim → (latencije ms, sekunde)."""
+    it = iter(bodies)
+    lat = []
+
+    async def client():
+        for body in it:
+            t = time.perf_counter()
+            await submit(body)
+            lat.append((time.perf_counter() - t) * 1000.0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    return lat, time.perf_counter() - t0
+
+
+def run_benchmark(n=5000, concurrency=200, batches=(1, 16, 64, 256), waits=(0.0, 1.0, 2.0, 5.0),
+                  cje=None, seed=0, out=sys.stderr):
+    """Propusnost i latencije za svaku kombinaciju ``max_batch`` × ``max_wait_ms``; vraća listu redaka.
+
+    Prvi redak ("pojedinačno") je ``quote`` po zahtjevu kroz isti event loop, bez skupljanja.
+    """
+    from .bench import synthetic_cjenik, synthetic_specs
+    from .cjenik import normalize_cjenik
+    cje = cje or normalize_cjenik(synthetic_cjenik(100))
+    idx = compile_catalog(cje)
+    bodies = [{"spec": s} for s in synthetic_specs(n, idx, seed=seed)]
+    pricer = BatchPricer(cje, idx)
+
+    async def single(body):
+        await asyncio.sleep(0)          # isti prelazak kroz loop kao kod batchera
+        return quote(body["spec"], cje, idx=idx)
+
+    rows = []
+
+    def record(name, b, w, lat, dt, st=None):
+        p = percentiles(lat)
+        row = {"nacin": name, "max_batch": b, "max_wait_ms": w, "zahtjeva_s": round(len(lat) / dt, 1),
+               "p50_ms": round(p["p50"], 2), "p99_ms": round(p["p99"], 2), "srednje_ms": round(statistics.fmean(lat), 2),
+               "prosjek_niza": st["prosjek_niza"] if st else 1}
+        rows.append(row)
+        print(f"{name:<14} batch {b:>4}  wait {w:>4} ms  {row['zahtjeva_s']:>9} zaht/s  "
+              f"p50 {row['p50_ms']:>7} ms  p99 {row['p99_ms']:>7} ms  niz ≈ {row['prosjek_niza']}", file=out, flush=True)
+
+    async def main():
+        lat, dt = await _closed_loop(single, bodies, concurrency)
+        record("pojedinačno", 1, 0, lat, dt)
+        for b in batches:
+            for w in waits:
+                async with MicroBatcher(pricer, max_batch=b, max_wait_ms=w) as mb:
+                    lat, dt = await _closed_loop(mb.submit, bodies, concurrency)
+                    record("micro-batch", b, w, lat, dt, mb.stats())
+
+    asyncio.run(main())
+    return rows
+
+
+def _floats(s):
+    return tuple(float(x) for x in s.split(",") if x.strip())
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.microbatch",
+                                 description="Benchmark micro-batchinga ponuda (latencija ↔ propusnost).")
+    ap.add_argument("-n", type=int, default=5000, help="broj zahtjeva po mjerenju")
+    ap.add_argument("-c", "--concurrency", type=int, default=200, help="istodobnih klijenata")
+    ap.add_argument("--batch", default="1,16,64,256", help="max_batch vrijednosti (zarezom)")
+    ap.add_argument("--wait", default="0,1,2,5", help="max_wait_ms vrijednosti (zarezom)")
+    args = ap.parse_args(argv)
+    run_benchmark(args.n, args.concurrency, tuple(int(b) for b in _floats(args.batch)), _floats(args.wait))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Krojenje ploča (nesting): giljotinski raspored elemenata po materijalu.
+
+Elementi iz ``derive_rows`` (ili ručno uređeni retci) se grupiraju po ``mat`` i
+slažu na ploče zadane veličine u dvije faze reza kao na formatnoj pili:
+ploča se reže poprečno na trake (visina trake = najviši element u njoj), a
+trake uzdužno na elemente. Slaganje je FFDH (first-fit decreasing height), pa je
+složenost O(n · broj traka) – nekoliko tisuća elemenata traje djelić sekunde.
+
+Koordinate: ``x`` ide po duljini ploče (``ploca_A``, smjer vlakana), ``y`` po širini.
+Uz ``vlakno=True`` dimenzija ``A_mm`` elementa uvijek ide po ``x`` (bez rotacije).
+"""
+from .engine import mm2_to_m2
+
+DEFAULT_PLOCA = (2800, 2070)
+DEFAULT_KERF_MM = 4.0
+
+
+class _Strip:
+    __slots__ = ("ploca", "y", "h", "used", "parts")
+
+    def __init__(self, ploca, y, h):
+        self.ploca = ploca; self.y = y; self.h = h
+        self.used = 0.0
+        self.parts = []
+
+
+def _expand(rows, po_duljini):
+    """Retci → lista (h, w, naziv, rotirano) po komadu; h je visina u traci (po y).
+
+    ``po_duljini``: A uvijek po duljini ploče; inače je niža strana visina trake.
+    """
+    out = []
+    for r in rows:
+        A = float(r["A_mm"]); B = float(r["B_mm"]); k = int(r.get("kom", 1))
+        if A <= 0 or B <= 0 or k <= 0:
+            continue
+        naziv = str(r.get("naziv", ""))
+        if po_duljini or B <= A:
+            item = (B, A, naziv, False)
+        else:
+            item = (A, B, naziv, True)
+        out.extend([item] * k)
+    return out
+
+
+def _pack(parts, L, Wb, kerf, rotate):
+    """FFDH: trake po padajućoj visini, prva traka / prva ploča u koju stane."""
+    parts.sort(key=lambda p: (p[0], p[1]), reverse=True)
+    strips, board_free, oversize = [], [], []
+    for h, w, naziv, rot in parts:
+        if not (w <= L and h <= Wb):
+            if rotate and h <= L and w <= Wb:
+                h, w, rot = w, h, not rot
+            else:
+                oversize.append({"naziv": naziv, "A_mm": h if rot else w, "B_mm": w if rot else h})
+                continue
+        placed = False
+        for s in strips:
+            if s.h < h:
+                continue
+            if s.used + w <= L:
+                s.parts.append((s.used, w, h, naziv, rot)); s.used += w + kerf
+                placed = True
+                break
+            # okrenut element može stati u višu traku
+            if rotate and w <= s.h and s.used + h <= L:
+                s.parts.append((s.used, h, w, naziv, not rot)); s.used += h + kerf
+                placed = True
+                break
+        if placed:
+            continue
+        for b, free_y in enumerate(board_free):
+            if free_y >= h:
+                break
+        else:
+            b = len(board_free); board_free.append(Wb)
+        s = _Strip(b, Wb - board_free[b], h)
+        board_free[b] -= h + kerf
+        s.parts.append((0.0, w, h, naziv, rot)); s.used = w + kerf
+        strips.append(s)
+    return strips, board_free, oversize
+
+
+def nest_material(rows, ploca=DEFAULT_PLOCA, kerf=DEFAULT_KERF_MM, obrub=0.0, vlakno=False):
+    """Složi elemente jednog materijala na ploče; vraća dict s brojem ploča, otpadom i rasporedom.
+
+    ``ploca`` je (duljina, širina) u mm, ``kerf`` debljina pile, ``obrub`` rub koji
+    se obrezuje sa svake strane ploče. Elementi veći od ploče idu u ``prevelik``.
+    Bez vlakana se probaju obje orijentacije i uzima se raspored s manje ploča.
+    """
+    L = float(ploca[0]) - 2 * obrub
+    Wb = float(ploca[1]) - 2 * obrub
+    if vlakno:
+        strips, board_free, oversize = _pack(_expand(rows, True), L, Wb, kerf, False)
+    else:
+        tries = [_pack(_expand(rows, po_duljini), L, Wb, kerf, True) for po_duljini in (False, True)]
+        # manje ploča, pa više mjesta ostalo na zadnjoj ploči
+        strips, board_free, oversize = min(tries, key=lambda t: (len(t[2]), len(t[1]), -min(t[1], default=0)))
+
+    boards = len(board_free)
+    layout = [{"ploca": s.ploca + 1, "x": obrub + x, "y": obrub + s.y, "dx": pw, "dy": ph,
+               "naziv": naziv, "rotirano": rot}
+              for s in strips for (x, pw, ph, naziv, rot) in s.parts]
+    layout.sort(key=lambda p: (p["ploca"], p["y"], p["x"]))
+    parts_area = mm2_to_m2(sum(p["dx"] * p["dy"] for p in layout))
+    board_area = mm2_to_m2(float(ploca[0]) * float(ploca[1])) * boards
+    waste = board_area - parts_area
+    return {
+        "ploce": boards,
+        "ploca_mm": (ploca[0], ploca[1]),
+        "povrsina_elemenata_m2": parts_area,
+        "povrsina_ploca_m2": board_area,
+        "otpad_m2": waste,
+        "otpad_pct": (100.0 * waste / board_area) if board_area else 0.0,
+        "trake": len(strips),
+        "raspored": layout,
+        "prevelik": oversize,
+    }
+
+
+def nest_rows(rows, ploca=DEFAULT_PLOCA, kerf=DEFAULT_KERF_MM, obrub=0.0, vlakno=False, ploce_po_mat=None):
+    """Krojna lista za sve materijale: {"materijali": {mat: rezultat}, "ploce", "otpad_m2", ...}.
+
+    ``vlakno`` je bool ili skup šifri materijala sa smjerom vlakana;
+    ``ploce_po_mat`` opcionalno daje drugačiju veličinu ploče po šifri materijala.
+    """
+    by_mat = {}
+    for r in rows:
+        by_mat.setdefault(r["mat"], []).append(r)
+    res = {}
+    for mat, mrows in by_mat.items():
+        grain = (mat in vlakno) if isinstance(vlakno, (set, frozenset, list, tuple)) else bool(vlakno)
+        size = (ploce_po_mat or {}).get(mat, ploca)
+        res[mat] = nest_material(mrows, size, kerf, obrub, grain)
+    return {
+        "materijali": res,
+        "ploce": sum(m["ploce"] for m in res.values()),
+        "povrsina_elemenata_m2": sum(m["povrsina_elemenata_m2"] for m in res.values()),
+        "povrsina_ploca_m2": sum(m["povrsina_ploca_m2"] for m in res.values()),
+        "otpad_m2": sum(m["otpad_m2"] for m in res.values()),
+        "prevelik": [dict(p, mat=mat) for mat, m in res.items() for p in m["prevelik"]],
+    }
+
+
+def nesting_waste_eur(nest, MATS, FRONTS):
+    """€ otpada ploča = otpad m² × cijena materijala po m² (po materijalu)."""
+    total = 0.0
+    for mat, m in nest["materijali"].items():
+        obj = MATS.get(mat) or FRONTS.get(mat) or {}
+        total += (obj.get("cijena_eur_po_m2") or 0.0) * m["otpad_m2"]
+    return total
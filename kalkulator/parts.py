@@ -0,0 +1,89 @@
+"""Kompaktni zapisi elemenata: ``Part`` (ulaz) i ``PartCost`` (redak izračuna).
+
+Oba su ``__slots__`` objekti umjesto dictova – nekoliko puta manje memorije po
+elementu kod projekata s tisućama elemenata – a ponašaju se kao read-only
+mapping (``r["A_mm"]``, ``r.get(...)``, ``dict(r)``, ``csv.DictWriter``), pa
+postojeći kod i izvozi rade bez promjena. Dictovi/DataFrameovi za prikaz
+grade se tek u UI-ju.
+"""
+from collections.abc import Mapping
+
+PART_FIELDS = ("naziv", "mat", "traka", "A_mm", "B_mm", "kom", "kant_dugi", "kant_kratki", "auto")
+
+# stupci izvještaja (ključevi retka kao u calculate) -> atribut
+REPORT_COLS = ("Naziv", "Oznaka", "Mat", "Traka", "A (mm)", "B (mm)", "Kom",
+               "Kant m", "Rezanje m", "Površina m²", "€ Materijal", "€ Traka", "€ Usl. kant", "€ Rezanje",
+               "€ Element (ukupno)")
+_REPORT_ATTRS = ("naziv", "oznaka", "mat", "traka", "A", "B", "kom",
+                 "kant_m", "rezanje_m", "povrsina_m2", "eur_materijal", "eur_traka", "eur_usl_kant", "eur_rezanje",
+                 "eur_element")
+_REPORT_ATTR = dict(zip(REPORT_COLS, _REPORT_ATTRS))
+
+
+class Part(Mapping):
+    """Jedan element korpusa (ključevi kao retci iz ``derive_rows``)."""
+
+    __slots__ = PART_FIELDS
+
+    def __init__(self, naziv, mat, traka, A_mm, B_mm, kom, kant_dugi=0, kant_kratki=0, auto=False):
+        self.naziv = naziv; self.mat = mat; self.traka = traka
+        self.A_mm = A_mm; self.B_mm = B_mm; self.kom = kom
+        self.kant_dugi = kant_dugi; self.kant_kratki = kant_kratki; self.auto = auto
+
+    @classmethod
+    def from_row(cls, r):
+        """Dict (npr. redak iz editora, s viškom ključeva poput 'oznaka') → ``Part``."""
+        if isinstance(r, cls):
+            return r
+        return cls(r.get("naziv", ""), r.get("mat"), r.get("traka"), r.get("A_mm", 0), r.get("B_mm", 0),
+                   r.get("kom", 1), r.get("kant_dugi", 0), r.get("kant_kratki", 0), r.get("auto", False))
+
+    def __getitem__(self, key):
+        if key in PART_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(PART_FIELDS)
+
+    def __len__(self):
+        return len(PART_FIELDS)
+
+    def __reduce__(self):
+        return (Part, tuple(getattr(self, f) for f in PART_FIELDS))
+
+    def __repr__(self):
+        return f"Part({', '.join(f'{f}={getattr(self, f)!r}' for f in PART_FIELDS)})"
+
+
+class PartCost(Mapping):
+    """Redak izvještaja iz ``calculate``; ključevi su nazivi stupaca (``REPORT_COLS``)."""
+
+    __slots__ = _REPORT_ATTRS
+
+    def __init__(self, *values):
+        for attr, v in zip(_REPORT_ATTRS, values):
+            setattr(self, attr, v)
+
+    def __getitem__(self, key):
+        attr = _REPORT_ATTR.get(key)
+        if attr is None:
+            raise KeyError(key)
+        return getattr(self, attr)
+
+    def __iter__(self):
+        return iter(REPORT_COLS)
+
+    def __len__(self):
+        return len(REPORT_COLS)
+
+    def __reduce__(self):
+        return (PartCost, tuple(getattr(self, a) for a in _REPORT_ATTRS))
+
+    def __repr__(self):
+        return f"PartCost({dict(self)!r})"
+
+
+def as_parts(rows):
+    """Lista dictova/Partova → lista ``Part``."""
+    return [Part.from_row(r) for r in rows]
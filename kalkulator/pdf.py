@@ -0,0 +1,259 @@
+"""PDF ponude: jedan renderer po procesu (fontovi, stilovi i stilovi tablica grade se jednom).
+
+    from kalkulator.pdf import get_renderer
+    pdf_bytes = get_renderer().ponuda_from_quote(q)              # bajtovi
+    get_renderer().ponuda_from_quote(q, output="ponuda.pdf")     # ravno u datoteku
+
+DejaVu fontovi (dijakritika) traže se u ``fonts/`` (radni direktorij ili korijen
+projekta), u ``$KALKULATOR_FONTS`` i u sistemskom DejaVu direktoriju; bez njih se
+koristi Helvetica uz transliteraciju (č → c). Znakovi kojih nema u fontu (emoji u
+naslovima) se izostavljaju umjesto da se crtaju kao crni kvadratići.
+"""
+import datetime
+import io
+import os
+import unicodedata
+from functools import lru_cache
+
+FONT_FILES = {"regular": "DejaVuSans.ttf", "bold": "DejaVuSans-Bold.ttf"}
+SYSTEM_FONT_DIRS = ("/usr/share/fonts/truetype/dejavu", "/usr/share/fonts/dejavu", "/Library/Fonts")
+# od ovoliko elemenata tablica se dijeli u blokove (reportlab dijeljenje jedne goleme tablice je sporo)
+TABLE_CHUNK_ROWS = 400
+
+REPORT_HEADER = ["Naziv","Oznaka","Mat","Traka","A (mm)","B (mm)","Kom",
+                 "Kant m","Rezanje m","Površina m²","€ Materijal","€ Traka","€ Usl. kant","€ Rezanje","€ Element (ukupno)"]
+_TRANSLIT = {"đ": "dj", "Đ": "Dj", "€": "EUR", "²": "2", "×": "x", "—": "-", "–": "-"}
+
+
+def font_dirs():
+    here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = os.environ.get("KALKULATOR_FONTS")
+    return [d for d in (env, "fonts", os.path.join(here, "fonts"), *SYSTEM_FONT_DIRS) if d]
+
+
+def _pdf_title_korpus(W, H, D, include_fronta, fronta_tip, fronta_montaza):
+    dims = f"Korpus H={int(H)}mm × W={int(W)}mm × D={int(D)}mm"
+    if include_fronta:
+        krila = "2F" if str(fronta_tip).lower().startswith("dvokrilna") else "1F"
+        mont = "Unutarnja" if str(fronta_montaza).lower().startswith("unut") else "Vanjska"
+        return f"{dims} — {krila} ({mont})"
+    return f"{dims} — bez fronte"
+
+
+class PdfRenderer:
+    """Fontovi, stilovi odlomaka i tablica; ``ponuda(...)`` gradi PDF (bajtovi ili datoteka)."""
+
+    def __init__(self, dirs=None):
+        from reportlab.lib import colors
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.lib.units import mm
+        from reportlab.platypus import TableStyle
+
+        self.font, self.font_bold, self.font_path = self._register_fonts(dirs or font_dirs())
+        self._covered = self._coverage()
+        self.text = lru_cache(maxsize=8192)(self._text)
+
+        base = getSampleStyleSheet()
+        self.styles = {
+            "Normal": ParagraphStyle("Normal", parent=base["Normal"], fontName=self.font),
+            "H1": ParagraphStyle(name="H1", fontName=self.font_bold, fontSize=16, leading=20, spaceAfter=6),
+            "H2": ParagraphStyle(name="H2", fontName=self.font_bold, fontSize=12, leading=16, spaceBefore=8, spaceAfter=4),
+        }
+
+        grid = colors.HexColor("#e5e7eb"); head = colors.HexColor("#f3f4f6")
+        fonts = [("FONTNAME", (0, 0), (-1, -1), self.font)]
+        self.table_styles = {
+            "kv": TableStyle(fonts + [
+                ("GRID", (0, 0), (-1, -1), 0.5, grid),
+                ("BACKGROUND", (0, 0), (-1, 0), head),
+            ]),
+            "report": TableStyle(fonts + [
+                ("GRID", (0,0), (-1,-1), 0.25, grid),
+                ("BACKGROUND", (0,0), (-1,0), head),
+                ("ALIGN", (1,1), (-1,-1), "CENTER"),
+                ("ALIGN", (0,1), (0,-1), "LEFT"),
+            ]),
+            "ms": TableStyle(fonts + [
+                ("GRID", (0,0), (-1,-1), 0.5, grid),
+                ("BACKGROUND", (0,0), (-1,0), head),
+                ("ALIGN", (1,1), (-1,-1), "CENTER"),
+                ("ALIGN", (0,0), (0,-1), "LEFT"),
+            ]),
+            "fin": TableStyle([
+                ("FONTNAME", (0, 0), (-1, -1), self.font),
+                ("GRID", (0,0), (-1,-1), 0.5, grid),
+                ("BACKGROUND", (0,4), (-1,4), colors.HexColor("#effbf1")),
+                ("ALIGN", (0,0), (-1,-1), "CENTER"),
+                ("ALIGN", (0,0), (0,-1), "LEFT"),
+            ]),
+        }
+        self.col_widths = {
+            "kv": [70 * mm, 80 * mm],
+            "report": [28*mm,12*mm,18*mm,18*mm,14*mm,14*mm,10*mm,16*mm,16*mm,16*mm,18*mm,16*mm,18*mm,16*mm,22*mm],
+            "ms": [80*mm, 35*mm, 45*mm],
+            "fin": [100*mm, 60*mm],
+        }
+        self.margins = dict(leftMargin=14 * mm, rightMargin=14 * mm, topMargin=18 * mm, bottomMargin=18 * mm)
+
+    # --- fontovi ---
+    @staticmethod
+    def _register_fonts(dirs):
+        from reportlab.lib.fonts import addMapping
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        for d in dirs:
+            regular = os.path.join(d, FONT_FILES["regular"])
+            if not os.path.isfile(regular):
+                continue
+            bold = os.path.join(d, FONT_FILES["bold"])
+            try:
+                pdfmetrics.registerFont(TTFont("DejaVuSans", regular))
+                bold_name = "DejaVuSans"
+                if os.path.isfile(bold):
+                    pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", bold))
+                    bold_name = "DejaVuSans-Bold"
+            except Exception:
+                continue
+            addMapping("DejaVuSans", 0, 0, "DejaVuSans"); addMapping("DejaVuSans", 1, 0, bold_name)
+            return "DejaVuSans", bold_name, regular
+        return "Helvetica", "Helvetica-Bold", None
+
+    def _coverage(self):
+        """Skup kodnih točaka koje font može nacrtati (None = provjera preko cp1252)."""
+        if self.font_path is None:
+            return None
+        from reportlab.pdfbase import pdfmetrics
+        return frozenset(pdfmetrics.getFont(self.font).face.charToGlyph)
+
+    def _has(self, ch):
+        if self._covered is None:
+            try:
+                ch.encode("cp1252")
+                return True
+            except UnicodeEncodeError:
+                return False
+        return ord(ch) in self._covered
+
+    def _text(self, s):
+        """Tekst koji font može nacrtati: nepodržani znakovi → transliteracija ili ispuštanje."""
+        s = str(s)
+        if s.isascii():
+            return s
+        out = []
+        for ch in s:
+            if self._has(ch):
+                out.append(ch)
+            elif ch in _TRANSLIT:
+                out.append(_TRANSLIT[ch])
+            else:
+                base = unicodedata.normalize("NFKD", ch)[:1]
+                if base and base != ch and self._has(base):
+                    out.append(base)
+        return "".join(out).strip()
+
+    # --- dijelovi ponude ---
+    def _table(self, rows, kind, repeat=0):
+        from reportlab.platypus import Table
+        t = Table(rows, colWidths=self.col_widths[kind], repeatRows=repeat)
+        t.setStyle(self.table_styles[kind])
+        return t
+
+    def _heading(self, text):
+        from reportlab.platypus import Paragraph
+        return Paragraph(self.text(text), self.styles["H2"])
+
+    def report_tables(self, report):
+        """Elementi u blokovima od ``TABLE_CHUNK_ROWS`` redaka (svaki s zaglavljem, dijeli se po stranicama)."""
+        header = [self.text(h) for h in REPORT_HEADER]
+        text = self.text
+        rows = [[text(r.get(k, "")) for k in REPORT_HEADER] for r in report]
+        return [self._table([header] + rows[i:i + TABLE_CHUNK_ROWS], "report", repeat=1)
+                for i in range(0, len(rows), TABLE_CHUNK_ROWS)]
+
+    def ponuda(self, report, metrics, mats_services_total, extras_total, labor_total, use_markup, markup_pct,
+               W, H, D, n_police, waste_pct, rok_dani,
+               include_back, pod_vrsta_vanjski, kapa_vrsta_vanjska, include_kapa_povez,
+               include_fronta, fronta_tip, fronta_montaza, output=None, eur_waste=None, ploce=None):
+        """PDF ponude → bajtovi; s ``output`` (putanja ili binarni file) piše izravno tamo i vraća ``output``.
+
+        ``eur_waste`` je otpad iz zbrojeva ponude (postotak ili krojna lista, ``use_waste``)
+        pa se redak "€ otpad" zbraja s "Materijal + usluge + otpad"; ``ploce`` je broj
+        ploča iz krojne liste (redak se ispisuje samo kad je zadan).
+        """
+        from reportlab.lib.pagesizes import A4
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+        title = _pdf_title_korpus(W, H, D, include_fronta, fronta_tip, fronta_montaza)
+        elems = [Paragraph(self.text(title), self.styles["H1"]),
+                 Paragraph(datetime.datetime.now().strftime("%d.%m.%Y."), self.styles["Normal"]),
+                 Spacer(1, 6)]
+
+        kv = [
+            ["Stavka", "Vrijednost"],
+            ["Širina (W)", f"{int(W)} mm"],
+            ["Visina (H)", f"{int(H)} mm"],
+            ["Dubina (D)", f"{int(D)} mm"],
+            ["Broj polica", f"{int(n_police)}"],
+            ["Leđa HDF", "DA" if include_back else "NE"],
+            ["Pod VANJSKI", "DA" if pod_vrsta_vanjski else "NE"],
+            ["Kapa VANJSKA", "DA" if kapa_vrsta_vanjska else "NE"],
+            ["Kapa_povez", "DA" if include_kapa_povez else "NE"],
+            ["Planirana isporuka", f"{int(rok_dani)} dana"],
+        ]
+        elems += [self._heading("📐 Osnovne postavke"),
+                  self._table([[self.text(c) for c in r] for r in kv], "kv"), Spacer(1, 6)]
+
+        if report:
+            elems += [self._heading("🧾 Elementi i troškovi (korpus)"), *self.report_tables(report), Spacer(1, 6)]
+
+        ms = metrics
+        if eur_waste is None:   # stari pozivi bez zbrojeva: postotak na materijal + traku
+            eur_waste = (waste_pct/100.0)*(ms['cijena_mat_eur'] + ms['cijena_kant_traka_eur'])
+        mats_rows = [
+            ["Stavka","Količina","Iznos (€)"],
+            ["m² iveral", f"{ms['iveral_area_m2']:.3f}", f"{ms['iveral_eur']:.2f}"],
+            ["m² HDF", f"{ms['hdf_area_m2']:.3f}", f"{ms['hdf_eur']:.2f}"],
+            ["m² ukupno", f"{ms['total_area_m2']:.3f}", f"{ms['cijena_mat_eur']:.2f}"],
+            ["Rezanje (m)", f"{ms['total_rezanje_m']:.3f}", f"{ms['cijena_rez_eur']:.2f}"],
+            ["Kantiranje (m)", f"{ms['total_kant_m']:.3f}", f"{ms['cijena_kant_traka_eur']:.2f}"],
+            ["€ usluga kantiranja", "", f"{ms['cijena_kant_usl_eur']:.2f}"],
+            ["€ otpad", "", f"{eur_waste:.2f}"],
+            ["Materijal + usluge + otpad", "", f"{mats_services_total:.2f}"],
+        ]
+        if ploce is not None:
+            mats_rows.insert(-2, ["Ploče (krojna lista)", f"{int(ploce)}", ""])
+        elems += [self._heading("📊 Materijal + usluge (korpus)"),
+                  self._table([[self.text(c) for c in r] for r in mats_rows], "ms"), Spacer(1, 6)]
+
+        pre_markup = mats_services_total + extras_total + labor_total
+        eur_markup = pre_markup * (markup_pct/100.0) if use_markup else 0.0
+        ukupno_pdf = pre_markup + eur_markup
+        fin = [
+            ["Okov + Oprema + Dodatci", f"{extras_total:.2f}"],
+            ["Rad (sati × €/h)", f"{labor_total:.2f}"],
+            ["Zbroj prije marže", f"{pre_markup:.2f}"],
+            [f"Marža ({markup_pct:.1f}% )" if use_markup else "Marža (0%)", f"{eur_markup:.2f}"],
+            ["UKUPNO", f"{ukupno_pdf:.2f}"],
+        ]
+        elems += [self._heading("🧾 Završni zbir"), self._table([[self.text(c) for c in r] for r in fin], "fin")]
+
+        target = io.BytesIO() if output is None else output
+        SimpleDocTemplate(target, pagesize=A4, **self.margins).build(elems)
+        return target.getvalue() if output is None else output
+
+    def ponuda_from_quote(self, q, output=None):
+        """PDF za rezultat ``engine.quote`` (batch, API)."""
+        s, t = q["spec"], q["totals"]
+        return self.ponuda(
+            q["report"], q["metrics"], t["mats_services_total"], t["extras_total"], t["labor_total"],
+            s["use_markup"], s["markup_pct"], s["W"], s["H"], s["D"], s["n_police"], s["waste_pct"], s["rok_dani"],
+            s["include_back"], s["pod_vrsta_vanjski"], s["kapa_vrsta_vanjska"], s["include_kapa_povez"],
+            s["include_fronta"], s["fronta_tip"], s["fronta_montaza"], output=output,
+            eur_waste=t["eur_waste"], ploce=t.get("ploce"))
+
+
+@lru_cache(maxsize=None)
+def get_renderer():
+    """Renderer za ovaj proces (stvara se pri prvom PDF-u)."""
+    return PdfRenderer()
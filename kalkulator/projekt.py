@@ -0,0 +1,205 @@
+"""Projekt s više korpusa (kuhinja, ormar…) s inkrementalnim zbrojevima.
+
+Svaki korpus se računa posebno (``quote``) i pamti se njegov doprinos po
+materijalu, traci i usluzi. Izmjena jednog korpusa računa samo taj korpus, a
+zbrojevi projekta se ažuriraju razlikom (stari doprinos van, novi unutra).
+Isti korpus (isti spec, elementi i dodatci) uzima se iz cachea.
+"""
+import itertools
+import math
+
+from .cache import LRUCache, pricebook_version, stable_hash
+from .engine import calculate, index_cjenik, quote
+from .parts import as_parts
+
+# ključevi zbrojeva po korpusu koji se zbrajaju u projekt
+TOTAL_KEYS = ("mats_services_total", "eur_waste", "extras_total", "okov", "oprema", "dodatci",
+              "labor_total", "pre_markup", "eur_markup", "ukupno")
+METRIC_KEYS = ("total_area_m2", "total_rezanje_m", "total_kant_m", "cijena_mat_eur",
+               "cijena_kant_traka_eur", "cijena_kant_usl_eur", "cijena_rez_eur",
+               "iveral_area_m2", "iveral_eur", "hdf_area_m2", "hdf_eur")
+
+
+def _contribution(q, idx, kolicina):
+    """Doprinos jednog korpusa zbrojevima projekta: {(vrsta, šifra, veličina): vrijednost}."""
+    s = q["spec"]
+    out = {}
+    def add(key, v):
+        if v:
+            out[key] = out.get(key, 0.0) + v * kolicina
+    for k in TOTAL_KEYS:
+        add(("total", "", k), q["totals"][k])
+    for k in METRIC_KEYS:
+        add(("metric", "", k), q["metrics"][k])
+    # po elementu: materijal, traka, usluge (calculate po retku daje točne iznose bez ponovnog pravila)
+    for r in q["rows"]:
+        _, m = calculate([r], s["rez_usl"], s["kant_usl"],
+                         idx["MATS"], idx["TRAK"], idx["FRONTS"], idx["FTRAK"], idx["USLG"])
+        add(("mat", r["mat"], "m2"), m["total_area_m2"])
+        add(("mat", r["mat"], "eur"), m["cijena_mat_eur"])
+        add(("traka", r["traka"], "m"), m["total_kant_m"])
+        add(("traka", r["traka"], "eur"), m["cijena_kant_traka_eur"])
+        add(("usluga", s["rez_usl"], "rezanje_m"), m["total_rezanje_m"])
+        add(("usluga", s["rez_usl"], "eur"), m["cijena_rez_eur"])
+        add(("usluga", s["kant_usl"], "kant_m"), m["total_kant_m"])
+        add(("usluga", s["kant_usl"], "eur"), m["cijena_kant_usl_eur"])
+    return out
+
+
+class Projekt:
+    """Skup korpusa s tekućim zbrojevima; ``cje`` je normalizirani cjenik ili kompilirani ``Catalog``."""
+
+    def __init__(self, cje, naziv="", cache_size=512):
+        self.naziv = naziv
+        self._ids = itertools.count(1)
+        self.korpusi = {}           # id -> {"naziv", "kolicina", "spec", "rows", ..., "quote", "doprinos"}
+        self._acc = {}              # tekući zbrojevi
+        self._n = {}                # koliko korpusa doprinosi ključu (0 → točna nula, bez float ostatka)
+        self._cache = LRUCache(maxsize=cache_size)
+        self.repriced = 0           # broj stvarnih izračuna (za dijagnostiku)
+        self._set_cjenik(cje)
+
+    def _set_cjenik(self, cje):
+        if "MATS" in cje:           # Catalog
+            self.cje, self.idx, self.version = None, cje, cje.version
+        else:
+            self.cje, self.idx, self.version = cje, index_cjenik(cje), pricebook_version(cje)
+
+    # --- izračun jednog korpusa ---
+    def _price(self, e):
+        key = stable_hash(("korpus", self.version, e["spec"], e["rows"],
+                           e["okov_rows"], e["oprema_rows"], e["dodatci_rows"]))
+        def compute():
+            self.repriced += 1
+            q = quote(e["spec"], self.cje, rows=e["rows"], okov_rows=e["okov_rows"],
+                      oprema_rows=e["oprema_rows"], dodatci_rows=e["dodatci_rows"], idx=self.idx)
+            return q, _contribution(q, self.idx, 1)
+        q, per_one = self._cache.get_or_compute(key, compute)
+        k = e["kolicina"]
+        return q, {key_: v * k for key_, v in per_one.items()}
+
+    def _apply(self, doprinos, sign):
+        acc, n = self._acc, self._n
+        for k, v in doprinos.items():
+            cnt = n.get(k, 0) + sign
+            if cnt <= 0:
+                acc.pop(k, None); n.pop(k, None)
+            else:
+                acc[k] = acc.get(k, 0.0) + sign * v
+                n[k] = cnt
+
+    # --- korpusi ---
+    @staticmethod
+    def _kolicina(x):
+        k = int(x)
+        if k < 0:
+            raise ValueError(f"količina mora biti >= 0, a ne {x!r}")
+        return k
+
+    def add(self, spec, rows=None, okov_rows=(), oprema_rows=(), dodatci_rows=(), naziv="", kolicina=1):
+        """Dodaj korpus (``kolicina`` istih komada); vraća njegov id."""
+        kid = next(self._ids)
+        e = {"naziv": naziv or f"Korpus {kid}", "kolicina": self._kolicina(kolicina), "spec": dict(spec or {}),
+             "rows": as_parts(rows) if rows is not None else None,
+             "okov_rows": list(okov_rows), "oprema_rows": list(oprema_rows), "dodatci_rows": list(dodatci_rows)}
+        e["quote"], e["doprinos"] = self._price(e)
+        self.korpusi[kid] = e
+        self._apply(e["doprinos"], +1)
+        return kid
+
+    def update(self, kid, **changes):
+        """Izmijeni korpus (spec, rows, okov_rows, …, naziv, kolicina); računa se samo on."""
+        e = self.korpusi[kid]
+        new = {**e, **changes}
+        if "spec" in changes:
+            new["spec"] = dict(changes["spec"] or {})
+        if changes.get("rows") is not None:
+            new["rows"] = as_parts(changes["rows"])
+        if "kolicina" in changes:
+            new["kolicina"] = self._kolicina(changes["kolicina"])
+        if new["kolicina"] != e["kolicina"] and e["kolicina"] and not (set(changes) - {"kolicina", "naziv"}):
+            # samo količina: doprinos se skalira, bez ponovnog izračuna (s 0 komada nema što skalirati)
+            f = new["kolicina"] / e["kolicina"]
+            new["doprinos"] = {k: v * f for k, v in e["doprinos"].items()}
+        elif set(changes) - {"naziv"}:
+            new["quote"], new["doprinos"] = self._price(new)
+        self._apply(e["doprinos"], -1)
+        self._apply(new["doprinos"], +1)
+        self.korpusi[kid] = new
+        return new
+
+    def remove(self, kid):
+        e = self.korpusi.pop(kid)
+        self._apply(e["doprinos"], -1)
+
+    def set_cjenik(self, cje):
+        """Novi cjenik: svi korpusi se ponovno računaju (ključ cachea sadrži verziju)."""
+        self._set_cjenik(cje)
+        self._acc.clear(); self._n.clear()
+        for e in self.korpusi.values():
+            e["quote"], e["doprinos"] = self._price(e)
+            self._apply(e["doprinos"], +1)
+
+    def rebuild(self):
+        """Zbrojevi ispočetka iz spremljenih doprinosa (fsum) – provjera/uklanjanje float ostatka."""
+        keys = {k for e in self.korpusi.values() for k in e["doprinos"]}
+        self._acc = {k: math.fsum(e["doprinos"].get(k, 0.0) for e in self.korpusi.values()) for k in keys}
+        self._n = {k: sum(1 for e in self.korpusi.values() if k in e["doprinos"]) for k in keys}
+
+    # --- zbrojevi ---
+    def totals(self):
+        acc = self._acc
+        out = {k: acc.get(("total", "", k), 0.0) for k in TOTAL_KEYS}
+        out.update({k: acc.get(("metric", "", k), 0.0) for k in METRIC_KEYS})
+        out["korpusi"] = sum(e["kolicina"] for e in self.korpusi.values())
+        return out
+
+    def _group(self, vrsta):
+        out = {}
+        for (v, sifra, kol), val in self._acc.items():
+            if v == vrsta:
+                out.setdefault(sifra, {})[kol] = val
+        return out
+
+    def materijali(self):
+        """{šifra: {"m2", "eur"}}"""
+        return self._group("mat")
+
+    def trake(self):
+        """{šifra: {"m", "eur"}}"""
+        return self._group("traka")
+
+    def usluge(self):
+        """{šifra usluge: {"rezanje_m" / "kant_m", "eur"}}"""
+        return self._group("usluga")
+
+    def rows(self):
+        """Svi elementi projekta (kom × količina korpusa), npr. za krojnu listu."""
+        out = []
+        for e in self.korpusi.values():
+            for r in e["quote"]["rows"]:
+                out.append({**r, "kom": int(r["kom"]) * e["kolicina"]})
+        return out
+
+    def pregled(self):
+        """Tablica korpusa za prikaz."""
+        return [{"id": kid, "naziv": e["naziv"], "kolicina": e["kolicina"],
+                 "W": e["quote"]["spec"]["W"], "H": e["quote"]["spec"]["H"], "D": e["quote"]["spec"]["D"],
+                 "ukupno_kom": e["quote"]["totals"]["ukupno"],
+                 "ukupno": e["quote"]["totals"]["ukupno"] * e["kolicina"]}
+                for kid, e in self.korpusi.items()]
+
+    # --- spremanje ---
+    def to_dict(self):
+        return {"naziv": self.naziv, "korpusi": [
+            {**{k: e[k] for k in ("naziv", "kolicina", "spec", "okov_rows", "oprema_rows", "dodatci_rows")},
+             "rows": [dict(r) for r in e["rows"]] if e["rows"] is not None else None}
+            for e in self.korpusi.values()]}
+
+    @classmethod
+    def from_dict(cls, data, cje):
+        p = cls(cje, naziv=data.get("naziv", ""))
+        for e in data.get("korpusi", []):
+            p.add(e.get("spec"), e.get("rows"), e.get("okov_rows", ()), e.get("oprema_rows", ()),
+                  e.get("dodatci_rows", ()), naziv=e.get("naziv", ""), kolicina=e.get("kolicina", 1))
+        return p
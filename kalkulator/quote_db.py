@@ -0,0 +1,237 @@
+"""Povijest ponuda u SQLite: ulazi, verzija cjenika i rezultati svakog izračuna.
+
+Pretraga ide po indeksiranim stupcima (datum, W/H/D, ukupno) i po tablici šifri
+(materijal, traka, usluga, art_nr okova/opreme, šifra dodatka → ponude). Cijela
+ponuda je spremljena kao komprimirani JSON pa se otvara bez ponovnog izračuna.
+
+    python -m kalkulator.quote_db search --sifra IVERAL-BIJELI --od 2026-01-01
+    python -m kalkulator.quote_db show 42
+"""
+import argparse
+import datetime
+import json
+import sqlite3
+import sys
+import threading
+import zlib
+
+from .cache import stable_hash
+
+DEFAULT_PATH = "ponude.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ponude (
+    id        INTEGER PRIMARY KEY,
+    hash      TEXT NOT NULL UNIQUE,
+    kreirano  TEXT NOT NULL,
+    naziv     TEXT NOT NULL DEFAULT '',
+    cjenik    TEXT NOT NULL DEFAULT '',
+    W         REAL, H REAL, D REAL,
+    ukupno    REAL NOT NULL DEFAULT 0,
+    podaci    BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_ponude_kreirano ON ponude (kreirano);
+CREATE INDEX IF NOT EXISTS ix_ponude_dim ON ponude (W, H, D);
+CREATE INDEX IF NOT EXISTS ix_ponude_ukupno ON ponude (ukupno);
+CREATE TABLE IF NOT EXISTS ponude_sifre (
+    sifra     TEXT NOT NULL,
+    grupa     TEXT NOT NULL,
+    ponuda_id INTEGER NOT NULL REFERENCES ponude(id) ON DELETE CASCADE,
+    PRIMARY KEY (sifra, grupa, ponuda_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_sifre_ponuda ON ponude_sifre (ponuda_id);
+"""
+
+_SUMMARY_COLS = "id, kreirano, naziv, cjenik, W, H, D, ukupno"
+
+
+def _json_default(x):
+    if hasattr(x, "item"):          # numpy skalari iz editora
+        return x.item()
+    if hasattr(x, "keys"):          # Part / PartCost
+        return dict(x)
+    return str(x)
+
+
+def quote_codes(spec, rows, okov_rows=(), oprema_rows=(), dodatci_rows=()):
+    """{(grupa, šifra)} na koje se ponuda oslanja (za pretragu i ponovno određivanje cijena)."""
+    codes = set()
+    for r in rows or ():
+        if r.get("mat"):
+            codes.add(("mat", str(r["mat"])))
+        if r.get("traka"):
+            codes.add(("traka", str(r["traka"])))
+    for k in ("rez_usl", "kant_usl"):
+        if spec.get(k):
+            codes.add(("usluga", str(spec[k])))
+    for grupa, items, key in (("okov", okov_rows, "art_nr"), ("oprema", oprema_rows, "art_nr"),
+                              ("dodatci", dodatci_rows, "sifra")):
+        for r in items or ():
+            if r.get(key):
+                codes.add((grupa, str(r[key])))
+    return codes
+
+
+class QuoteDB:
+    """SQLite povijest ponuda; jedna konekcija po threadu (Streamlit sesije su threadovi)."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as con:
+            con.executescript(_SCHEMA)
+
+    def _conn(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA foreign_keys=ON")
+            self._local.con = con
+        return con
+
+    def close(self):
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+    # --- spremanje ---
+    def save(self, spec, rows, report, metrics, totals, cjenik_version,
+             okov_rows=(), oprema_rows=(), dodatci_rows=(), naziv="", kreirano=None):
+        """Spremi izračunatu ponudu; ista ponuda (isti ulazi i cjenik) se ne duplicira. Vraća id."""
+        rows = [dict(r) for r in rows or ()]
+        okov_rows, oprema_rows, dodatci_rows = list(okov_rows), list(oprema_rows), list(dodatci_rows)
+        h = stable_hash(("ponuda", cjenik_version, spec, rows, okov_rows, oprema_rows, dodatci_rows))
+        con = self._conn()
+        row = con.execute("SELECT id FROM ponude WHERE hash = ?", (h,)).fetchone()
+        if row is not None:
+            return row["id"]
+        payload = {"naziv": naziv, "cjenik": cjenik_version, "spec": dict(spec), "rows": rows,
+                   "okov_rows": okov_rows, "oprema_rows": oprema_rows, "dodatci_rows": dodatci_rows,
+                   "report": [dict(r) for r in report], "metrics": dict(metrics), "totals": dict(totals)}
+        blob = zlib.compress(json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8"))
+        kreirano = kreirano or datetime.datetime.now().isoformat(timespec="seconds")
+        with con:
+            cur = con.execute(
+                "INSERT INTO ponude (hash, kreirano, naziv, cjenik, W, H, D, ukupno, podaci) "
+                "VALUES (?,?,?,?,?,?,?,?,?)",
+                (h, kreirano, naziv, cjenik_version or "", spec.get("W"), spec.get("H"), spec.get("D"),
+                 float(totals.get("ukupno", 0.0)), blob))
+            pid = cur.lastrowid
+            con.executemany("INSERT OR IGNORE INTO ponude_sifre (sifra, grupa, ponuda_id) VALUES (?,?,?)",
+                            [(s, g, pid) for g, s in quote_codes(spec, rows, okov_rows, oprema_rows, dodatci_rows)])
+        return pid
+
+    def save_quote(self, q, cjenik_version, okov_rows=(), oprema_rows=(), dodatci_rows=(), naziv=""):
+        """Spremi rezultat ``engine.quote``."""
+        return self.save(q["spec"], q["rows"], q["report"], q["metrics"], q["totals"], cjenik_version,
+                         okov_rows, oprema_rows, dodatci_rows, naziv=naziv)
+
+    # --- upiti ---
+    def search(self, od=None, do=None, W=None, H=None, D=None, tol_mm=0, sifra=None, grupa=None,
+               min_ukupno=None, max_ukupno=None, naziv=None, limit=100):
+        """Sažeci ponuda (bez sadržaja), najnovije prve. ``od``/``do`` su datumi (uključivo)."""
+        where, args = [], []
+        if od:
+            where.append("kreirano >= ?"); args.append(str(od))
+        if do:
+            do = datetime.date.fromisoformat(str(do)[:10]) + datetime.timedelta(days=1)
+            where.append("kreirano < ?"); args.append(do.isoformat())
+        for col, v in (("W", W), ("H", H), ("D", D)):
+            if v:
+                where.append(f"{col} BETWEEN ? AND ?"); args += [v - tol_mm, v + tol_mm]
+        if min_ukupno is not None:
+            where.append("ukupno >= ?"); args.append(min_ukupno)
+        if max_ukupno is not None:
+            where.append("ukupno <= ?"); args.append(max_ukupno)
+        if naziv:
+            where.append("naziv LIKE ?"); args.append(f"%{naziv}%")
+        if sifra:
+            sub = "SELECT ponuda_id FROM ponude_sifre WHERE sifra = ?"
+            args.append(sifra)
+            if grupa:
+                sub += " AND grupa = ?"; args.append(grupa)
+            where.append(f"id IN ({sub})")
+        q = f"SELECT {_SUMMARY_COLS} FROM ponude"
+        if where:
+            q += " WHERE " + " AND ".join(where)
+        q += " ORDER BY kreirano DESC, id DESC LIMIT ?"
+        return [dict(r) for r in self._conn().execute(q, (*args, limit))]
+
+    def get(self, pid):
+        """Cijela spremljena ponuda (ulazi + rezultati) ili None – bez ponovnog izračuna."""
+        row = self._conn().execute(f"SELECT {_SUMMARY_COLS}, podaci FROM ponude WHERE id = ?", (pid,)).fetchone()
+        if row is None:
+            return None
+        out = json.loads(zlib.decompress(row["podaci"]).decode("utf-8"))
+        out.update({k: row[k] for k in ("id", "kreirano")})
+        return out
+
+    def ids_for_codes(self, codes):
+        """Id-evi ponuda koje koriste bilo koju od šifri ``[(grupa, šifra)]``."""
+        codes = list(codes)
+        out = set()
+        for i in range(0, len(codes), 400):
+            part = codes[i:i + 400]
+            q = ("SELECT DISTINCT ponuda_id FROM ponude_sifre WHERE "
+                 + " OR ".join(["(sifra = ? AND grupa = ?)"] * len(part)))
+            out.update(r[0] for r in self._conn().execute(q, [x for g, s in part for x in (s, g)]))
+        return out
+
+    def summaries(self, ids):
+        """Sažeci ponuda za zadane id-eve (redoslijed po id-u)."""
+        ids = sorted(ids)
+        out = []
+        for i in range(0, len(ids), 900):
+            part = ids[i:i + 900]
+            out += [dict(r) for r in self._conn().execute(
+                f"SELECT {_SUMMARY_COLS} FROM ponude WHERE id IN ({','.join('?' * len(part))}) ORDER BY id", part)]
+        return out
+
+    def codes(self, pid):
+        return {(r["grupa"], r["sifra"]) for r in self._conn().execute(
+            "SELECT grupa, sifra FROM ponude_sifre WHERE ponuda_id = ?", (pid,))}
+
+    def delete(self, pid):
+        con = self._conn()
+        with con:
+            con.execute("DELETE FROM ponude WHERE id = ?", (pid,))
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM ponude").fetchone()[0]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.quote_db", description="Povijest ponuda (SQLite).")
+    ap.add_argument("--db", default=DEFAULT_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_find = sub.add_parser("search", help="pretraga ponuda")
+    p_find.add_argument("--od"); p_find.add_argument("--do")
+    p_find.add_argument("-W", type=float); p_find.add_argument("-H", type=float); p_find.add_argument("-D", type=float)
+    p_find.add_argument("--tol", type=float, default=0, help="tolerancija dimenzija (mm)")
+    p_find.add_argument("--sifra", help="materijal / traka / usluga / art_nr / šifra dodatka")
+    p_find.add_argument("--min", type=float, dest="min_ukupno"); p_find.add_argument("--max", type=float, dest="max_ukupno")
+    p_find.add_argument("--limit", type=int, default=100)
+    p_show = sub.add_parser("show", help="spremljena ponuda (JSON)")
+    p_show.add_argument("id", type=int)
+    args = ap.parse_args(argv)
+
+    db = QuoteDB(args.db)
+    if args.cmd == "search":
+        for r in db.search(od=args.od, do=args.do, W=args.W, H=args.H, D=args.D, tol_mm=args.tol,
+                           sifra=args.sifra, min_ukupno=args.min_ukupno, max_ukupno=args.max_ukupno,
+                           limit=args.limit):
+            print(json.dumps(r, ensure_ascii=False))
+    else:
+        q = db.get(args.id)
+        if q is None:
+            print(f"Nema ponude {args.id}", file=sys.stderr)
+            return 1
+        print(json.dumps(q, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Ponovno određivanje cijena spremljenih ponuda kad se promijeni cjenik.
+
+Stari i novi normalizirani cjenik uspoređuju se po šifri (materijal, traka,
+usluga, dodatak) i ``art_nr`` (okov, oprema). Tablica šifri u povijesti ponuda
+(``ponude_sifre``) daje samo ponude koje koriste promijenjenu šifru, pa se samo one
+ponovno računaju. Spremljeni elementi ulaze ravno u ``quote`` (bez ``derive_rows``),
+a rezultat je razlika cijene po ponudi.
+
+    python -m kalkulator.reprice stari_cjenik.json cjenik.json -o razlike.csv
+    python -m kalkulator.reprice stari_cjenik.json cjenik.json --spremi   # + nova verzija ponude u povijest
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .catalog import compile_catalog
+from .cjenik import load_cjenik
+from .engine import quote
+from .extras import dodatak_kolicina
+from .quote_db import DEFAULT_PATH, QuoteDB, quote_codes
+
+# (lista u cjeniku, grupa u ponude_sifre, ključ šifre)
+PRICEBOOK_GROUPS = (
+    ("materijali", "mat", "sifra"), ("materijali_fronta", "mat", "sifra"),
+    ("abs_trake", "traka", "sifra"), ("abs_trake_fronta", "traka", "sifra"),
+    ("usluge", "usluga", "sifra"),
+    ("okov", "okov", "art_nr"), ("oprema", "oprema", "art_nr"), ("dodatci", "dodatci", "sifra"),
+)
+PRICE_KEYS = ("cijena_eur_po_m2", "cijena_eur_po_m", "cijena_eur")
+
+REPORT_COLS = ["id", "naziv", "kreirano", "W", "H", "D", "staro", "novo", "razlika", "razlika_pct",
+               "sifre", "nema_u_cjeniku", "novi_id", "greska"]
+
+
+# =============== Razlika cjenika ===============
+def _prices(cje):
+    out = {}
+    for lst, grupa, key in PRICEBOOK_GROUPS:
+        for item in cje.get(lst) or ():
+            code = item.get(key)
+            if code:
+                out[(grupa, str(code))] = tuple(item.get(k) for k in PRICE_KEYS)
+    return out
+
+def _price(p):
+    return next((v for v in p if v is not None), None) if p else None
+
+def diff_pricebooks(old_cje, new_cje):
+    """{(grupa, šifra): {"staro", "novo"}} za šifre kojima se cijena promijenila, dodane ili uklonjene.
+
+    Uklonjena šifra ima ``novo`` None, nova šifra ``staro`` None. Naziv i ostala
+    polja ne ulaze u razliku jer ne mijenjaju iznos ponude.
+    """
+    old, new = _prices(old_cje), _prices(new_cje)
+    return {k: {"staro": _price(old.get(k)), "novo": _price(new.get(k))}
+            for k in old.keys() | new.keys() if old.get(k) != new.get(k)}
+
+
+# =============== Jedna ponuda ===============
+def _reprice_extras(items, grupa, key, lookup, changed):
+    out = []
+    for r in items:
+        code = (grupa, str(r.get(key)))
+        if code in changed and code[1] in lookup:
+            r = dict(r)
+            cij = float(lookup[code[1]].get("cijena_eur") or 0.0)
+            if grupa == "dodatci":
+                qty = dodatak_kolicina(str(r.get("vrsta") or "po kom"), float(r.get("A_mm") or 0),
+                                       float(r.get("B_mm") or 0), int(r.get("kom") or 0))
+            else:
+                qty = r.get("kolicina") or 0
+            r["cijena_eur"] = cij
+            r["iznos"] = cij * qty
+        out.append(r)
+    return out
+
+def reprice_quote(stored, idx, changed):
+    """Spremljena ponuda (``QuoteDB.get``) po novom cjeniku ``idx`` → (quote, šifre bez cijene).
+
+    Okov/oprema/dodatci s promijenjenom šifrom dobivaju novu cijenu iz cjenika, ostali
+    zadržavaju spremljenu (ručno upisanu) cijenu. Šifre koje su iz cjenika uklonjene
+    vraćaju se u drugoj vrijednosti – za materijal/traku to znači cijenu 0.
+    """
+    okov = _reprice_extras(stored["okov_rows"], "okov", "art_nr", idx["OKOV"], changed)
+    oprema = _reprice_extras(stored["oprema_rows"], "oprema", "art_nr", idx["OPREMA"], changed)
+    dodatci = _reprice_extras(stored["dodatci_rows"], "dodatci", "sifra", idx["DODATCI"], changed)
+    q = quote(stored["spec"], None, rows=stored["rows"], okov_rows=okov, oprema_rows=oprema,
+              dodatci_rows=dodatci, idx=idx)
+    q.update(okov_rows=okov, oprema_rows=oprema, dodatci_rows=dodatci)
+    missing = sorted(c for c in quote_codes(stored["spec"], stored["rows"], stored["okov_rows"],
+                                            stored["oprema_rows"], stored["dodatci_rows"])
+                     if c in changed and changed[c]["novo"] is None)
+    return q, missing
+
+
+# =============== Worker ===============
+_W = {}
+
+def _init_worker(db_path, cjenik_path, changed):
+    cje = load_cjenik(cjenik_path)
+    _W["idx"] = compile_catalog(cje)
+    _W["db"] = QuoteDB(db_path)
+    _W["changed"] = changed
+
+def _fmt_codes(codes):
+    return " ".join(f"{g}:{s}" for g, s in codes)
+
+def _reprice_chunk(ids, keep_quotes):
+    """[(id, rezultat, quote za spremanje ili None)] – quote se vraća samo kad se sprema."""
+    db, idx, changed = _W["db"], _W["idx"], _W["changed"]
+    out = []
+    for pid in ids:
+        try:
+            stored = db.get(pid)
+            q, missing = reprice_quote(stored, idx, changed)
+        except Exception as e:
+            out.append((pid, {"greska": f"{type(e).__name__}: {e}"}, None))
+            continue
+        used = db.codes(pid) & changed.keys()
+        staro, novo = stored["totals"]["ukupno"], q["totals"]["ukupno"]
+        res = {"staro": round(staro, 2), "novo": round(novo, 2), "razlika": round(novo - staro, 2),
+               "razlika_pct": round((novo - staro) / staro * 100.0, 2) if staro else None,
+               "sifre": _fmt_codes(sorted(used)), "nema_u_cjeniku": _fmt_codes(missing)}
+        out.append((pid, res, (stored["naziv"], q) if keep_quotes else None))
+    return out
+
+
+def _chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def affected_quotes(db, changed, version=None):
+    """Sažeci ponuda koje koriste promijenjenu šifru; ponude već izračunate po ``version`` se preskaču."""
+    ids = db.ids_for_codes(changed.keys())
+    return [s for s in db.summaries(ids) if not version or s["cjenik"] != version]
+
+
+def run_reprice(old_cjenik, new_cjenik, db_path=DEFAULT_PATH, out_path=None, save=False,
+                workers=None, chunk=32, progress=None):
+    """Ponovno izračunaj ponude pogođene promjenom cjenika.
+
+    Vraća (retci izvještaja, broj promijenjenih šifri, sekunde). ``save`` sprema
+    ponude po novom cjeniku kao nove zapise u povijesti (``novi_id``).
+    """
+    t0 = time.perf_counter()
+    new_cje = load_cjenik(new_cjenik)
+    version = compile_catalog(new_cje).version
+    changed = diff_pricebooks(load_cjenik(old_cjenik), new_cje)
+    db = QuoteDB(db_path)
+    summaries = affected_quotes(db, changed, version) if changed else []
+    by_id = {s["id"]: s for s in summaries}
+    results = {}
+
+    def collect(chunk_results):
+        for pid, res, kept in chunk_results:
+            s = by_id[pid]
+            row = {k: s[k] for k in ("id", "naziv", "kreirano", "W", "H", "D")}
+            row.update(res)
+            if kept is not None:
+                naziv, q = kept
+                row["novi_id"] = db.save(q["spec"], q["rows"], q["report"], q["metrics"], q["totals"], version,
+                                         q["okov_rows"], q["oprema_rows"], q["dodatci_rows"], naziv=naziv)
+            results[pid] = row
+        if progress:
+            progress(len(results), len(summaries), time.perf_counter() - t0)
+
+    chunks = list(_chunks(list(by_id), chunk))
+    workers = min(workers or os.cpu_count() or 1, len(chunks) or 1)
+    if workers <= 1:
+        # malo posla ili jedna jezgra: bez pokretanja procesa
+        _init_worker(db_path, new_cjenik, changed)
+        for c in chunks:
+            collect(_reprice_chunk(c, save))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(db_path, new_cjenik, changed)) as ex:
+            for res in ex.map(_reprice_chunk, chunks, [save] * len(chunks)):
+                collect(res)
+
+    rows = sorted(results.values(), key=lambda r: (r.get("razlika") is None, -abs(r.get("razlika") or 0.0)))
+    if out_path:
+        with open(out_path, "w", encoding="utf-8", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=REPORT_COLS, extrasaction="ignore")
+            w.writeheader()
+            w.writerows(rows)
+    return rows, len(changed), time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.reprice",
+                                 description="Ponovno određivanje cijena spremljenih ponuda nakon promjene cjenika.")
+    ap.add_argument("stari", help="prethodni cjenik (JSON)")
+    ap.add_argument("novi", help="novi cjenik (JSON)")
+    ap.add_argument("--db", default=DEFAULT_PATH, help=f"povijest ponuda (default: {DEFAULT_PATH})")
+    ap.add_argument("-o", "--out", default="razlike.csv", help="CSV s razlikom po ponudi")
+    ap.add_argument("--spremi", action="store_true", help="spremi ponude po novom cjeniku u povijest")
+    ap.add_argument("-j", "--workers", type=int, default=None, help="broj procesa (default: broj jezgri)")
+    ap.add_argument("--chunk", type=int, default=32, help="ponuda po komadu posla")
+    ap.add_argument("-q", "--quiet", action="store_true")
+    args = ap.parse_args(argv)
+
+    def progress(n, total, dt):
+        if not args.quiet:
+            print(f"\r{n}/{total} ponuda  {n / dt if dt else 0:.0f} ponuda/s", end="", file=sys.stderr)
+
+    rows, n_changed, dt = run_reprice(args.stari, args.novi, args.db, args.out, save=args.spremi,
+                                      workers=args.workers, chunk=args.chunk, progress=progress)
+    n_err = sum(1 for r in rows if r.get("greska"))
+    delta = sum(r.get("razlika") or 0.0 for r in rows)
+    print(f"\n{n_changed} promijenjenih šifri, {len(rows)} pogođenih ponuda ({n_err} grešaka), "
+          f"ukupna razlika {delta:+.2f} €, {dt:.2f} s", file=sys.stderr)
+    return 1 if n_err else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
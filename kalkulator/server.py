@@ -0,0 +1,390 @@
+"""Lokalni HTTP API za izračun ponuda (ERP integracija), odvojen od Streamlit sučelja.
+
+    python -m kalkulator.server serve --cjenik cjenik.json --port 8765
+    curl -s localhost:8765/quote -d '{"spec": {"W": 800, "H": 720, "D": 560}}'
+    python -m kalkulator.server loadtest -n 2000 -c 8          # opterećenje s localhosta
+
+Endpointi (JSON):
+
+    GET  /health                      verzija cjenika, broj workera
+    GET  /stats                       latencije po endpointu (p50/p90/p95/p99, ms)
+    POST /quote                       {"spec", "rows"?, "okov_rows"?, "oprema_rows"?, "dodatci_rows"?}
+    POST /batch                       {"specs": [{"id"?, ...spec}], "elementi"?: bool}
+    POST /export/csv|xlsx|pdf|zip     kao /quote → datoteka
+
+Cjenik se učita i kompilira jednom pri startu (izmjena cjenika = restart servisa).
+Pojedinačne ponude računaju se u dretvi zahtjeva (ispod milisekunde) ili, s
+``--microbatch``, skupljaju u nizove (``kalkulator.microbatch``); batch ide u
+komadima na procese (isti worker kao ``kalkulator.batch``), PDF na procese izvoza.
+Sve radi bez mreže prema van; zadano sluša samo na 127.0.0.1.
+"""
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from . import batch
+from .catalog import compile_catalog
+from .cjenik import load_cjenik
+from .engine import quote
+from .extras import dodatak_kolicina
+from .parts import as_parts
+from .timing import percentiles
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 32 * 1024 * 1024
+LATENCY_WINDOW = 5000       # zadnjih N zahtjeva po endpointu za percentile
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "pdf": "application/pdf",
+    "zip": "application/zip",
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json_default(x):
+    if hasattr(x, "keys"):          # Part / PartCost
+        return dict(x)
+    if isinstance(x, (set, frozenset)):
+        return sorted(x)
+    return str(x)
+
+
+def _dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+class LatencyStats:
+    """Latencije po endpointu (klizni prozor) + brojači zahtjeva i grešaka; thread-safe."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self._lat = {}
+        self._n = {}
+        self._err = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def add(self, endpoint, seconds, error=False):
+        with self._lock:
+            self._lat.setdefault(endpoint, deque(maxlen=self.window)).append(seconds)
+            self._n[endpoint] = self._n.get(endpoint, 0) + 1
+            if error:
+                self._err[endpoint] = self._err.get(endpoint, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            lat = {k: list(v) for k, v in self._lat.items()}
+            n, err = dict(self._n), dict(self._err)
+        out = {}
+        for k, vals in lat.items():
+            ms = [v * 1000.0 for v in vals]
+            out[k] = {"zahtjeva": n[k], "gresaka": err.get(k, 0), "prozor": len(ms),
+                      **{p: round(v, 3) for p, v in percentiles(ms).items()},
+                      "max": round(max(ms), 3)}
+        return {"uptime_s": round(time.time() - self.started, 1), "endpointi": out}
+
+
+class PricingService:
+    """Topli cjenik (kompilirani ``Catalog``) + procesi za batch; bez HTTP-a, može se koristiti i izravno."""
+
+    def __init__(self, cjenik_path="cjenik.json", workers=None, chunk=64, microbatch=None):
+        self.cjenik_path = cjenik_path
+        self.cje = load_cjenik(cjenik_path)
+        self.catalog = compile_catalog(self.cje)
+        self.chunk = chunk
+        self.workers = workers or os.cpu_count() or 1
+        self.stats = LatencyStats()
+        # microbatch=(max_batch, max_wait_ms): istodobni /quote zahtjevi idu u jedan stupčani prolaz
+        self._batcher = None
+        if microbatch:
+            from .microbatch import BatchPricer, MicroBatcher
+            self._batcher = MicroBatcher(BatchPricer(self.cje, self.catalog), *microbatch).start_in_thread()
+        # i roditelj računa batch (zahtjev koji stane u jedan komad ide mimo procesa)
+        batch._init_worker(cjenik_path)
+        self._pool = None
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=batch._init_worker,
+                                             initargs=(cjenik_path,))
+            # zagrij sve workere (učitan i kompiliran cjenik) prije prvog zahtjeva
+            list(self._pool.map(batch._price_chunk, [[]] * self.workers, [False] * self.workers))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+
+    def health(self):
+        return {"status": "ok", "cjenik": self.catalog.version, "workeri": self.workers, "pid": os.getpid(),
+                "microbatch": self._batcher.stats() if self._batcher else None}
+
+    # --- izračun ---
+    def _extras(self, body):
+        """Okov/oprema (``art_nr``, ``kolicina``) i dodatci (``sifra``, ``kom``, ``A_mm``, ``B_mm``) iz
+        zahtjeva → potpuni retci kao u aplikaciji; naziv, jedinica i cijena dolaze iz cjenika
+        (``cijena_eur`` u zahtjevu nadjačava cijenu iz cjenika)."""
+        cat = self.catalog
+        out = {}
+        for key, kategorija, lookup in (("okov_rows", "OKOV", cat.OKOV), ("oprema_rows", "OPREMA", cat.OPREMA)):
+            rows = []
+            for i, r in enumerate(body.get(key) or (), start=1):
+                if not isinstance(r, dict):
+                    raise BadRequest(f"'{key}': element {i} nije objekt")
+                art = str(r.get("art_nr") or "").strip()
+                if art not in lookup:
+                    raise BadRequest(f"{key}: nepoznat art_nr '{art}'")
+                item = lookup[art]
+                cij = float(r.get("cijena_eur", item.get("cijena_eur")) or 0.0)
+                qty = int(r.get("kolicina") or 0)
+                rows.append({"kategorija": kategorija, "art_nr": art, "naziv": item.get("naziv", ""),
+                             "dobavljac": item.get("dobavljac", ""), "jedinica": item.get("jedinica") or "kom",
+                             "cijena_eur": cij, "kolicina": qty, "iznos": cij * qty})
+            out[key] = rows
+        rows = []
+        for i, r in enumerate(body.get("dodatci_rows") or (), start=1):
+            if not isinstance(r, dict):
+                raise BadRequest(f"'dodatci_rows': element {i} nije objekt")
+            sifra = str(r.get("sifra") or "").strip()
+            if sifra not in cat.DODATCI:
+                raise BadRequest(f"dodatci_rows: nepoznata šifra '{sifra}'")
+            item = cat.DODATCI[sifra]
+            vrsta = str(r.get("vrsta") or item.get("vrsta") or "po kom").strip().lower()
+            A, B, kom = float(r.get("A_mm") or 0), float(r.get("B_mm") or 0), int(r.get("kom") or 0)
+            cij = float(r.get("cijena_eur", item.get("cijena_eur")) or 0.0)
+            kol = dodatak_kolicina(vrsta, A, B, kom)
+            rows.append({"kategorija": "DODATAK", "sifra": sifra, "naziv": item.get("naziv", ""), "vrsta": vrsta,
+                         "jedinica": item.get("jedinica") or "kom", "A_mm": int(A), "B_mm": int(B), "kom": kom,
+                         "obračun_količina": round(kol, 3), "cijena_eur": cij, "iznos": cij * kol})
+        out["dodatci_rows"] = rows
+        return out
+
+    def quote(self, body):
+        """``engine.quote`` za tijelo zahtjeva; vraća i potpune retke okova/opreme/dodataka."""
+        spec = body.get("spec")
+        if not isinstance(spec, dict):
+            raise BadRequest("'spec' mora biti objekt")
+        rows = body.get("rows")
+        try:
+            extras = self._extras(body)
+            if self._batcher is not None:
+                q = self._batcher.submit_sync({"spec": batch.coerce_spec(spec), "rows": rows, **extras})
+            else:
+                q = quote(batch.coerce_spec(spec), self.cje, rows=as_parts(rows) if rows else None,
+                          idx=self.catalog, **extras)
+        except (KeyError, TypeError, ValueError) as e:
+            if isinstance(e, BadRequest):
+                raise
+            raise BadRequest(f"{type(e).__name__}: {e}") from None
+        q.update(extras)
+        return q
+
+    def quote_json(self, body):
+        q = self.quote(body)
+        return {"cjenik": self.catalog.version, **q}
+
+    def batch(self, body):
+        specs = body.get("specs")
+        if not isinstance(specs, list):
+            raise BadRequest("'specs' mora biti lista")
+        bad = [i for i, s in enumerate(specs, start=1) if not isinstance(s, dict)]
+        if bad:
+            raise BadRequest(f"'specs': element {bad[0]} nije objekt")
+        with_parts = bool(body.get("elementi"))
+        items = [(str(s.get(batch.ID_KEY) or i), s) for i, s in enumerate(specs, start=1)]
+        chunks = [items[i:i + self.chunk] for i in range(0, len(items), self.chunk)]
+        if self._pool is not None and len(chunks) > 1:
+            parts = self._pool.map(batch._price_chunk, chunks, [with_parts] * len(chunks))
+        else:
+            parts = (batch._price_chunk(c, with_parts) for c in chunks)
+        out = []
+        for res in parts:
+            for spec_id, totals_row, report, err in res:
+                if err:
+                    out.append({batch.ID_KEY: spec_id, "greska": err})
+                else:
+                    out.append({**totals_row, **({"elementi": report} if with_parts else {})})
+        return {"cjenik": self.catalog.version, "broj": len(out),
+                "gresaka": sum(1 for r in out if "greska" in r), "rezultati": out}
+
+    def export(self, kind, body):
+        from .exports import EXPORT_KINDS, build_exports, pdf_args_from_quote
+        if kind not in CONTENT_TYPES:
+            raise BadRequest(f"nepoznat format '{kind}'")
+        q = self.quote(body)
+        kinds = EXPORT_KINDS if kind == "zip" else (kind,)
+        arts, errors = build_exports(q["report"], q["rows"], q["okov_rows"], q["oprema_rows"], q["dodatci_rows"],
+                                     pdf_args=pdf_args_from_quote(q),
+                                     kinds=kinds, bundle=kind == "zip")
+        if kind not in arts:
+            raise RuntimeError(errors.get(kind) or "; ".join(f"{k}: {v}" for k, v in errors.items()))
+        return arts[kind]
+
+
+# =============== HTTP ===============
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"       # keep-alive (ERP i load test drže konekciju)
+    disable_nagle_algorithm = True      # bez TCP_NODELAY odgovor čeka delayed ACK klijenta (~40 ms)
+    server_version = "KalkulatorAPI/1"
+    service = None
+    verbose = False
+
+    def log_message(self, fmt, *args):
+        if self.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, code, body, content_type="application/json; charset=utf-8", filename=None):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if filename:
+            self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        n = int(self.headers.get("Content-Length") or 0)
+        if n > MAX_BODY:
+            raise BadRequest("zahtjev je prevelik")
+        raw = self.rfile.read(n) if n else b"{}"
+        try:
+            body = json.loads(raw.decode("utf-8"))
+        except ValueError as e:
+            raise BadRequest(f"neispravan JSON: {e}") from None
+        if not isinstance(body, dict):
+            raise BadRequest("tijelo zahtjeva mora biti JSON objekt")
+        return body
+
+    def _handle(self, method):
+        t0 = time.perf_counter()
+        path = urlsplit(self.path).path.rstrip("/") or "/"
+        endpoint, error = f"{method} {path}", False
+        svc = self.service
+        try:
+            if method == "GET" and path == "/health":
+                self._send(200, _dumps(svc.health()))
+            elif method == "GET" and path == "/stats":
+                self._send(200, _dumps(svc.stats.snapshot()))
+            elif method == "POST" and path == "/quote":
+                self._send(200, _dumps(svc.quote_json(self._body())))
+            elif method == "POST" and path == "/batch":
+                self._send(200, _dumps(svc.batch(self._body())))
+            elif method == "POST" and path.startswith("/export/"):
+                kind = path.rsplit("/", 1)[1]
+                data = svc.export(kind, self._body())
+                self._send(200, data, CONTENT_TYPES[kind], filename=f"ponuda.{kind}")
+            else:
+                endpoint, error = f"{method} ?", True
+                self._send(404, _dumps({"greska": f"nema {method} {path}"}))
+        except BadRequest as e:
+            error = True
+            self._send(400, _dumps({"greska": str(e)}))
+        except Exception as e:
+            error = True
+            self._send(500, _dumps({"greska": f"{type(e).__name__}: {e}"}))
+        finally:
+            if endpoint != "GET /stats":
+                svc.stats.add(endpoint, time.perf_counter() - t0, error)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    """HTTP server (dretva po konekciji) za ``service``; ``port=0`` bira slobodan port."""
+    handler = type("Handler", (_Handler,), {"service": service, "verbose": verbose})
+    srv = ThreadingHTTPServer((host, port), handler)
+    srv.daemon_threads = True
+    return srv
+
+
+# =============== Load test ===============
+def load_test(url, n=1000, concurrency=8, body=None, path="/quote"):
+    """``n`` POST zahtjeva s ``concurrency`` konekcija → propusnost i latencije (ms) sa strane klijenta."""
+    u = urlsplit(url)
+    payload = _dumps(body or {"spec": {"W": 800, "H": 720, "D": 560}})
+    headers = {"Content-Type": "application/json"}
+    counter = iter(range(n))
+    lock = threading.Lock()
+
+    def client():
+        con = http.client.HTTPConnection(u.hostname, u.port or 80, timeout=60)
+        lat, errs = [], 0
+        while True:
+            with lock:
+                if next(counter, None) is None:
+                    break
+            t = time.perf_counter()
+            con.request("POST", path, payload, headers)
+            resp = con.getresponse()
+            resp.read()
+            lat.append((time.perf_counter() - t) * 1000.0)
+            errs += resp.status != 200
+        con.close()
+        return lat, errs
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        results = list(ex.map(lambda _: client(), range(concurrency)))
+    dt = time.perf_counter() - t0
+    lat = [v for r, _ in results for v in r]
+    return {"zahtjeva": len(lat), "gresaka": sum(e for _, e in results), "s": round(dt, 3),
+            "zahtjeva_s": round(len(lat) / dt, 1) if dt else None,
+            **{p: round(v, 3) for p, v in percentiles(lat).items() if v is not None}}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.server", description="Lokalni HTTP API kalkulatora.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_srv = sub.add_parser("serve", help="pokreni API")
+    p_srv.add_argument("--host", default=DEFAULT_HOST)
+    p_srv.add_argument("--port", type=int, default=DEFAULT_PORT)
+    p_srv.add_argument("--cjenik", default="cjenik.json", help="JSON cjenik (default: cjenik.json)")
+    p_srv.add_argument("-j", "--workers", type=int, default=None, help="procesi za batch (default: broj jezgri)")
+    p_srv.add_argument("--chunk", type=int, default=64, help="specifikacija po komadu batch posla")
+    p_srv.add_argument("--microbatch", nargs=2, type=float, metavar=("MAX_BATCH", "MAX_WAIT_MS"), default=None,
+                       help="skupljaj istodobne /quote zahtjeve (npr. 64 2)")
+    p_srv.add_argument("-v", "--verbose", action="store_true", help="ispiši svaki zahtjev")
+    p_load = sub.add_parser("loadtest", help="opterećenje API-ja s localhosta")
+    p_load.add_argument("--url", default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    p_load.add_argument("-n", type=int, default=1000, help="broj zahtjeva")
+    p_load.add_argument("-c", "--concurrency", type=int, default=8)
+    p_load.add_argument("--body", default=None, help="JSON tijelo zahtjeva (default: jedan korpus)")
+    p_load.add_argument("--path", default="/quote")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "loadtest":
+        res = load_test(args.url, args.n, args.concurrency, json.loads(args.body) if args.body else None, args.path)
+        print(json.dumps(res, ensure_ascii=False))
+        return 1 if res["gresaka"] else 0
+
+    service = PricingService(args.cjenik, workers=args.workers, chunk=args.chunk, microbatch=args.microbatch)
+    srv = make_server(service, args.host, args.port, verbose=args.verbose)
+    print(f"Kalkulator API na http://{args.host}:{srv.server_address[1]}  cjenik {service.catalog.version[:12]}, "
+          f"{service.workers} workera", file=sys.stderr)
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
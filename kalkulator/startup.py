@@ -0,0 +1,194 @@
+"""Hladni start aplikacije: trošak importa po modulu i benchmark s budžetom.
+
+Svako mjerenje je novi Python proces (prazan ``sys.modules``) koji pokrene
+``app_unified_v5.py`` jednom kroz Streamlit ``AppTest`` – isto što i prvi
+posjet nakon starta kontejnera. Teški paketi (pandas, reportlab, openpyxl,
+xlsxwriter) smiju se učitati tek na putanji koja ih treba, nikad pri importu
+modula paketa ``kalkulator``.
+
+    python -m kalkulator.startup report                 # import-time po paketu/modulu
+    python -m kalkulator.startup bench --budget 2.5     # exit 1 ako je hladni start sporiji
+"""
+import argparse
+import json
+import os
+import pkgutil
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ENV_BUDGET = "KALKULATOR_STARTUP_BUDGET"
+DEFAULT_BUDGET_S = 2.5
+DEFAULT_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app_unified_v5.py")
+HEAVY = ("pandas", "numpy", "pyarrow", "reportlab", "openpyxl", "xlsxwriter")
+# moduli kojima je težak paket sama svrha (uvoze se tek kad zatrebaju)
+HEAVY_OK = {"kalkulator.vektor"}
+
+_COLD_RUN = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2])).run()
+t2 = time.perf_counter()
+print(json.dumps({"streamlit_s": t1 - t0, "prvi_run_s": t2 - t1,
+                  "greska": [str(e.value) for e in at.exception],
+                  "teski": [m for m in sys.argv[3].split(",") if m in sys.modules]}))
+"""
+
+_IMPORT_ONLY = r"""
+import importlib, json, sys
+for name in sys.argv[2].split(","):
+    importlib.import_module(name)
+print(json.dumps([m for m in sys.argv[1].split(",") if m in sys.modules]))
+"""
+
+
+def _workdir(app):
+    """Privremeni direktorij s kopijom cjenik.json – povijest/katalog koje app stvara ne idu u repo."""
+    d = tempfile.mkdtemp(prefix="kalkulator_start_")
+    src = os.path.join(os.path.dirname(os.path.abspath(app)), "cjenik.json")
+    if os.path.exists(src):
+        shutil.copy(src, d)
+    return d
+
+
+def _env():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (root, env.get("PYTHONPATH")) if p)
+    env.pop("KALKULATOR_TIMING", None)
+    return env
+
+
+def cold_start(app=DEFAULT_APP, timeout=60.0, importtime=False):
+    """Jedan hladni start u novom procesu → dict (sekunde po fazi, greške, učitani teški paketi).
+
+    ``importtime=True`` dodaje ``importi`` (parsirani ``-X importtime``).
+    """
+    app = os.path.abspath(app)
+    cwd = _workdir(app)
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + \
+          ["-c", _COLD_RUN, app, str(timeout), ",".join(HEAVY)]
+    try:
+        t0 = time.perf_counter()
+        p = subprocess.run(cmd, cwd=cwd, env=_env(), capture_output=True, text=True, timeout=timeout + 30)
+        wall = time.perf_counter() - t0
+    finally:
+        shutil.rmtree(cwd, ignore_errors=True)
+    lines = [ln for ln in p.stdout.splitlines() if ln.startswith("{")]
+    if p.returncode != 0 or not lines:
+        raise RuntimeError(f"hladni start nije uspio (exit {p.returncode}): {p.stderr[-2000:]}")
+    out = json.loads(lines[-1])
+    out["ukupno_s"] = wall
+    out["interpreter_s"] = max(0.0, wall - out["streamlit_s"] - out["prvi_run_s"])
+    if importtime:
+        out["importi"] = parse_importtime(p.stderr)
+    return out
+
+
+def parse_importtime(text):
+    """Izlaz ``-X importtime`` → [{"modul", "self_ms", "ukupno_ms", "dubina"}] redom učitavanja."""
+    out = []
+    for ln in text.splitlines():
+        if not ln.startswith("import time:") or "self [us]" in ln:
+            continue
+        try:
+            self_us, cum_us, name = ln.split(":", 1)[1].split("|", 2)
+            depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+            out.append({"modul": name.strip(), "self_ms": int(self_us) / 1000.0,
+                        "ukupno_ms": int(cum_us) / 1000.0, "dubina": depth})
+        except ValueError:
+            continue
+    return out
+
+
+def by_package(imports):
+    """Zbroj vlastitog vremena po vršnom paketu (pandas, streamlit, …), najskuplji prvi."""
+    acc = {}
+    for r in imports:
+        root = r["modul"].split(".", 1)[0]
+        n, s = acc.get(root, (0, 0.0))
+        acc[root] = (n + 1, s + r["self_ms"])
+    return sorted(({"paket": k, "modula": n, "ms": round(s, 1)} for k, (n, s) in acc.items()),
+                  key=lambda r: -r["ms"])
+
+
+def eager_heavy(package="kalkulator"):
+    """Teški paketi koje povuče sam import modula ``package`` (bez pokretanja ičega) – treba biti []."""
+    pkg = __import__(package)
+    names = [m.name for m in pkgutil.walk_packages(pkg.__path__, package + ".")
+             if m.name not in HEAVY_OK and not m.name.endswith("__main__")]
+    p = subprocess.run([sys.executable, "-c", _IMPORT_ONLY, ",".join(HEAVY), ",".join([package] + names)],
+                       env=_env(), capture_output=True, text=True, timeout=120)
+    if p.returncode != 0:
+        raise RuntimeError(p.stderr[-2000:])
+    return json.loads(p.stdout.strip().splitlines()[-1])
+
+
+def run_bench(app=DEFAULT_APP, runs=3, budget_s=None, out=sys.stderr):
+    """Medijan ``runs`` hladnih startova + provjera lijenih importa → (rezultat, prošao)."""
+    budget_s = budget_s if budget_s is not None else float(os.environ.get(ENV_BUDGET, DEFAULT_BUDGET_S))
+    samples = []
+    for i in range(runs):
+        r = cold_start(app)
+        samples.append(r)
+        print(f"start {i + 1}: ukupno {r['ukupno_s']:.2f} s  (interpreter {r['interpreter_s']:.2f}, "
+              f"streamlit {r['streamlit_s']:.2f}, prvi run {r['prvi_run_s']:.2f})", file=out, flush=True)
+    med = {k: statistics.median(s[k] for s in samples) for k in ("ukupno_s", "interpreter_s", "streamlit_s", "prvi_run_s")}
+    eager = eager_heavy()
+    errors = sorted({e for s in samples for e in s["greska"]})
+    ok = med["ukupno_s"] <= budget_s and not eager and not errors
+    res = {"budzet_s": budget_s, "runova": runs, **{k: round(v, 3) for k, v in med.items()},
+           "teski_nakon_prvog_runa": samples[-1]["teski"], "teski_pri_importu": eager, "greske": errors,
+           "prosao": ok}
+    print(f"medijan {med['ukupno_s']:.2f} s / budžet {budget_s:.2f} s"
+          + (f"; teški paketi pri importu: {', '.join(eager)}" if eager else "")
+          + (f"; greške u aplikaciji: {len(errors)}" if errors else "")
+          + ("  → OK" if ok else "  → PREKORAČENO"), file=out)
+    return res, ok
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.startup", description="Hladni start aplikacije.")
+    ap.add_argument("--app", default=DEFAULT_APP)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_rep = sub.add_parser("report", help="trošak importa pri hladnom startu")
+    p_rep.add_argument("--top", type=int, default=15, help="broj najskupljih modula/paketa")
+    p_rep.add_argument("--json", help="spremi cijeli izvještaj u JSON")
+    p_bench = sub.add_parser("bench", help="hladni start s budžetom (exit 1 ako je prekoračen)")
+    p_bench.add_argument("--budget", type=float, default=None,
+                         help=f"sekunde (default: ${ENV_BUDGET} ili {DEFAULT_BUDGET_S})")
+    p_bench.add_argument("--runs", type=int, default=3)
+    p_bench.add_argument("--json", help="spremi rezultat u JSON")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "bench":
+        res, ok = run_bench(args.app, args.runs, args.budget)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(res, f, indent=2, ensure_ascii=False)
+        return 0 if ok else 1
+
+    r = cold_start(args.app, importtime=True)
+    imports = r.pop("importi")
+    total = sum(x["self_ms"] for x in imports)
+    print(f"Hladni start {r['ukupno_s']:.2f} s; importi {total / 1000:.2f} s u {len(imports)} modula; "
+          f"teški paketi nakon prvog runa: {', '.join(r['teski']) or '-'}")
+    print(f"\n{'paket':<28} {'modula':>7} {'ms':>9}")
+    for row in by_package(imports)[:args.top]:
+        print(f"{row['paket']:<28} {row['modula']:>7} {row['ms']:>9.1f}")
+    print(f"\n{'modul (kumulativno)':<48} {'ms':>9}")
+    for row in sorted(imports, key=lambda x: -x["ukupno_ms"])[:args.top]:
+        print(f"{row['modul']:<48} {row['ukupno_ms']:>9.1f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({**r, "paketi": by_package(imports), "importi": imports}, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,326 @@
+"""Cjenik standardnih modula: mreža dimenzija × opcija → matrica cijena (XLSX/CSV).
+
+Svaka kombinacija osi (npr. W 300–1200 korak 50, H, D, fronta, materijal) je
+jedan spec. Specovi se izvode i računaju u nizovima kroz ``BatchPricer``
+(``vektor.calculate_many`` + ``finish_quote``) pa je cijena ista kao kod
+pojedinačnog ``quote``. Rezultat se zakreće u matricu: stupci su jedna os
+(zadano W), retci sve ostale osi redom kojim su zadane.
+
+    python -m kalkulator.sweep -o cjenik_modula.xlsx          # W 300–1200/50 × H × D
+    python -m kalkulator.sweep -g fronta=bez,Jednokrilna,Dvokrilna -g default_mat=* -o cjenik_modula.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import coerce_spec
+from .catalog import compile_catalog
+from .cjenik import load_cjenik
+from .engine import DEFAULT_SPEC
+from .exports import open_xlsx_stream, xlsx_stream_engine
+
+# standardni moduli: svaki W od 300 do 1200 korak 50, H ∈ {720, 900, 2100}, D ∈ {320, 560}
+DEFAULT_GRID = ("W=300:1200:50", "H=720,900,2100", "D=320,560")
+ALL = "*"
+# osi čija vrijednost "*" znači sve šifre iz cjenika
+CATALOG_AXES = {"default_mat": "MATS_KEYS", "default_traka": "TRAK_KEYS", "default_mat_fr": "FR_KEYS",
+                "default_traka_fr": "FTRAK_KEYS", "rez_usl": "USL_M_KEYS", "kant_usl": "USL_M_KEYS"}
+# os "fronta": bez fronte ili tip fronte (include_fronta + fronta_tip u jednoj osi)
+FRONTA_AXIS = "fronta"
+FRONTA_NONE = "bez"
+FRONTA_TIPOVI = ("Jednokrilna", "Dvokrilna")
+# derive_rows sve osim točno "Jednokrilna" računa kao dvokrilnu – vrijednosti osi se provjeravaju
+_FRONTA_VALUES = {v.lower(): v for v in (FRONTA_NONE,) + FRONTA_TIPOVI}
+_FRONTA_TIP_VALUES = {v.lower(): v for v in FRONTA_TIPOVI}
+VALUE_KEYS = ("ukupno", "pre_markup", "mats_services_total", "labor_total", "extras_total")
+CELL_COLS = ["mats_services_total", "eur_waste", "extras_total", "labor_total", "pre_markup", "eur_markup", "ukupno"]
+EXTRAS_KEYS = ("okov_rows", "oprema_rows", "dodatci_rows")
+
+
+# =============== Mreža ===============
+def _range(text):
+    """"od:do:korak" → vrijednosti uključujući ``do`` (cijeli brojevi ako su sva tri cijela)."""
+    parts = [p.strip() for p in text.split(":")]
+    if len(parts) != 3:
+        raise ValueError(f"raspon mora biti od:do:korak, a ne {text!r}")
+    start, stop, step = (float(p.replace(",", ".")) for p in parts)
+    if step <= 0:
+        raise ValueError(f"korak mora biti > 0: {text!r}")
+    n = int((stop - start) / step + 1e-9) + 1
+    vals = [start + i * step for i in range(max(n, 0))]
+    return [int(v) for v in vals] if all(v.is_integer() for v in (start, stop, step)) else vals
+
+
+def parse_axis(text, idx=None):
+    """"KLJUČ=VRIJEDNOSTI" → (ključ, [vrijednosti]) s tipovima iz ``DEFAULT_SPEC``.
+
+    Vrijednosti su lista (``720,900``), raspon (``300:1200:50``) ili ``*`` za sve
+    šifre iz cjenika (materijal, traka, usluga). Os ``fronta`` prima ``bez`` i tipove fronte.
+    """
+    key, sep, vals = text.partition("=")
+    key, vals = key.strip(), vals.strip()
+    if not sep or not vals:
+        raise ValueError(f"os mora biti KLJUČ=VRIJEDNOSTI, a ne {text!r}")
+    if key != FRONTA_AXIS and key not in DEFAULT_SPEC:
+        raise ValueError(f"nepoznat ključ specifikacije: {key!r}")
+    default = DEFAULT_SPEC.get(key)
+    if vals == ALL:
+        if key not in CATALOG_AXES or idx is None:
+            raise ValueError(f"'*' vrijedi samo za šifre iz cjenika ({', '.join(CATALOG_AXES)})")
+        values = list(idx[CATALOG_AXES[key]])
+    elif ":" in vals and isinstance(default, (int, float)) and not isinstance(default, bool):
+        values = _range(vals)
+    else:
+        values = [v.strip() for v in vals.split(",") if v.strip()]
+    return key, list(dict.fromkeys(_axis_value(key, v, idx) for v in values))
+
+
+def _axis_value(key, v, idx=None):
+    """Jedna vrijednost osi → tip iz ``DEFAULT_SPEC`` / kanonska fronta.
+
+    Šifra koje nema u cjeniku (``calculate`` bi je računao kao 0 €) i
+    nepoznata fronta su ValueError.
+    """
+    if key == FRONTA_AXIS:
+        return _fronta_value(v)
+    if key == "fronta_tip":
+        return _fronta_value(v, _FRONTA_TIP_VALUES)
+    v = coerce_spec({key: str(v)})[key]
+    if key in CATALOG_AXES and idx is not None and v not in idx[CATALOG_AXES[key]]:
+        raise ValueError(f"{key}: šifre {v!r} nema u cjeniku")
+    return v
+
+
+def _fronta_value(v, allowed=_FRONTA_VALUES):
+    """Vrijednost fronte → kanonski oblik iz ``allowed`` (bez razlike velikih/malih slova); inače ValueError."""
+    out = allowed.get(str(v).strip().lower())
+    if out is None:
+        raise ValueError(f"nepoznata fronta {v!r} (dozvoljeno: {', '.join(allowed.values())})")
+    return out
+
+
+def build_axes(grid=(), idx=None):
+    """Osi mreže: ``DEFAULT_GRID`` pa ``grid`` (ista os zamjenjuje zadanu, nova se dodaje na kraj)."""
+    axes = dict(parse_axis(g, idx) for g in DEFAULT_GRID)
+    for g in grid:
+        k, v = parse_axis(g, idx)
+        axes[k] = v
+    return list(axes.items())
+
+
+def _axis_spec(key, value):
+    if key == FRONTA_AXIS:
+        if value == FRONTA_NONE:
+            return {"include_fronta": False}
+        return {"include_fronta": True, "fronta_tip": value}
+    return {key: value}
+
+
+def expand_grid(axes, base=None):
+    """Kartezijev produkt osi → [(vrijednosti osi, spec)]; zadnja os se mijenja najbrže."""
+    base = dict(base or {})
+    keys = [k for k, _ in axes]
+    out = []
+    for combo in itertools.product(*[v for _, v in axes]):
+        spec = dict(base)
+        for k, v in zip(keys, combo):
+            spec.update(_axis_spec(k, v))
+        out.append((combo, spec))
+    return out
+
+
+# =============== Izračun ===============
+_W = {}
+
+def _init_worker(cje, extras):
+    from .microbatch import BatchPricer
+    _W["pricer"] = BatchPricer(cje, compile_catalog(cje))
+    _W["extras"] = extras
+
+def _price_chunk(specs):
+    """[(zbrojevi, površina m²) ili (None, greška)] za komad specova, redom."""
+    extras = _W["extras"]
+    out = []
+    for q in _W["pricer"]([{"spec": s, **extras} for s in specs]):
+        if isinstance(q, Exception):
+            out.append((None, f"{type(q).__name__}: {q}"))
+        else:
+            out.append(({k: round(q["totals"][k], 2) for k in CELL_COLS}, round(q["metrics"]["total_area_m2"], 3)))
+    return out
+
+
+def _chunks(seq, size):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def price_grid(specs, cje, extras=None, workers=1, chunk=1024, progress=None):
+    """Cijene za sve specove (redom) → [(zbrojevi ili None, površina m² ili greška)].
+
+    ``extras`` (okov_rows/oprema_rows/dodatci_rows) ide u svaku ćeliju. Bez
+    ``workers`` > 1 sve se računa u ovom procesu (niz je već stupčani).
+    """
+    t0 = time.perf_counter()
+    specs = list(specs)
+    extras = {k: list(v) for k, v in (extras or {}).items() if k in EXTRAS_KEYS and v}
+    chunks = list(_chunks(specs, chunk))
+    workers = min(workers or os.cpu_count() or 1, len(chunks) or 1)
+    out = []
+
+    def collect(res):
+        out.extend(res)
+        if progress:
+            progress(len(out), len(specs), time.perf_counter() - t0)
+
+    if workers <= 1:
+        _init_worker(cje, extras)
+        for c in chunks:
+            collect(_price_chunk(c))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(cje, extras)) as ex:
+            for res in ex.map(_price_chunk, chunks):
+                collect(res)
+    return out
+
+
+# =============== Matrica ===============
+def _fmt(v):
+    return ("da" if v else "ne") if isinstance(v, bool) else str(v)
+
+
+def pivot(axes, cells, results, columns="W", value="ukupno"):
+    """Matrica cijena → (zaglavlje, retci). Ćelija s greškom ostaje prazna.
+
+    ``cells`` je rezultat ``expand_grid``, ``results`` od ``price_grid`` (isti redoslijed).
+    """
+    keys = [k for k, _ in axes]
+    if columns not in keys:
+        raise ValueError(f"os stupaca {columns!r} nije u mreži ({', '.join(keys)})")
+    ci = keys.index(columns)
+    col_values = dict(axes)[columns]
+    pos = {v: i for i, v in enumerate(col_values)}
+    row_keys = [k for k in keys if k != columns]
+    rows = {}
+    for (combo, _), (totals, _) in zip(cells, results):
+        label = tuple(_fmt(v) for i, v in enumerate(combo) if i != ci)
+        row = rows.get(label)
+        if row is None:
+            row = rows[label] = [""] * len(col_values)
+        if totals is not None:
+            row[pos[combo[ci]]] = totals[value]
+    header = row_keys + [f"{columns}={_fmt(v)}" for v in col_values]
+    return header, [list(label) + vals for label, vals in rows.items()]
+
+
+def long_rows(axes, cells, results):
+    """Sve kombinacije jedna ispod druge → (zaglavlje, retci): osi, površina, zbrojevi, greška."""
+    header = [k for k, _ in axes] + ["total_area_m2"] + CELL_COLS + ["greska"]
+    rows = []
+    for (combo, _), (totals, extra) in zip(cells, results):
+        vals = [_fmt(v) for v in combo]
+        if totals is None:
+            rows.append(vals + [""] * (len(CELL_COLS) + 1) + [extra])
+        else:
+            rows.append(vals + [extra] + [totals[k] for k in CELL_COLS] + [""])
+    return header, rows
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(header)
+        w.writerows(rows)
+
+
+def write_xlsx(path, matrix, full=None, engine=None):
+    """List "Cjenik" (matrica) i opcionalno "Sve kombinacije"; vraća poruku greške ili None."""
+    engine, err = xlsx_stream_engine(engine)
+    if err:
+        return err
+    out = open_xlsx_stream(path, engine)
+    sheets = [("Cjenik", matrix, ["left" if "=" not in h else "num2" for h in matrix[0]])]
+    if full is not None:
+        n_axes = len(full[0]) - len(CELL_COLS) - 2
+        sheets.append(("Sve kombinacije", full, ["left"] * n_axes + ["num3"] + ["num2"] * len(CELL_COLS) + ["left"]))
+    for name, (header, rows), styles in sheets:
+        ws = out.sheet(name, header, styles, [max(12, len(h) + 2) for h in header], len(rows))
+        for r in rows:
+            out.append(ws, r)
+    out.close()
+    return None
+
+
+# =============== CLI ===============
+def run_sweep(grid=(), cjenik_path="cjenik.json", base=None, columns="W", value="ukupno",
+              out_path="cjenik_modula.xlsx", full_path=None, engine=None, workers=1, chunk=1024, progress=None):
+    """Cijela mreža → datoteke; vraća (broj ćelija, broj grešaka, sekunde)."""
+    t0 = time.perf_counter()
+    cje = load_cjenik(cjenik_path)
+    if base is not None and not isinstance(base, dict):
+        raise ValueError("osnovna specifikacija mora biti JSON objekt")
+    base = dict(base or {})
+    extras = {k: base.pop(k) for k in EXTRAS_KEYS if k in base}
+    idx = compile_catalog(cje)
+    for k in (*CATALOG_AXES, "fronta_tip"):
+        if base.get(k) not in (None, ""):
+            base[k] = _axis_value(k, base[k], idx)
+    axes = build_axes(grid, idx)
+    cells = expand_grid(axes, coerce_spec(base))
+    results = price_grid([s for _, s in cells], cje, extras, workers=workers, chunk=chunk, progress=progress)
+    matrix = pivot(axes, cells, results, columns, value)
+    full = long_rows(axes, cells, results)
+    if out_path.lower().endswith(".xlsx"):
+        err = write_xlsx(out_path, matrix, full, engine)
+        if err:
+            raise RuntimeError(err)
+    else:
+        write_csv(out_path, *matrix)
+    if full_path:
+        write_csv(full_path, *full)
+    n_err = sum(1 for totals, _ in results if totals is None)
+    return len(cells), n_err, time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m kalkulator.sweep",
+                                 description="Cjenik standardnih modula: mreža dimenzija i opcija → matrica cijena.")
+    ap.add_argument("-g", "--grid", action="append", default=[], metavar="KLJUČ=VRIJEDNOSTI",
+                    help="os mreže: 300:1200:50 (od:do:korak), 720,900 ili * (sve šifre iz cjenika); "
+                         f"fronta={FRONTA_NONE},Jednokrilna,Dvokrilna. Zadano: {' '.join(DEFAULT_GRID)}")
+    ap.add_argument("--spec", help="JSON s osnovnom specifikacijom (+ okov_rows/oprema_rows/dodatci_rows za svaku ćeliju)")
+    ap.add_argument("--stupci", default="W", help="os po stupcima matrice (default: W)")
+    ap.add_argument("--vrijednost", choices=VALUE_KEYS, default="ukupno", help="iznos u ćeliji matrice")
+    ap.add_argument("--cjenik", default="cjenik.json", help="JSON cjenik (default: cjenik.json)")
+    ap.add_argument("-o", "--out", default="cjenik_modula.xlsx", help="matrica: .xlsx (+ list svih kombinacija) ili .csv")
+    ap.add_argument("--sve", default=None, metavar="CSV", help="opcionalni CSV sa svim kombinacijama i zbrojevima")
+    ap.add_argument("--engine", choices=("xlsxwriter", "openpyxl"), default=None)
+    ap.add_argument("-j", "--workers", type=int, default=1, help="broj procesa (default: 1)")
+    ap.add_argument("--chunk", type=int, default=1024, help="specova po stupčanom nizu")
+    ap.add_argument("-q", "--quiet", action="store_true")
+    args = ap.parse_args(argv)
+
+    base = {}
+    if args.spec:
+        with open(args.spec, "r", encoding="utf-8") as f:
+            base = json.load(f)
+
+    def progress(n, total, dt):
+        if not args.quiet:
+            print(f"\r{n}/{total} ćelija  {n / dt if dt else 0:.0f} ćelija/s", end="", file=sys.stderr)
+
+    try:
+        n, n_err, dt = run_sweep(args.grid, args.cjenik, base, args.stupci, args.vrijednost, args.out, args.sve,
+                                 args.engine, args.workers, args.chunk, progress)
+    except ValueError as e:
+        ap.error(str(e))
+    print(f"\n{n} ćelija ({n_err} grešaka) → {args.out}, {dt:.2f} s", file=sys.stderr)
+    return 1 if n_err else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
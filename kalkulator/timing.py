@@ -0,0 +1,132 @@
+"""Mjerenje trajanja faza jednog reruna (cjenik, katalog, editori, izračun, izvozi).
+
+``StageTimer`` mjeri jedan rerun: ``with timer.stage("calculate"): ...``. Trošak
+je nekoliko ``perf_counter`` poziva po fazi, a isključen timer vraća prazan
+context manager. ``TimingLog`` čuva zadnjih N rerunova i izvozi ih u JSON koji
+se može priložiti prijavi greške.
+"""
+import datetime
+import json
+import os
+import platform
+import statistics
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+ENV_VAR = "KALKULATOR_TIMING"
+DEFAULT_HISTORY = 20
+
+_OFF = nullcontext()
+
+
+def enabled_from_env(environ=None) -> bool:
+    """``KALKULATOR_TIMING=1`` (ili true/yes/on/da) uključuje prikaz mjerenja."""
+    v = (os.environ if environ is None else environ).get(ENV_VAR, "")
+    return str(v).strip().lower() in ("1", "true", "yes", "on", "da")
+
+
+def percentiles(values, ps=(50, 90, 95, 99)):
+    """{"p50": …} metodom najbližeg ranga; prazan niz → None vrijednosti."""
+    vals = sorted(values)
+    n = len(vals)
+    return {f"p{p}": (vals[min(n - 1, max(0, -(-p * n // 100) - 1))] if n else None) for p in ps}
+
+
+class StageTimer:
+    """Trajanja faza jednog reruna; ponovljena faza se zbraja (``puta`` broji pozive)."""
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.pokrenuto = datetime.datetime.now().isoformat(timespec="seconds")
+        self._t0 = time.perf_counter()
+        self.faze = {}      # naziv -> sekunde (redoslijed prvog ulaska)
+        self.puta = {}
+
+    def stage(self, name):
+        return self._stage(name) if self.enabled else _OFF
+
+    @contextmanager
+    def _stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - t)
+
+    def add(self, name, seconds):
+        self.faze[name] = self.faze.get(name, 0.0) + seconds
+        self.puta[name] = self.puta.get(name, 0) + 1
+
+    def timed(self, name, fn, *args, **kwargs):
+        with self.stage(name):
+            return fn(*args, **kwargs)
+
+    def elapsed(self):
+        return time.perf_counter() - self._t0
+
+    def finish(self):
+        """Zapis reruna: faze, ukupno i 'ostalo' (widgeti, prikaz, Streamlit)."""
+        ukupno = self.elapsed()
+        izmjereno = sum(self.faze.values())
+        return {
+            "pokrenuto": self.pokrenuto,
+            "ukupno_s": ukupno,
+            "faze": [{"faza": k, "s": v, "puta": self.puta[k]} for k, v in self.faze.items()],
+            "ostalo_s": max(0.0, ukupno - izmjereno),
+        }
+
+
+class TimingLog:
+    """Zadnjih ``maxlen`` rerunova (najstariji ispadaju)."""
+
+    def __init__(self, maxlen=DEFAULT_HISTORY):
+        self.runs = deque(maxlen=maxlen)
+
+    def __len__(self):
+        return len(self.runs)
+
+    def add(self, run):
+        self.runs.append(run)
+        return run
+
+    def clear(self):
+        self.runs.clear()
+
+    def stage_names(self):
+        names = {}
+        for run in self.runs:
+            for f in run["faze"]:
+                names.setdefault(f["faza"], None)
+        return list(names)
+
+    def table(self, unit=1000.0):
+        """Jedan redak po rerunu (najnoviji prvi), stupci = faze u ms."""
+        names = self.stage_names()
+        out = []
+        for i, run in enumerate(reversed(self.runs)):
+            per = {f["faza"]: f["s"] for f in run["faze"]}
+            out.append({"#": len(self.runs) - i, "pokrenuto": run["pokrenuto"],
+                        "ukupno": round(run["ukupno_s"] * unit, 1),
+                        **{n: round(per[n] * unit, 1) if n in per else None for n in names},
+                        "ostalo": round(run["ostalo_s"] * unit, 1)})
+        return out
+
+    def summary(self, unit=1000.0):
+        """Po fazi: broj rerunova u kojima se pojavila, medijan i maksimum (ms)."""
+        out = []
+        for n in self.stage_names():
+            vals = [f["s"] for run in self.runs for f in run["faze"] if f["faza"] == n]
+            out.append({"faza": n, "rerunova": len(vals),
+                        "medijan": round(statistics.median(vals) * unit, 1),
+                        "max": round(max(vals) * unit, 1)})
+        return out
+
+    def to_json(self, **extra):
+        return json.dumps({
+            "generirano": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platforma": platform.platform(),
+            **extra,
+            "rerunovi": list(self.runs),
+        }, ensure_ascii=False, indent=2)
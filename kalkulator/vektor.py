@@ -0,0 +1,214 @@
+"""Stupčani (NumPy) izračun elemenata za velike serije korpusa.
+
+Elementi su polja (A, B, kom, indeks materijala, indeks trake, kod pravila
+kantiranja) umjesto liste dictova, pa se cijeli katalog varijanti računa u
+nekoliko operacija nad poljima. Redoslijed operacija prati ``calculate`` tako
+da su rezultati isti do bita, a zaokruživanje isto kao Pythonov ``round``.
+"""
+import numpy as np
+
+from .engine import extract_short, short_code_for
+from .parts import PartCost
+from .kant import RULE_COUNTS, RULE_MANUAL, edge_rule_code
+
+HDF_SIFRA = "HDF-001"
+
+# (dugi, kratki) po kodu pravila – indeksirano kodom
+_RULE_DUGI = np.array([RULE_COUNTS[c][0] for c in sorted(RULE_COUNTS)], dtype=np.float64)
+_RULE_KRATKI = np.array([RULE_COUNTS[c][1] for c in sorted(RULE_COUNTS)], dtype=np.float64)
+
+
+def round_half_even(x, ndigits):
+    """Vektorski ``round(x, ndigits)`` s istim rezultatom kao Pythonov round.
+
+    ``np.round`` skalira s 10**ndigits pa se na samim polovicama može
+    razlikovati; te rijetke vrijednosti zaokružimo Pythonom.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    out = np.round(x, ndigits)
+    s = x * (10.0 ** ndigits)
+    near_half = np.flatnonzero(np.abs(s - np.floor(s) - 0.5) < 1e-6)
+    for i in near_half:
+        out[i] = round(float(x[i]), ndigits)
+    return out
+
+
+# =============== Cjenik → polja ===============
+def pricebook_arrays(MATS, TRAK, FRONTS, FTRAK, USLG, rez_usl, kant_usl):
+    """Šifre materijala/traka → indeksi, cijene i kratke labele (liste, proširive)."""
+    pb = {
+        "rez_cij_m": USLG[rez_usl]["cijena_eur_po_m"],
+        "kant_usl_cij_m": USLG[kant_usl]["cijena_eur_po_m"],
+        "mat_code": {}, "mat_price": [], "mat_label": [], "mat_is_hdf": [],
+        "traka_code": {}, "traka_price": [], "traka_label": [],
+        "_src": (MATS, TRAK, FRONTS, FTRAK),
+    }
+    for k in list(MATS) + list(FRONTS):
+        mat_code(pb, k)
+    for k in list(TRAK) + list(FTRAK):
+        traka_code(pb, k)
+    return pb
+
+def mat_code(pb, sifra):
+    code = pb["mat_code"].get(sifra)
+    if code is None:
+        MATS, _, FRONTS, _ = pb["_src"]
+        obj = MATS.get(sifra) or FRONTS.get(sifra) or {}
+        code = pb["mat_code"][sifra] = len(pb["mat_price"])
+        pb["mat_price"].append(obj.get("cijena_eur_po_m2") or 0.0)
+        pb["mat_label"].append(extract_short(obj.get("naziv", str(sifra))))
+        pb["mat_is_hdf"].append(sifra == HDF_SIFRA)
+    return code
+
+def traka_code(pb, sifra):
+    code = pb["traka_code"].get(sifra)
+    if code is None:
+        _, TRAK, _, FTRAK = pb["_src"]
+        obj = TRAK.get(sifra) or FTRAK.get(sifra) or {}
+        code = pb["traka_code"][sifra] = len(pb["traka_price"])
+        pb["traka_price"].append(obj.get("cijena_eur_po_m") or 0.0)
+        pb["traka_label"].append(extract_short(obj.get("naziv", str(sifra))))
+    return code
+
+
+def encode_parts(row_lists, pb):
+    """Liste redaka (jedna lista po korpusu) → polja elemenata s indeksom korpusa ``quote``."""
+    q, A, B, kom, mat, traka, rule, dugi, kratki, naziv = [], [], [], [], [], [], [], [], [], []
+    n_quotes = 0
+    for qi, rows in enumerate(row_lists):
+        n_quotes = qi + 1
+        for r in rows:
+            q.append(qi)
+            A.append(float(r["A_mm"])); B.append(float(r["B_mm"])); kom.append(int(r["kom"]))
+            mat.append(mat_code(pb, r["mat"])); traka.append(traka_code(pb, r["traka"]))
+            rule.append(edge_rule_code(r["naziv"], bool(r.get("auto", False))))
+            dugi.append(int(r.get("kant_dugi", 0))); kratki.append(int(r.get("kant_kratki", 0)))
+            naziv.append(r["naziv"])
+    return {
+        "quote": np.array(q, dtype=np.intp),
+        "A": np.array(A, dtype=np.float64), "B": np.array(B, dtype=np.float64),
+        "kom": np.array(kom, dtype=np.int64),
+        "mat": np.array(mat, dtype=np.intp), "traka": np.array(traka, dtype=np.intp),
+        "rule": np.array(rule, dtype=np.intp),
+        "kant_dugi": np.array(dugi, dtype=np.int64), "kant_kratki": np.array(kratki, dtype=np.int64),
+        "naziv": naziv, "n_quotes": n_quotes,
+    }
+
+
+# =============== Izračun nad poljima ===============
+def price_parts(parts, pb, n_quotes=None):
+    """Izračunaj sve stupce elemenata i metrike po korpusu.
+
+    Vraća (cols, metrics): ``cols`` su neokrugljene vrijednosti po elementu,
+    ``metrics`` su polja duljine ``n_quotes`` s istim ključevima kao ``calculate``.
+    """
+    A = parts["A"]; B = parts["B"]; k = parts["kom"].astype(np.float64)
+    rule = parts["rule"]
+    mx = np.maximum(A, B); mn = np.minimum(A, B)
+
+    manual = rule == RULE_MANUAL
+    dugi = np.where(manual, np.clip(parts["kant_dugi"], 0, 2), _RULE_DUGI[rule])
+    kratki = np.where(manual, np.clip(parts["kant_kratki"], 0, 2), _RULE_KRATKI[rule])
+
+    rez_m = (mx + mn) / 1000.0 * k
+    kant_m = (dugi * mx + kratki * mn) / 1000.0 * k
+    area_m2 = (A * B) / 1_000_000.0 * k
+
+    mat_price = np.asarray(pb["mat_price"], dtype=np.float64)[parts["mat"]]
+    traka_price = np.asarray(pb["traka_price"], dtype=np.float64)[parts["traka"]]
+    eur_mat = mat_price * area_m2
+    eur_traka = traka_price * kant_m
+    eur_rez = pb["rez_cij_m"] * rez_m
+    eur_kant_usl = pb["kant_usl_cij_m"] * kant_m
+    is_hdf = np.asarray(pb["mat_is_hdf"], dtype=bool)[parts["mat"]]
+
+    cols = dict(kant_m=kant_m, rezanje_m=rez_m, povrsina_m2=area_m2,
+                eur_materijal=eur_mat, eur_traka=eur_traka, eur_usl_kant=eur_kant_usl, eur_rezanje=eur_rez,
+                eur_element=eur_mat + eur_traka + eur_rez + eur_kant_usl, is_hdf=is_hdf)
+
+    # bincount zbraja redom kao petlja u calculate → isti float rezultat
+    if n_quotes is None:
+        n_quotes = parts["n_quotes"]
+    q = parts["quote"]
+    def per_quote(w):
+        return np.bincount(q, weights=w, minlength=n_quotes)
+    zero = np.zeros_like(eur_mat)
+    metrics = dict(
+        total_area_m2=per_quote(area_m2),
+        total_rezanje_m=per_quote(rez_m),
+        total_kant_m=per_quote(kant_m),
+        cijena_mat_eur=per_quote(eur_mat),
+        cijena_kant_traka_eur=per_quote(eur_traka),
+        cijena_kant_usl_eur=per_quote(eur_kant_usl),
+        cijena_rez_eur=per_quote(eur_rez),
+        iveral_area_m2=per_quote(np.where(is_hdf, zero, area_m2)),
+        iveral_eur=per_quote(np.where(is_hdf, zero, eur_mat)),
+        hdf_area_m2=per_quote(np.where(is_hdf, area_m2, zero)),
+        hdf_eur=per_quote(np.where(is_hdf, eur_mat, zero)),
+    )
+    return cols, metrics
+
+
+def report_columns(parts, cols):
+    """Stupci izvještaja zaokruženi kao u ``calculate`` (ključevi = nazivi stupaca)."""
+    return {
+        "A (mm)": np.trunc(parts["A"]).astype(np.int64),
+        "B (mm)": np.trunc(parts["B"]).astype(np.int64),
+        "Kom": parts["kom"],
+        "Kant m": round_half_even(cols["kant_m"], 3),
+        "Rezanje m": round_half_even(cols["rezanje_m"], 3),
+        "Površina m²": round_half_even(cols["povrsina_m2"], 3),
+        "€ Materijal": round_half_even(cols["eur_materijal"], 2),
+        "€ Traka": round_half_even(cols["eur_traka"], 2),
+        "€ Usl. kant": round_half_even(cols["eur_usl_kant"], 2),
+        "€ Rezanje": round_half_even(cols["eur_rezanje"], 2),
+        "€ Element (ukupno)": round_half_even(cols["eur_element"], 2),
+    }
+
+
+def calculate_columnar(report_rows, rez_usl, kant_usl, MATS, TRAK, FRONTS, FTRAK, USLG):
+    """Isto što i ``calculate`` (isti potpis i rezultat), ali preko polja."""
+    pb = pricebook_arrays(MATS, TRAK, FRONTS, FTRAK, USLG, rez_usl, kant_usl)
+    parts = encode_parts([report_rows], pb)
+    cols, m = price_parts(parts, pb, n_quotes=1)
+    rc = report_columns(parts, cols)
+    lists = {name: arr.tolist() for name, arr in rc.items()}
+    mat_label = [pb["mat_label"][i] for i in parts["mat"]]
+    traka_label = [pb["traka_label"][i] for i in parts["traka"]]
+    report = []
+    for i, naziv in enumerate(parts["naziv"]):
+        row = {"Naziv": naziv, "Oznaka": short_code_for(naziv), "Mat": mat_label[i], "Traka": traka_label[i]}
+        for name in rc:
+            row[name] = lists[name][i]
+        report.append(row)
+    metrics = {key: float(arr[0]) for key, arr in m.items()}
+    return report, metrics
+
+
+def price_many(row_lists, rez_usl, kant_usl, MATS, TRAK, FRONTS, FTRAK, USLG):
+    """Metrike za mnogo korpusa odjednom: dict polja duljine ``len(row_lists)``."""
+    pb = pricebook_arrays(MATS, TRAK, FRONTS, FTRAK, USLG, rez_usl, kant_usl)
+    parts = encode_parts(row_lists, pb)
+    _, metrics = price_parts(parts, pb, n_quotes=len(row_lists))
+    return metrics
+
+
+def calculate_many(row_lists, pb):
+    """``calculate`` za mnogo korpusa s istim uslugama u jednom prolazu nad poljima.
+
+    ``pb`` je ``pricebook_arrays`` (može se čuvati između poziva). Vraća listu
+    (report, metrics) po korpusu – isti zapisi (``PartCost``) i brojevi kao ``calculate``.
+    """
+    n = len(row_lists)
+    parts = encode_parts(row_lists, pb)
+    cols, m = price_parts(parts, pb, n_quotes=n)
+    rc = report_columns(parts, cols)
+    lists = [arr.tolist() for arr in rc.values()]
+    mat_label = pb["mat_label"]; traka_label = pb["traka_label"]
+    mats = parts["mat"].tolist(); traks = parts["traka"].tolist()
+    reports = [[] for _ in range(n)]
+    for i, (qi, naziv) in enumerate(zip(parts["quote"].tolist(), parts["naziv"])):
+        reports[qi].append(PartCost(naziv, short_code_for(naziv), mat_label[mats[i]], traka_label[traks[i]],
+                                    *[col[i] for col in lists]))
+    metric_lists = {key: arr.tolist() for key, arr in m.items()}
+    return [(reports[qi], {key: vals[qi] for key, vals in metric_lists.items()}) for qi in range(n)]